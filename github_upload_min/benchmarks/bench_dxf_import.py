@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+from dxf_import import DxfPipeLayer, read_dxf_network  # noqa: E402
+
+
+DEFAULT_ENTITIES = 100_000
+# Цель для 10⁵ примитивов: «несколько секунд» и пиковая память Python (tracemalloc) вместе с результатом.
+DEFAULT_MAX_TIME_S = 5.0
+DEFAULT_MAX_PEAK_MB = 250.0
+
+BRANCHES_PER_MAIN = 49
+LAYER = "В1"
+
+
+def write_tee_drawing(path: Path, n_entities: int = DEFAULT_ENTITIES, seed: int = 0) -> int:
+    """
+    Чертеж-эталон: магистрали LWPOLYLINE (11 вершин через 10 м) и ответвления LINE по 3 м, примыкающие
+    к магистрали между вершинами (тройники в середине звена, конец смещен до ±2 мм). Возвращает число примитивов.
+    """
+    rng = np.random.default_rng(seed)
+    n_main = max(n_entities // (BRANCHES_PER_MAIN + 1), 1)
+    out: List[str] = ["0\nSECTION\n2\nHEADER\n9\n$INSUNITS\n70\n4\n0\nENDSEC\n0\nSECTION\n2\nENTITIES\n"]
+    handle = 1
+    for r in range(n_main):
+        y = r * 8000.0
+        out.append(f"0\nLWPOLYLINE\n5\n{handle:X}\n8\n{LAYER}\n90\n11\n70\n0\n")
+        handle += 1
+        out.append("".join(f"10\n{k * 10000.0}\n20\n{y}\n" for k in range(11)))
+        dy = rng.uniform(-2.0, 2.0, BRANCHES_PER_MAIN)
+        for k in range(BRANCHES_PER_MAIN):
+            x = 1370.0 + k * 2000.0
+            y2 = y + (3000.0 if k % 2 else -3000.0)
+            out.append(
+                f"0\nLINE\n5\n{handle:X}\n8\n{LAYER}\n10\n{x}\n20\n{y + dy[k]}\n30\n0.0\n11\n{x}\n21\n{y2}\n31\n0.0\n"
+            )
+            handle += 1
+    out.append("0\nENDSEC\n0\nEOF\n")
+    path.write_text("".join(out), encoding="utf-8")
+    return n_main * (BRANCHES_PER_MAIN + 1)
+
+
+def run(
+    n_entities: int = DEFAULT_ENTITIES,
+    repeat: int = 3,
+    max_time_s: float = DEFAULT_MAX_TIME_S,
+    max_peak_mb: float = DEFAULT_MAX_PEAK_MB,
+) -> int:
+    layers = [DxfPipeLayer(LAYER, "steel", 0.025)]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "tees.dxf"
+        n = write_tee_drawing(path, n_entities)
+        size_mb = path.stat().st_size / 1e6
+
+        best = float("inf")
+        for _ in range(max(int(repeat), 1)):
+            t0 = time.perf_counter()
+            net = read_dxf_network(path, layers)
+            best = min(best, time.perf_counter() - t0)
+            del net
+
+        # Память — отдельным прогоном: tracemalloc замедляет разбор.
+        tracemalloc.start()
+        net = read_dxf_network(path, layers)
+        peak_mb = tracemalloc.get_traced_memory()[1] / 1e6
+        tracemalloc.stop()
+
+    print(f"чертеж: {n} примитивов, {size_mb:.1f} МБ")
+    print(f"узлов {len(net.nodes)}, участков {len(net.segments)}; {'; '.join(net.warnings) or 'без предупреждений'}")
+    print(f"время (лучшее из {max(int(repeat), 1)}): {best:.2f} с, пик памяти (tracemalloc): {peak_mb:.0f} МБ")
+
+    failed: List[str] = []
+    if best > max_time_s:
+        failed.append(f"время {best:.2f} с больше {max_time_s:.2f} с")
+    if peak_mb > max_peak_mb:
+        failed.append(f"пик памяти {peak_mb:.0f} МБ больше {max_peak_mb:.0f} МБ")
+    if failed:
+        print("Цель не достигнута: " + "; ".join(failed))
+        return 1
+    print("Цель достигнута")
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Бенчмарк read_dxf_network: магистрали с тройниками в середине звеньев")
+    parser.add_argument("--entities", type=int, default=DEFAULT_ENTITIES, help="число примитивов чертежа")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--max-time", type=float, default=DEFAULT_MAX_TIME_S, help="допустимое время разбора, с")
+    parser.add_argument("--max-peak-mb", type=float, default=DEFAULT_MAX_PEAK_MB, help="допустимый пик памяти, МБ")
+    args = parser.parse_args(argv)
+    return run(n_entities=args.entities, repeat=args.repeat, max_time_s=args.max_time, max_peak_mb=args.max_peak_mb)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,210 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+import hydraulics as hyd  # noqa: E402
+
+
+BASELINE_DIR = ROOT / "benchmarks" / "baselines"
+DEFAULT_BASELINE = BASELINE_DIR / "hydraulics.json"
+DEFAULT_THRESHOLD = 0.20  # допустимое падение пропускной способности относительно эталона
+
+BATCH_SIZES = (1_000, 10_000, 100_000, 1_000_000)
+# Скалярные вызовы идут в цикле Python: 10⁶ — только с --full.
+SCALAR_SIZES = (1_000, 10_000, 100_000)
+SCALAR_SIZES_FULL = SCALAR_SIZES + (1_000_000,)
+
+# Подготовленный сценарий: () -> None, число операций в одном прогоне.
+Case = Tuple[str, int, Callable[[], None]]
+
+
+def _inputs(n: int, seed: int = 0) -> Dict[str, np.ndarray]:
+    # Детерминированные входные данные в рабочем диапазоне внутренних водопроводов.
+    rng = np.random.default_rng(seed)
+    dp = 10.0 ** rng.uniform(np.log10(0.012), np.log10(0.3), n)
+    v = 10.0 ** rng.uniform(np.log10(0.05), np.log10(3.0), n)
+    return {
+        "q_l_s": v * np.pi * dp * dp / 4.0 * 1000.0,
+        "dp_m": dp,
+        "v_m_s": v,
+        "length_m": rng.uniform(1.0, 100.0, n),
+        "temp_c": rng.uniform(5.0, 65.0, n),
+        "is_new": rng.random(n) < 0.5,
+    }
+
+
+def _cases(full: bool, materials: List[str]) -> List[Case]:
+    cases: List[Case] = []
+    scalar_sizes = SCALAR_SIZES_FULL if full else SCALAR_SIZES
+    mat0 = materials[0]
+
+    for n in scalar_sizes:
+        x = _inputs(n)
+        q, dp, ln, t, new = (x[k].tolist() for k in ("q_l_s", "dp_m", "length_m", "temp_c", "is_new"))
+
+        def _calc_scalar(q=q, dp=dp, ln=ln, t=t, new=new) -> None:
+            for j in range(len(q)):
+                hyd.calc_hydraulics(mat0, q[j], dp[j], ln[j], t[j], new[j], "k", 0.2, 0.0)
+
+        cases.append((f"calc_hydraulics/scalar/{n}", n, _calc_scalar))
+
+        def _nu_scalar(t=t) -> None:
+            for tc in t:
+                hyd.water_kinematic_viscosity_m2_s(tc)
+
+        cases.append((f"water_kinematic_viscosity_m2_s/scalar/{n}", n, _nu_scalar))
+
+        def _find_scalar(q=q[: max(n // 10, 1)]) -> None:
+            for qi in q:
+                hyd.find_recommended_diameter_mm(mat0, qi, 10.0, True)
+
+        cases.append((f"find_recommended_diameter_mm/scalar/{max(n // 10, 1)}", max(n // 10, 1), _find_scalar))
+
+        v, nu = x["v_m_s"].tolist(), hyd.water_kinematic_viscosity_m2_s_batch(x["temp_c"]).tolist()
+        for mat in materials:
+
+            def _mat_scalar(mat=mat, dp=dp, v=v, nu=nu, new=new) -> None:
+                for j in range(len(v)):
+                    hyd._material_i_lambda(mat, dp[j], v[j], nu[j], new[j])
+
+            cases.append((f"_material_i_lambda/{mat}/scalar/{n}", n, _mat_scalar))
+
+    for n in BATCH_SIZES:
+        x = _inputs(n)
+        nu = hyd.water_kinematic_viscosity_m2_s_batch(x["temp_c"])
+        mixed = np.array(materials, dtype=object)[np.arange(n) % len(materials)]
+
+        def _calc_batch(x=x, mixed=mixed) -> None:
+            hyd.calc_hydraulics_batch(mixed, x["q_l_s"], x["dp_m"], x["length_m"], x["temp_c"], x["is_new"], "k", 0.2, 0.0)
+
+        cases.append((f"calc_hydraulics_batch/mixed/{n}", n, _calc_batch))
+
+        def _nu_batch(x=x) -> None:
+            hyd.water_kinematic_viscosity_m2_s_batch(x["temp_c"])
+
+        cases.append((f"water_kinematic_viscosity_m2_s/batch/{n}", n, _nu_batch))
+
+        def _find_batch(x=x) -> None:
+            hyd.find_recommended_diameters_mm(mat0, x["q_l_s"], 10.0, True)
+
+        cases.append((f"find_recommended_diameters_mm/batch/{n}", n, _find_batch))
+
+        for mat in materials:
+            arr = np.full(n, mat, dtype=object)
+
+            def _mat_batch(arr=arr, x=x, nu=nu) -> None:
+                hyd._material_i_lambda_batch(arr, x["dp_m"], x["v_m_s"], nu, x["is_new"])
+
+            cases.append((f"_material_i_lambda/{mat}/batch/{n}", n, _mat_batch))
+    return cases
+
+
+def _time_case(fn: Callable[[], None], n_ops: int, repeat: int, min_time_s: float) -> float:
+    # Лучший из repeat прогонов (в каждом — столько повторов, чтобы набрать min_time_s); результат — операций в секунду.
+    fn()
+    best = float("inf")
+    for _ in range(max(int(repeat), 1)):
+        loops = 0
+        t0 = time.perf_counter()
+        while True:
+            fn()
+            loops += 1
+            dt = time.perf_counter() - t0
+            if dt >= min_time_s:
+                break
+        best = min(best, dt / loops)
+    return n_ops / best if best > 0 else float("inf")
+
+
+def _environment() -> Dict[str, str]:
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": str(os.cpu_count() or 0),
+    }
+
+
+def run(
+    baseline: Path = DEFAULT_BASELINE,
+    save_baseline: bool = False,
+    threshold: float = DEFAULT_THRESHOLD,
+    full: bool = False,
+    name_filter: str = "",
+    repeat: int = 5,
+    min_time_s: float = 0.05,
+) -> int:
+    cases = [c for c in _cases(full, list(hyd.MATERIALS)) if name_filter in c[0]]
+    results: Dict[str, float] = {}
+    for name, n_ops, fn in cases:
+        results[name] = _time_case(fn, n_ops, repeat, min_time_s)
+        print(f"{name:60s} {results[name]:>14,.0f} оп/с")
+
+    if save_baseline:
+        baseline.parent.mkdir(parents=True, exist_ok=True)
+        payload = {"environment": _environment(), "ops_per_s": results}
+        baseline.write_text(json.dumps(payload, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+        print(f"written: {baseline}")
+        return 0
+
+    if not baseline.exists():
+        # Без эталона проверка замедления не выполнена — это ошибка, а не успех (иначе CI всегда зеленый).
+        print(f"Эталон не найден: {baseline} (снимите его на этой машине: --save-baseline)")
+        return 2
+    ref = json.loads(baseline.read_text(encoding="utf-8"))
+    if ref.get("environment") != _environment():
+        print("Внимание: эталон снят в другом окружении, сравнение ориентировочное")
+    regressions: List[str] = []
+    for name, ops in results.items():
+        ref_ops: Optional[float] = ref.get("ops_per_s", {}).get(name)
+        if not ref_ops:
+            continue
+        ratio = ops / ref_ops
+        if ratio < 1.0 - threshold:
+            regressions.append(f"{name}: {ops:,.0f} оп/с против {ref_ops:,.0f} ({(ratio - 1.0) * 100:+.1f}%)")
+    if regressions:
+        print(f"Замедление больше {threshold * 100:.0f}%:")
+        for line in regressions:
+            print(f"- {line}")
+        return 1
+    print(f"Замедлений больше {threshold * 100:.0f}% нет")
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Бенчмарки hydraulics.py (скаляр и пакеты 10³–10⁶)")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE, help="JSON-файл эталона")
+    parser.add_argument("--save-baseline", action="store_true", help="записать текущие результаты как эталон")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="допустимое падение, доля (0.2 = 20%%)")
+    parser.add_argument("--full", action="store_true", help="включить 10⁶ скалярных вызовов")
+    parser.add_argument("--filter", default="", help="подстрока имени сценария")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.05, help="минимальная длительность одного прогона, с")
+    args = parser.parse_args(argv)
+    return run(
+        baseline=args.baseline,
+        save_baseline=args.save_baseline,
+        threshold=args.threshold,
+        full=args.full,
+        name_filter=args.filter,
+        repeat=args.repeat,
+        min_time_s=args.min_time,
+    )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,7 +4,6 @@ import csv
 import os
 import sys
 import base64
-import re
 from datetime import datetime
 from io import BytesIO, StringIO
 from pathlib import Path
@@ -40,6 +39,8 @@ from hydraulics import (
     calc_hydraulics,
 )
 from passport_gvs_docx import build_gvs_passport_docx
+from meters import pick_meter
+from pipe_catalog import get_pipe_catalog
 from report_docx import build_report_docx
 
 
@@ -1648,10 +1649,6 @@ with tab_hyd:
         "Формулы и ограничения применяются для ХВС/ГВС по СП 30.13330.2020, СП 31.13330.2021 и профильным таблицам гидравлики."
     )
 
-    def _parse_sdr(label: str) -> float | None:
-        m = re.search(r"SDR\s*([0-9]+(?:\.[0-9]+)?)", str(label))
-        return float(m.group(1)) if m else None
-
     def _reset_hyd_form(material_code: str) -> None:
         keys_to_drop = [
             f"hyd_system_{material_code}",
@@ -1836,11 +1833,7 @@ with tab_hyd:
                             sdr_sel = st.selectbox("Серия SDR/SN", options=PLASTIC_SDR_SERIES, key=f"hyd_sdr_{mat_code}")
                         else:
                             sdr_sel = st.selectbox("Серия SDR/SN", options=MLPEX_SDR_SERIES, key=f"hyd_sdr_{mat_code}")
-                        sdr_value = _parse_sdr(sdr_sel)
-                        if selected_dout > 0 and sdr_value and sdr_value > 0:
-                            s_mm = round(float(selected_dout) / float(sdr_value), 2)
-                        else:
-                            s_mm = 0.0
+                        s_mm = get_pipe_catalog().wall_mm(mat_code, float(selected_dout), sdr_sel) if selected_dout > 0 else 0.0
                         st.caption(f"Толщина стенки s = {s_mm:.2f} мм (авто)")
                     elif mat_code == "copper":
                         selected_dout_float = float(d_out_mm)
@@ -2296,65 +2289,6 @@ with tab_hyd:
         st.caption("СП 30.13330.2020: п. 8.27 и п. 12")
         st.markdown("`Hтр = Hгеом + Hпотерь + Hсвоб + hсч + Hтепл + Hввод`")
 
-        meter_table = [
-            {"dn": 15, "q_exp_m3_h": 1.2, "q_max_m3_h": 3.0, "s": 14.5},
-            {"dn": 20, "q_exp_m3_h": 2.0, "q_max_m3_h": 5.0, "s": 5.18},
-            {"dn": 25, "q_exp_m3_h": 2.8, "q_max_m3_h": 7.0, "s": 2.64},
-            {"dn": 32, "q_exp_m3_h": 4.0, "q_max_m3_h": 10.0, "s": 1.3},
-            {"dn": 40, "q_exp_m3_h": 6.4, "q_max_m3_h": 16.0, "s": 0.5},
-            {"dn": 50, "q_exp_m3_h": 12.0, "q_max_m3_h": 30.0, "s": 0.143},
-            {"dn": 65, "q_exp_m3_h": 17.0, "q_max_m3_h": 70.0, "s": 810e-5},
-            {"dn": 80, "q_exp_m3_h": 36.0, "q_max_m3_h": 110.0, "s": 264e-5},
-            {"dn": 100, "q_exp_m3_h": 65.0, "q_max_m3_h": 180.0, "s": 76.6e-5},
-            {"dn": 150, "q_exp_m3_h": 140.0, "q_max_m3_h": 350.0, "s": 13e-5},
-            {"dn": 200, "q_exp_m3_h": 210.0, "q_max_m3_h": 600.0, "s": 3.5e-5},
-            {"dn": 250, "q_exp_m3_h": 380.0, "q_max_m3_h": 1000.0, "s": 1.8e-5},
-        ]
-
-        def _meter_type_by_dn(dn: int) -> str:
-            return "Крыльчатый" if int(dn) <= 40 else "Турбинный"
-
-        def _meter_limit_m(dn: int, with_fire: bool) -> float:
-            meter_type = _meter_type_by_dn(dn)
-            if with_fire:
-                return 10.0 if meter_type == "Крыльчатый" else 5.0
-            return 5.0 if meter_type == "Крыльчатый" else 2.5
-
-        def _pick_meter(q_avg_m3_h: float, q_l_s: float, with_fire: bool) -> dict:
-            qavg = max(float(q_avg_m3_h), 0.0)
-            qs = max(float(q_l_s), 0.0)
-            # СП 30.13330.2020 п.12.14: предварительный подбор по среднечасовому расходу
-            # с проверкой на эксплуатационный расход из табл. 12.1.
-            by_avg = [r for r in meter_table if qavg <= float(r["q_exp_m3_h"])]
-            pool = by_avg if by_avg else [meter_table[-1]]
-            chosen = None
-            for r in pool:
-                dn = int(r["dn"])
-                s = float(r["s"])
-                h = s * (qs ** 2)
-                lim = _meter_limit_m(dn, with_fire)
-                if h <= lim:
-                    chosen = dict(r)
-                    break
-            if chosen is None:
-                chosen = dict(pool[-1])
-            dn = int(chosen["dn"])
-            s = float(chosen["s"])
-            h = s * (qs ** 2)
-            lim = _meter_limit_m(dn, with_fire)
-            return {
-                "dn": dn,
-                "q_avg_m3_h": qavg,
-                "q_l_s": qs,
-                "q_exp_m3_h": float(chosen["q_exp_m3_h"]),
-                "q_max_m3_h": float(chosen["q_max_m3_h"]),
-                "s": s,
-                "h_m": h,
-                "limit_m": lim,
-                "ok": h <= lim,
-                "meter_type": _meter_type_by_dn(dn),
-            }
-
         h_geo_default = float(st.session_state.get("passport_h_top", 0.0) or 0.0)
         h_free_default = float(st.session_state.get("passport_free_head_m", 20.0) or 20.0)
         q_hvs_default = float(water_res.get("cold_max_l_sec", 0.0)) if "water_res" in locals() else 0.0
@@ -2489,7 +2423,7 @@ with tab_hyd:
             st.caption("Расходы автоподхватываются из общего расчета воды, при необходимости можно изменить вручную.")
 
         q_meter_check_l_s = float(q_active) + (float(q_fire_meter_l_s) if fire_mode else 0.0)
-        meter_active = _pick_meter(qh_active, q_meter_check_l_s, fire_mode)
+        meter_active = pick_meter(qh_active, q_meter_check_l_s, fire_mode)
         has_itp_heating = bool(st.session_state.get("passport_has_itp_heating", False))
         h_hex_m = 3.0 if has_itp_heating else 0.0
         # В Hтр учитываем потери счетчика на хозяйственный расход;
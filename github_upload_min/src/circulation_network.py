@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+import numpy as np
+
+from calcs import calc_gvs_passport
+from pipe_network import NetworkNode, _accumulate_flows, _build_tree_index
+
+
+# Как в calc_gvs_passport: C ≈ 1 ккал/(кг·°C), ρ ≈ 1 кг/л, 1 кВт = 860 ккал/ч.
+_L_S_PER_KW_K = 860.0 / 3600.0
+
+# Коэффициент теплоотдачи с наружной поверхности (конвекция + излучение в помещении), Вт/(м2·°C).
+OUTER_HEAT_TRANSFER_W_M2K = 10.0
+
+
+@dataclass
+class CirculationSegment:
+    seg_id: str
+    from_node: str  # узел со стороны водонагревателя
+    to_node: str
+    length_m: float
+    d_out_mm: float
+    insulation_mm: float = 0.0
+    insulation_lambda_w_mk: float = 0.04  # теплопроводность изоляции, Вт/(м·°C)
+    ambient_c: float = 20.0
+    unit_loss_w_m: float = 0.0  # > 0 — удельные потери заданы явно (по каталогу), при t подачи
+
+
+@dataclass
+class CirculationResult:
+    segment_ids: List[str]
+    heat_loss_w: np.ndarray  # теплопотери участка
+    t_start_c: np.ndarray
+    t_end_c: np.ndarray
+    qcir_l_s: np.ndarray  # циркуляционный расход через участок
+    qht_kw: float  # ΣQht по сети
+    qcir_l_s_total: float
+    min_end_temp_c: float
+    iterations: int
+    node_temp_c: Dict[str, float] = field(default_factory=dict)
+
+
+def pipe_heat_loss_w_m(
+    t_water_c,
+    d_out_mm,
+    insulation_mm,
+    insulation_lambda_w_mk,
+    ambient_c,
+) -> np.ndarray:
+    # Удельные теплопотери, Вт/м: q = (t - tокр) / (ln(Dиз/Dн)/(2πλ) + 1/(α·π·Dиз)).
+    d_out = np.maximum(np.asarray(d_out_mm, dtype=float), 1.0e-3) / 1000.0
+    ins = np.maximum(np.asarray(insulation_mm, dtype=float), 0.0) / 1000.0
+    lam = np.maximum(np.asarray(insulation_lambda_w_mk, dtype=float), 1.0e-6)
+    d_ins = d_out + 2.0 * ins
+    r_total = np.log(d_ins / d_out) / (2.0 * math.pi * lam) + 1.0 / (OUTER_HEAT_TRANSFER_W_M2K * math.pi * d_ins)
+    return np.maximum(np.asarray(t_water_c, dtype=float) - np.asarray(ambient_c, dtype=float), 0.0) / r_total
+
+
+def calc_circulation_network(
+    nodes: List[NetworkNode],
+    segments: List[CirculationSegment],
+    heater_node: str,
+    t_hot_c: float,
+    delta_t_supply_c: float,
+    tol_w: float = 1.0e-3,
+    max_iter: int = 20,
+) -> CirculationResult:
+    """
+    Теплогидравлический расчет подающих трубопроводов ГВС в режиме циркуляции.
+    - теплопотери участков — векторно по всем участкам, при средней температуре воды на участке;
+    - общий циркуляционный расход — по формуле (16) СП 30.13330.2020: q = ΣQht / (Δt·C);
+      в узлах ветвления он делится пропорционально теплопотерям нижележащих ветвей;
+    - температура в узлах — проходом от водонагревателя: Δt участка = Qht / (C·q).
+    Потери зависят от температуры, поэтому расчет повторяется до сходимости ΣQht.
+    """
+    tree = _build_tree_index(nodes, segments, heater_node)
+    n_nodes = len(nodes)
+    dt_design = max(float(delta_t_supply_c), 0.1)
+
+    length = np.array([max(float(s.length_m), 0.0) for s in segments], dtype=float)
+    d_out = np.array([float(s.d_out_mm) for s in segments], dtype=float)
+    ins = np.array([float(s.insulation_mm) for s in segments], dtype=float)
+    lam = np.array([float(s.insulation_lambda_w_mk) for s in segments], dtype=float)
+    amb = np.array([float(s.ambient_c) for s in segments], dtype=float)
+    fixed_unit = np.array([max(float(s.unit_loss_w_m), 0.0) for s in segments], dtype=float)
+    has_fixed = fixed_unit > 0
+    # Заданные удельные потери пересчитываются по температурному напору относительно t подачи.
+    fixed_scale = np.where(has_fixed, fixed_unit / np.maximum(float(t_hot_c) - amb, 1.0e-6), 0.0)
+
+    n_children = np.bincount(tree.seg_from, minlength=n_nodes)
+    t_mean = np.full(len(segments), float(t_hot_c))
+    node_temp = np.full(n_nodes, float(t_hot_c))
+    loss = np.zeros(len(segments))
+    q_cir = np.zeros(len(segments))
+    prev_total = -math.inf
+    iterations = 0
+    while iterations < max(int(max_iter), 1):
+        iterations += 1
+        unit = np.where(
+            has_fixed,
+            fixed_scale * np.maximum(t_mean - amb, 0.0),
+            pipe_heat_loss_w_m(t_mean, d_out, ins, lam, amb),
+        )
+        loss = unit * length
+
+        # Потери участка относим к его конечному узлу; накопление снизу вверх дает потери «ниже по течению».
+        node_loss = np.zeros(n_nodes)
+        np.add.at(node_loss, tree.seg_to, loss)
+        loss_down = _accumulate_flows(tree, node_loss)
+        # Водоразбора нет: расход уходит в обратный трубопровод только в концах ветвей,
+        # в узлах ветвления делится пропорционально теплопотерям нижележащих ветвей.
+        children_loss = np.zeros(n_nodes)
+        np.add.at(children_loss, tree.seg_from, loss_down)
+        node_flow = np.zeros(n_nodes)
+        node_flow[tree.inlet] = float(np.sum(loss)) / 1000.0 * _L_S_PER_KW_K / dt_design
+        for si in tree.order:
+            a = tree.seg_from[si]
+            share = loss_down[si] / children_loss[a] if children_loss[a] > 0 else 1.0 / n_children[a]
+            q_cir[si] = node_flow[a] * share
+            node_flow[tree.seg_to[si]] = q_cir[si]
+
+        dt_seg = np.where(q_cir > 0, loss / 1000.0 * _L_S_PER_KW_K / np.maximum(q_cir, 1.0e-12), 0.0)
+        node_temp[:] = float(t_hot_c)
+        for si in tree.order:
+            node_temp[tree.seg_to[si]] = node_temp[tree.seg_from[si]] - dt_seg[si]
+        t_mean = node_temp[tree.seg_from] - 0.5 * dt_seg
+
+        total = float(np.sum(loss))
+        if abs(total - prev_total) <= tol_w:
+            break
+        prev_total = total
+
+    t_start = node_temp[tree.seg_from]
+    t_end = node_temp[tree.seg_to]
+    qht_kw = float(np.sum(loss)) / 1000.0
+    return CirculationResult(
+        segment_ids=[s.seg_id for s in segments],
+        heat_loss_w=loss,
+        t_start_c=t_start,
+        t_end_c=t_end,
+        qcir_l_s=q_cir,
+        qht_kw=qht_kw,
+        qcir_l_s_total=qht_kw * _L_S_PER_KW_K / dt_design,
+        min_end_temp_c=float(np.min(t_end)) if len(segments) else float(t_hot_c),
+        iterations=iterations,
+        node_temp_c={n.node_id: float(node_temp[i]) for i, n in enumerate(nodes)},
+    )
+
+
+def calc_gvs_passport_from_network(
+    circulation: CirculationResult,
+    qh_avg_m3_h: float,
+    qh_max_m3_h: float,
+    t_hot_c: float,
+    t_cold_c: float,
+    delta_t_supply_c: float,
+) -> Dict[str, float]:
+    # Паспорт ГВС с Qht из расчета циркуляционной сети вместо ручного ввода.
+    return calc_gvs_passport(
+        qh_avg_m3_h=qh_avg_m3_h,
+        qh_max_m3_h=qh_max_m3_h,
+        t_hot_c=t_hot_c,
+        t_cold_c=t_cold_c,
+        qht_kW=circulation.qht_kw,
+        delta_t_supply_c=delta_t_supply_c,
+    )
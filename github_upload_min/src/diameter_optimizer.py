@@ -0,0 +1,295 @@
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from hydraulics import (
+    CAST_IRON_DIMENSIONS,
+    COPPER_DIMENSIONS,
+    FIBERGLASS_DIMENSIONS,
+    PLASTIC_DIMENSIONS,
+    STEEL_DIMENSIONS,
+    calc_hydraulics_batch,
+    recommended_dp_candidates_mm,
+)
+from pipe_network import (
+    NetworkNode,
+    NetworkSegment,
+    TreeNetworkResult,
+    _accumulate_flows,
+    _branch_ratios,
+    _build_tree_index,
+    _resolve_k_local,
+    _resolve_xi_sums,
+    calc_tree_network,
+)
+
+
+# Плотность материала стенки, кг/м3 (для целевой функции "масса").
+MATERIAL_DENSITY_KG_M3: Dict[str, float] = {
+    "steel_vgp": 7850.0,
+    "steel_welded": 7850.0,
+    "cast_iron": 7200.0,
+    "plastic": 950.0,
+    "metal_plastic": 1300.0,
+    "fiberglass": 1900.0,
+    "polyplastic": 900.0,
+    "copper": 8940.0,
+}
+
+# Для металлопластика/полипропилена толщина стенки считается от серии; для массы берем SDR11.
+_DEFAULT_SDR = 11.0
+
+_NO_FIXTURE = -1.0e12
+
+
+@dataclass
+class DiameterAssignment:
+    segment_ids: List[str]
+    dp_mm: np.ndarray
+    objective: float  # стоимость или масса, в зависимости от режима
+    h_required_m: float
+    feasible: bool  # выполнено ли Hтр <= Hдоступный
+    network: TreeNetworkResult
+    warnings: List[str] = field(default_factory=list)
+
+
+def _wall_mm(material: str, d_mm: float) -> float:
+    if material in ("steel_vgp", "steel_welded"):
+        return min(STEEL_DIMENSIONS.get(int(d_mm), [0.0]))
+    if material == "cast_iron":
+        return min(CAST_IRON_DIMENSIONS.get(int(d_mm), [0.0]))
+    if material == "plastic":
+        return min(PLASTIC_DIMENSIONS.get(int(d_mm), [0.0]))
+    if material == "copper":
+        return min(COPPER_DIMENSIONS.get(float(d_mm), [0.0]))
+    if material == "fiberglass":
+        walls = [w[0] for by_p in FIBERGLASS_DIMENSIONS.values() for dims in by_p.values() for d, w in dims.items() if d == int(d_mm)]
+        return min(walls) if walls else 0.0
+    return float(d_mm) / _DEFAULT_SDR
+
+
+def pipe_mass_kg_per_m(material: str, d_mm: float) -> float:
+    s = _wall_mm(material, d_mm)
+    rho = MATERIAL_DENSITY_KG_M3.get(material, 1000.0)
+    return rho * math.pi * (float(d_mm) + s) * s * 1.0e-6
+
+
+def _pareto(h: np.ndarray, c: np.ndarray, *extra: np.ndarray) -> Tuple[np.ndarray, ...]:
+    # Оставляем недоминируемые точки: напор по возрастанию, стоимость строго убывает.
+    # Входные данные — несколько уже отсортированных серий, stable-сортировка сливает их быстро.
+    order = np.argsort(h, kind="stable")
+    h = h[order]
+    c = c[order]
+    prev_min = np.minimum.accumulate(np.concatenate(([np.inf], c[:-1])))
+    keep = c < prev_min
+    return (h[keep], c[keep]) + tuple(e[order][keep] for e in extra)
+
+
+def _thin(h: np.ndarray, c: np.ndarray, step: float, *extra: np.ndarray) -> Tuple[np.ndarray, ...]:
+    # Прореживание фронта: в каждой ячейке напора шириной step оставляем самую дешевую точку.
+    # Значения напора не округляются, поэтому проверка Hтр остается точной.
+    if h.size <= 1 or step <= 0:
+        return (h, c) + extra
+    cell = np.floor(h / step)
+    last = np.ones(h.size, dtype=bool)
+    last[:-1] = cell[1:] != cell[:-1]
+    return (h[last], c[last]) + tuple(e[last] for e in extra)
+
+
+def optimize_tree_diameters(
+    nodes: List[NetworkNode],
+    segments: List[NetworkSegment],
+    inlet_node: str,
+    temp_c: float,
+    h_available_m: float,
+    v_min_m_s: float = 0.0,
+    v_max_m_s: float = 3.0,
+    cost_fn: Optional[Callable[[str, float], float]] = None,
+    candidates_mm: Optional[Dict[str, List[float]]] = None,
+    head_step_m: float = 0.01,
+) -> DiameterAssignment:
+    """
+    Подбор сортамента для всех участков тупиковой сети.
+    Цель: минимум Σ(cost(material, d)·L); по умолчанию cost — масса 1 м трубы, кг.
+    Ограничения: v_min <= v <= v_max на каждом участке и Hтр (диктующий прибор) <= h_available_m.
+    Метод: динамическое программирование по дереву с Парето-фронтами (напор, стоимость);
+    точки, которые заведомо не укладываются в Hдоступный (с учетом минимальных потерь выше по сети),
+    отсекаются (branch-and-bound), фронт прореживается с шагом head_step_m.
+    """
+    tree = _build_tree_index(nodes, segments, inlet_node)
+    n_nodes = len(nodes)
+    n_segs = len(segments)
+    cost_of = cost_fn or pipe_mass_kg_per_m
+    warnings: List[str] = []
+
+    demand = np.array([max(float(n.demand_l_s), 0.0) for n in nodes], dtype=float)
+    q = _accumulate_flows(tree, demand)
+    elev = np.array([float(n.elevation_m) for n in nodes], dtype=float)
+    free = np.array([max(float(n.free_head_m), 0.0) for n in nodes], dtype=float)
+    offset = np.where(demand > 0, elev - elev[tree.inlet] + free, _NO_FIXTURE)
+
+    # Все варианты (участок, диаметр) — одним пакетным расчетом.
+    cand_cache: Dict[str, List[float]] = {}
+    seg_cands: List[List[float]] = []
+    for seg in segments:
+        if seg.material not in cand_cache:
+            src = (candidates_mm or {}).get(seg.material)
+            cand_cache[seg.material] = sorted(float(d) for d in (src or recommended_dp_candidates_mm(seg.material)))
+        seg_cands.append(cand_cache[seg.material])
+    counts = np.array([len(c) for c in seg_cands], dtype=np.int64)
+    starts = np.concatenate(([0], np.cumsum(counts)))
+    flat_seg = np.repeat(np.arange(n_segs), counts)
+    flat_d = np.array([d for c in seg_cands for d in c], dtype=float)
+    hyd = calc_hydraulics_batch(
+        material=np.array([segments[i].material for i in flat_seg], dtype=object),
+        q_l_s=q[flat_seg],
+        dp_m=flat_d / 1000.0,
+        length_m=np.array([float(s.length_m) for s in segments])[flat_seg],
+        temp_c=float(temp_c),
+        is_new=np.array([bool(s.is_new) for s in segments])[flat_seg],
+        local_mode=np.array([s.local_mode for s in segments], dtype=object)[flat_seg],
+        k_local=np.array([_resolve_k_local(s) for s in segments])[flat_seg],
+        xi_sum=_resolve_xi_sums(
+            [segments[i] for i in flat_seg], dp_m=flat_d / 1000.0, branch_ratio=_branch_ratios(tree, q)[flat_seg]
+        ),
+    )
+    unit_cost = {}
+    flat_cost = np.empty(flat_d.size, dtype=float)
+    for k in range(flat_d.size):
+        key = (segments[flat_seg[k]].material, flat_d[k])
+        if key not in unit_cost:
+            unit_cost[key] = float(cost_of(key[0], key[1]))
+        flat_cost[k] = unit_cost[key] * max(float(segments[flat_seg[k]].length_m), 0.0)
+
+    # Допустимые варианты по скорости; если окно пусто — ближайший вариант по v_max (как find_recommended_diameter_mm).
+    opt_idx: List[np.ndarray] = []
+    min_loss = np.zeros(n_segs, dtype=float)
+    for si in range(n_segs):
+        lo, hi = starts[si], starts[si + 1]
+        v = hyd.v_m_s[lo:hi]
+        ok = np.flatnonzero((v >= v_min_m_s) & (v <= v_max_m_s))
+        if ok.size == 0:
+            under = np.flatnonzero(v <= v_max_m_s)
+            ok = under[:1] if under.size else np.array([hi - lo - 1])
+            if q[si] > 0:
+                warnings.append(
+                    f"Участок '{segments[si].seg_id}': нет диаметра в окне скоростей, принят d={flat_d[lo + ok[0]]:g} мм"
+                )
+        opt_idx.append(lo + ok)
+        min_loss[si] = float(np.min(hyd.h_total_m[lo + ok]))
+
+    # Минимально возможные потери от ввода до узла — для отсечения по Hдоступный.
+    up_min = np.zeros(n_nodes, dtype=float)
+    for si in tree.order:
+        up_min[tree.seg_to[si]] = up_min[tree.seg_from[si]] + min_loss[si]
+    budget = float(h_available_m)
+
+    children: List[List[int]] = [[] for _ in range(n_nodes)]
+    for si in tree.order:
+        children[tree.seg_from[si]].append(si)
+
+    # Фронт узла: (H, C) + ссылки для восстановления решения.
+    node_h: List[Optional[np.ndarray]] = [None] * n_nodes
+    node_c: List[Optional[np.ndarray]] = [None] * n_nodes
+    node_pick: List[Optional[np.ndarray]] = [None] * n_nodes  # (точки, дети) -> индекс во фронте ветви
+    branch_k: List[Optional[np.ndarray]] = [None] * n_segs  # вариант диаметра
+    branch_j: List[Optional[np.ndarray]] = [None] * n_segs  # точка фронта дочернего узла
+    branch_h: List[Optional[np.ndarray]] = [None] * n_segs
+    branch_c: List[Optional[np.ndarray]] = [None] * n_segs
+
+    def _merge(u: int) -> None:
+        parts_h = [branch_h[si] for si in children[u]]
+        parts_c = [branch_c[si] for si in children[u]]
+        own = offset[u]
+        parts_h.append(np.array([own]))
+        parts_c.append(np.array([0.0]))
+        lo = max(float(p[0]) for p in parts_h)
+        thr = np.unique(np.concatenate(parts_h))
+        thr = thr[thr >= lo]
+        picks = np.empty((thr.size, len(parts_h)), dtype=np.int64)
+        h_tot = np.full(thr.size, _NO_FIXTURE)
+        c_tot = np.zeros(thr.size)
+        for ci, (ph, pc) in enumerate(zip(parts_h, parts_c)):
+            j = np.searchsorted(ph, thr, side="right") - 1
+            picks[:, ci] = j
+            h_tot = np.maximum(h_tot, ph[j])
+            c_tot += pc[j]
+        limit = budget - up_min[u]
+        keep = h_tot <= limit
+        if not keep.any():
+            keep = h_tot <= h_tot.min()
+        h_tot, c_tot, rows = _pareto(h_tot[keep], c_tot[keep], np.flatnonzero(keep))
+        h_tot, c_tot, rows = _thin(h_tot, c_tot, head_step_m, rows)
+        node_h[u] = h_tot
+        node_c[u] = c_tot
+        node_pick[u] = picks[rows, :-1]
+
+    for si in reversed(tree.order):
+        b = int(tree.seg_to[si])
+        if node_h[b] is None:
+            _merge(b)
+        opts = opt_idx[si]
+        ch = node_h[b]
+        cc = node_c[b]
+        kk = np.repeat(np.arange(opts.size), ch.size)
+        jj = np.tile(np.arange(ch.size), opts.size)
+        h = np.where(ch[jj] > _NO_FIXTURE / 2, ch[jj] + hyd.h_total_m[opts[kk]], _NO_FIXTURE)
+        c = cc[jj] + flat_cost[opts[kk]]
+        limit = budget - up_min[int(tree.seg_from[si])]
+        keep = h <= limit
+        if not keep.any():
+            keep = h <= h.min()
+        h, c, kk, jj = _pareto(h[keep], c[keep], kk[keep], jj[keep])
+        h, c, kk, jj = _thin(h, c, head_step_m, kk, jj)
+        branch_h[si], branch_c[si], branch_k[si], branch_j[si] = h, c, kk, jj
+    _merge(tree.inlet)
+
+    # Выбор на вводе: самая дешевая точка с H <= Hдоступный (иначе — с минимальным H).
+    rh = node_h[tree.inlet]
+    ok = np.flatnonzero(rh <= budget)
+    feasible = ok.size > 0
+    p_root = int(ok[-1]) if feasible else 0
+    if not feasible:
+        warnings.append("Доступного напора недостаточно даже при максимальных диаметрах из окна скоростей")
+
+    chosen = np.zeros(n_segs, dtype=float)
+    stack = [(tree.inlet, p_root)]
+    while stack:
+        u, p = stack.pop()
+        for ci, si in enumerate(children[u]):
+            bi = int(node_pick[u][p, ci])
+            chosen[si] = flat_d[opt_idx[si][branch_k[si][bi]]]
+            stack.append((int(tree.seg_to[si]), int(branch_j[si][bi])))
+
+    sized = [
+        NetworkSegment(
+            seg_id=s.seg_id,
+            from_node=s.from_node,
+            to_node=s.to_node,
+            material=s.material,
+            length_m=s.length_m,
+            dp_m=float(chosen[i]) / 1000.0,
+            is_new=s.is_new,
+            local_mode=s.local_mode,
+            k_preset=s.k_preset,
+            k_local=s.k_local,
+            xi_sum=s.xi_sum,
+            fittings=s.fittings,
+        )
+        for i, s in enumerate(segments)
+    ]
+    net = calc_tree_network(nodes, sized, inlet_node, temp_c)
+    objective = float(sum(unit_cost[(s.material, float(chosen[i]))] * max(float(s.length_m), 0.0) for i, s in enumerate(segments)))
+    return DiameterAssignment(
+        segment_ids=[s.seg_id for s in segments],
+        dp_mm=chosen,
+        objective=objective,
+        h_required_m=net.h_required_m,
+        feasible=bool(feasible and net.h_required_m <= budget + 1.0e-9),
+        network=net,
+        warnings=warnings,
+    )
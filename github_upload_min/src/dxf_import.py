@@ -0,0 +1,603 @@
+from __future__ import annotations
+
+from array import array
+from collections import deque
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import BinaryIO, Dict, List, Mapping, Optional, Sequence, Union
+
+import numpy as np
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+
+from pipe_network import NetworkNode, NetworkSegment
+
+
+# Коэффициент перевода единиц чертежа в метры по $INSUNITS (0 — не заданы).
+DXF_INSUNITS_M = {1: 0.0254, 2: 0.3048, 4: 0.001, 5: 0.01, 6: 1.0, 14: 0.1}
+# Если в чертеже единицы не заданы, считаем их миллиметрами (так оформляются чертежи ВК).
+DXF_DEFAULT_SCALE_M = 0.001
+
+# Флаги POLYLINE: 1 — замкнута, 16 — 3D-сеть, 64 — многогранная сетка; VERTEX: 16 — управляющая точка сплайна.
+_POLY_CLOSED = 1
+_POLY_MESH = 16 | 64
+_VERTEX_SPLINE_FRAME = 16
+
+
+@dataclass
+class DxfPipeLayer:
+    layer: str  # имя слоя чертежа (без учета регистра)
+    material: str
+    dp_m: float
+    is_new: bool = True
+
+
+@dataclass
+class DxfNetwork:
+    nodes: List[NetworkNode]
+    segments: List[NetworkSegment]
+    node_xyz_m: np.ndarray  # (узлы, 3) координаты узлов в метрах
+    segment_handles: List[str]  # handle примитива чертежа, из которого получен участок
+    scale_m: float  # принятый коэффициент перевода единиц чертежа в метры
+    n_entities: int  # примитивов на выбранных слоях
+    warnings: List[str] = field(default_factory=list)
+
+    def batch_inputs(self) -> Dict[str, np.ndarray]:
+        # Параметры участков для calc_hydraulics_batch: остается задать q_l_s и temp_c.
+        return {
+            "material": np.array([s.material for s in self.segments], dtype=object),
+            "dp_m": np.array([s.dp_m for s in self.segments], dtype=float),
+            "length_m": np.array([s.length_m for s in self.segments], dtype=float),
+            "is_new": np.array([s.is_new for s in self.segments], dtype=bool),
+        }
+
+    def oriented(self, inlet_node: str) -> List[NetworkSegment]:
+        """
+        Участки, направленные от ввода (from_node — со стороны inlet_node), как требует calc_tree_network.
+        Обход в ширину; участки вне связной с вводом части остаются как в чертеже.
+        """
+        adj: Dict[str, List[int]] = {}
+        for si, s in enumerate(self.segments):
+            adj.setdefault(s.from_node, []).append(si)
+            adj.setdefault(s.to_node, []).append(si)
+        if inlet_node not in adj:
+            raise ValueError(f"Узел ввода '{inlet_node}' не найден в сети")
+        out = list(self.segments)
+        seen_seg = [False] * len(out)
+        seen_node = {inlet_node}
+        queue = deque([inlet_node])
+        while queue:
+            u = queue.popleft()
+            for si in adj[u]:
+                if seen_seg[si]:
+                    continue
+                seen_seg[si] = True
+                s = out[si]
+                if s.from_node != u:
+                    out[si] = s = replace(s, from_node=s.to_node, to_node=s.from_node)
+                if s.to_node not in seen_node:
+                    seen_node.add(s.to_node)
+                    queue.append(s.to_node)
+        return out
+
+
+def _decode(value: bytes) -> str:
+    # До AutoCAD 2007 строки в кодировке $DWGCODEPAGE (у нас это ANSI_1251), начиная с 2007 — UTF-8.
+    try:
+        return value.decode("utf-8")
+    except UnicodeDecodeError:
+        return value.decode("cp1251", errors="replace")
+
+
+class _RunCollector:
+    # Вершины трасс выбранных слоев в плоских буферах array('d') — без объекта на каждую вершину.
+
+    def __init__(self, layers: Mapping[str, int]):
+        self.layers = layers
+        self.x = array("d")
+        self.y = array("d")
+        self.z = array("d")
+        self.bulge = array("d")  # выпуклость участка от вершины к следующей (дуга в LWPOLYLINE/POLYLINE)
+        self.run_start = array("q", [0])
+        self.run_layer = array("q")
+        self.handles: List[str] = []
+
+    def add(self, layer: bytes, handle: bytes, xs, ys, zs, bulges, closed: bool) -> None:
+        idx = self.layers.get(_decode(layer).upper())
+        if idx is None or len(xs) < 2 or len(ys) != len(xs):
+            return
+        self.x.extend(xs)
+        self.y.extend(ys)
+        self.z.extend(zs)
+        self.bulge.extend(bulges)
+        if closed:
+            # Замкнутая полилиния — трасса, возвращающаяся в первую вершину.
+            self.x.append(xs[0])
+            self.y.append(ys[0])
+            self.z.append(zs[0])
+            self.bulge.append(0.0)
+        else:
+            self.bulge[-1] = 0.0
+        self.run_start.append(len(self.x))
+        self.run_layer.append(idx)
+        self.handles.append(_decode(handle))
+
+
+def _read_runs(fh: BinaryIO, collector: _RunCollector) -> Optional[int]:
+    """
+    Потоковый разбор секций HEADER ($INSUNITS) и ENTITIES: LINE, LWPOLYLINE, POLYLINE/VERTEX/SEQEND.
+    Блоки (INSERT) не раскрываются. Координаты LWPOLYLINE берутся как мировые (выдавливание по Z).
+    Возвращает код $INSUNITS или None.
+    """
+    head = fh.read(22)
+    if head.startswith(b"AutoCAD Binary DXF"):
+        raise ValueError("Двоичный DXF не поддерживается: сохраните чертеж в формате ASCII DXF")
+    fh.seek(0)
+
+    insunits: Optional[int] = None
+    section: Optional[bytes] = None
+    want_section_name = False
+    header_var = b""
+
+    ent: Optional[bytes] = None
+    layer = handle = b""
+    xs: List[float] = []
+    ys: List[float] = []
+    zs: List[float] = []
+    bulges: List[float] = []
+    line_pt = [0.0] * 6
+    flags = 0
+    elev = 0.0
+    # Открытая POLYLINE: вершины приходят отдельными примитивами VERTEX до SEQEND.
+    poly: Optional[list] = None
+    vx = vy = vz = vb = 0.0
+    vflags = 0
+
+    # Пары строк «групповой код — значение»; файл читается построчно, целиком в память не загружается.
+    # Разобранные коды кешируются по исходной строке (их в файле несколько десятков видов).
+    codes: Dict[bytes, int] = {}
+    for raw_code, raw_val in zip(fh, fh):
+        code = codes.get(raw_code)
+        if code is None:
+            try:
+                code = codes[raw_code] = int(raw_code)
+            except ValueError:
+                raise ValueError(f"Некорректный групповой код DXF: {raw_code[:40]!r}") from None
+        val = raw_val.strip()
+        if code == 0:
+            # Завершение предыдущего примитива.
+            if ent == b"LINE":
+                pt = line_pt
+                collector.add(layer, handle, [pt[0], pt[3]], [pt[1], pt[4]], [pt[2], pt[5]], [0.0, 0.0], False)
+            elif ent == b"LWPOLYLINE":
+                collector.add(layer, handle, xs, ys, [elev] * len(xs), bulges, bool(flags & _POLY_CLOSED))
+            elif ent == b"POLYLINE":
+                poly = [layer, handle, [], [], [], [], flags]
+            elif ent == b"VERTEX" and poly is not None and not (vflags & _VERTEX_SPLINE_FRAME):
+                poly[2].append(vx)
+                poly[3].append(vy)
+                poly[4].append(vz)
+                poly[5].append(vb)
+            elif ent == b"SEQEND" and poly is not None:
+                if not (poly[6] & _POLY_MESH):
+                    collector.add(poly[0], poly[1], poly[2], poly[3], poly[4], poly[5], bool(poly[6] & _POLY_CLOSED))
+                poly = None
+
+            ent = None
+            if val == b"SECTION":
+                want_section_name = True
+            elif val == b"ENDSEC":
+                section = None
+            elif val == b"EOF":
+                break
+            elif section == b"ENTITIES":
+                ent = val
+                layer = handle = b""
+                flags = 0
+                if val == b"LWPOLYLINE":
+                    xs, ys, zs, bulges = [], [], [], []
+                    elev = 0.0
+                elif val == b"LINE":
+                    line_pt = [0.0] * 6
+                elif val == b"VERTEX":
+                    vx = vy = vz = vb = 0.0
+                    vflags = 0
+                elif val not in (b"POLYLINE", b"SEQEND"):
+                    ent = None
+                    poly = None
+            continue
+
+        if want_section_name:
+            if code == 2:
+                section = val
+                want_section_name = False
+            continue
+        if section == b"HEADER":
+            if code == 9:
+                header_var = val
+            elif code == 70 and header_var == b"$INSUNITS":
+                insunits = int(val)
+            continue
+        if ent is None:
+            continue
+
+        if code == 8:
+            layer = val
+        elif code == 5:
+            handle = val
+        elif ent == b"LWPOLYLINE":
+            if code == 10:
+                xs.append(float(val))
+                bulges.append(0.0)
+            elif code == 20:
+                ys.append(float(val))
+            elif code == 42:
+                bulges[-1] = float(val)
+            elif code == 38:
+                elev = float(val)
+            elif code == 70:
+                flags = int(val)
+        elif ent == b"VERTEX":
+            if code == 10:
+                vx = float(val)
+            elif code == 20:
+                vy = float(val)
+            elif code == 30:
+                vz = float(val)
+            elif code == 42:
+                vb = float(val)
+            elif code == 70:
+                vflags = int(val)
+        elif ent == b"LINE":
+            if code in (10, 20, 30):
+                line_pt[(code - 10) // 10] = float(val)
+            elif code in (11, 21, 31):
+                line_pt[3 + (code - 11) // 10] = float(val)
+        elif ent == b"POLYLINE" and code == 70:
+            flags = int(val)
+    return insunits
+
+
+def _snap_labels(pts: np.ndarray, tol: float) -> np.ndarray:
+    """
+    Пространственный хеш: точки раскладываются по ячейкам размера tol, пары-кандидаты ищутся в соседних
+    ячейках (сортировка ключей + searchsorted), точки ближе tol объединяются в узел (компоненты связности).
+    """
+    n = pts.shape[0]
+    cell = np.floor(pts / tol).astype(np.int64)
+    cell -= cell.min(axis=0)
+    span = cell.max(axis=0) + 3
+    if float(span[0]) * float(span[1]) * float(span[2]) >= 2.0 ** 62:
+        raise ValueError("Слишком малый допуск привязки для размеров чертежа")
+    key = (cell[:, 0] * span[1] + cell[:, 1]) * span[2] + cell[:, 2]
+    order = np.argsort(key, kind="stable")
+    key_sorted = key[order]
+    xyz = [np.ascontiguousarray(pts[order, k]) for k in range(3)]
+
+    rows: List[np.ndarray] = []
+    cols: List[np.ndarray] = []
+    # Ключ линеен по номерам ячеек: соседняя ячейка — сдвиг ключа на константу, поэтому запросы
+    # searchsorted идут по возрастанию. Половина из 26 соседних ячеек плюс своя — каждая пара один раз.
+    offsets = [(dx, dy, dz) for dx in (-1, 0, 1) for dy in (-1, 0, 1) for dz in (-1, 0, 1) if (dx, dy, dz) >= (0, 0, 0)]
+    for dx, dy, dz in offsets:
+        nb = key_sorted + (dx * span[1] + dy) * span[2] + dz
+        lo = np.searchsorted(key_sorted, nb, side="left")
+        hi = np.searchsorted(key_sorted, nb, side="right")
+        cnt = hi - lo
+        if not cnt.any():
+            continue
+        a = np.repeat(np.arange(n), cnt)
+        b = np.repeat(lo - np.cumsum(cnt) + cnt, cnt) + np.arange(int(cnt.sum()))
+        if (dx, dy, dz) == (0, 0, 0):
+            own = a < b
+            a, b = a[own], b[own]
+        d2 = np.zeros(a.shape[0])
+        for c in xyz:
+            d2 += np.square(c[a] - c[b])
+        keep = d2 <= tol * tol
+        rows.append(order[a[keep]])
+        cols.append(order[b[keep]])
+    r = np.concatenate(rows) if rows else np.zeros(0, dtype=np.int64)
+    c = np.concatenate(cols) if cols else np.zeros(0, dtype=np.int64)
+    graph = coo_matrix((np.ones(r.shape[0], dtype=np.int8), (r, c)), shape=(n, n))
+    _, labels = connected_components(graph, directed=False)
+    return labels
+
+
+def _piece_lengths(pts: np.ndarray, theta: np.ndarray, inner: np.ndarray) -> np.ndarray:
+    # Длины звеньев между соседними вершинами трассы (хорда или дуга по bulge); звенья между трассами — 0.
+    chord = np.sqrt(np.sum((pts[1:] - pts[:-1]) ** 2, axis=1))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        arc = np.where(theta != 0.0, chord * (theta / 2.0) / np.sin(theta / 2.0), chord)
+    return np.where(inner, arc, 0.0)
+
+
+def _piece_points(a: np.ndarray, b: np.ndarray, theta: np.ndarray, s: np.ndarray) -> np.ndarray:
+    # Точки звеньев a -> b на доле s их длины: прямая (theta = 0) или дуга в плане с центральным углом theta
+    # (положительный — против часовой стрелки, как bulge), Z — линейно.
+    out = a + s[:, None] * (b - a)
+    arc = theta != 0.0
+    if arc.any():
+        a2, b2, th, sa = a[arc, :2], b[arc, :2], theta[arc], s[arc]
+        ab = b2 - a2
+        chord = np.sqrt(np.sum(ab * ab, axis=1))
+        left = np.column_stack([-ab[:, 1], ab[:, 0]]) / chord[:, None]
+        center = 0.5 * (a2 + b2) + left * (0.5 * chord / np.tan(0.5 * th))[:, None]
+        rel = a2 - center
+        cos, sin = np.cos(sa * th), np.sin(sa * th)
+        out[arc, 0] = center[:, 0] + rel[:, 0] * cos - rel[:, 1] * sin
+        out[arc, 1] = center[:, 1] + rel[:, 0] * sin + rel[:, 1] * cos
+    return out
+
+
+def _piece_fraction(a: np.ndarray, b: np.ndarray, theta: np.ndarray, e: np.ndarray) -> np.ndarray:
+    # Доля длины звена до ближайшей к e точки (для дуги — по углу от центра), в пределах [0, 1].
+    ab = b - a
+    s = np.sum((e - a) * ab, axis=1) / np.maximum(np.sum(ab * ab, axis=1), 1.0e-300)
+    arc = theta != 0.0
+    if arc.any():
+        a2, b2, th = a[arc, :2], b[arc, :2], theta[arc]
+        ab2 = b2 - a2
+        chord = np.sqrt(np.sum(ab2 * ab2, axis=1))
+        left = np.column_stack([-ab2[:, 1], ab2[:, 0]]) / chord[:, None]
+        center = 0.5 * (a2 + b2) + left * (0.5 * chord / np.tan(0.5 * th))[:, None]
+        u, w = a2 - center, e[arc, :2] - center
+        phi = np.arctan2(u[:, 0] * w[:, 1] - u[:, 1] * w[:, 0], np.sum(u * w, axis=1))
+        s[arc] = np.mod(phi * np.sign(th), 2.0 * np.pi) / np.abs(th)
+    return np.clip(s, 0.0, 1.0)
+
+
+def _ends_on_pieces(
+    pts: np.ndarray, theta: np.ndarray, piece_len: np.ndarray, piece_ok: np.ndarray,
+    end_idx: np.ndarray, labels: np.ndarray, tol: float,
+):
+    """
+    Концы трасс, лежащие ближе tol к внутренней точке звена (pts[j] -> pts[j+1], прямая или дуга) другой трассы.
+    Звенья разбиваются точками с шагом step и раскладываются по ячейкам h = step/2 + tol: ближайшая к проекции
+    точка звена отстоит от конца не дальше h по каждой оси, поэтому кандидаты — в соседних ячейках конца
+    (в плоском чертеже — только в своем слое по Z). Возвращает (j, s, label): звено, долю его длины
+    до проекции и группу конца.
+    """
+    piece = np.flatnonzero(piece_ok & (piece_len > 0.0))
+    empty = (np.zeros(0, dtype=np.int64), np.zeros(0), np.zeros(0, dtype=np.int64))
+    if piece.size == 0 or end_idx.size == 0:
+        return empty
+    a, b, th = pts[piece], pts[piece + 1], theta[piece]
+    length = piece_len[piece]
+    # Шаг — четверть средней длины звена: мелкие ячейки дают мало кандидатов на конец, точек — ~5 на звено.
+    step = max(tol, 0.25 * float(length.mean()))
+    h = 0.5 * step + tol
+    n_smp = np.ceil(length / step).astype(np.int64) + 1
+    smp_piece = np.repeat(np.arange(piece.size), n_smp)
+    frac = (np.arange(smp_piece.size) - np.repeat(np.cumsum(n_smp) - n_smp, n_smp)) / (n_smp - 1)[smp_piece]
+    # Точки звеньев нужны только как номера ячеек: считаем по одной оси, без массива (точки, 3).
+    arc_smp = np.flatnonzero(th[smp_piece] != 0.0)
+    if arc_smp.size:
+        ps = smp_piece[arc_smp]
+        arc_pts = _piece_points(a[ps], b[ps], th[ps], frac[arc_smp])
+    ends = pts[end_idx]
+    c_smp: List[np.ndarray] = []
+    c_end: List[np.ndarray] = []
+    for ax in range(3):
+        x = a[smp_piece, ax] + frac * (b[:, ax] - a[:, ax])[smp_piece]
+        if arc_smp.size:
+            x[arc_smp] = arc_pts[:, ax]
+        cs = np.floor(x / h).astype(np.int64)
+        ce = np.floor(ends[:, ax] / h).astype(np.int64)
+        lo = min(int(cs.min()), int(ce.min()))
+        c_smp.append(cs - lo)
+        c_end.append(ce - lo)
+    del x, frac
+    span = [max(int(cs.max()), int(ce.max())) + 3 for cs, ce in zip(c_smp, c_end)]
+    key_smp = (c_smp[0] * span[1] + c_smp[1]) * span[2] + c_smp[2]
+    key_end = (c_end[0] * span[1] + c_end[1]) * span[2] + c_end[2]
+    del c_smp, c_end
+    # Концы по возрастанию ключа: запросы searchsorted идут по порядку (как в _snap_labels).
+    by_key = np.argsort(key_end, kind="stable")
+    key_end, end_idx = key_end[by_key], end_idx[by_key]
+    # Соседние точки звена в одной ячейке дают одних и тех же кандидатов — оставляем первую.
+    fresh = np.ones(key_smp.shape[0], dtype=bool)
+    fresh[1:] = (key_smp[1:] != key_smp[:-1]) | (smp_piece[1:] != smp_piece[:-1])
+    key_smp, smp_piece = key_smp[fresh], smp_piece[fresh]
+    order = np.argsort(key_smp, kind="stable")
+    key_sorted = key_smp[order]
+
+    # Проверка расстояния — сразу по каждой соседней ячейке: в памяти только попадания.
+    tol2 = tol * tol
+    found_e: List[np.ndarray] = []
+    found_p: List[np.ndarray] = []
+    found_s: List[np.ndarray] = []
+    dz_range = (0,) if span[2] == 3 else (-1, 0, 1)
+    for dx in (-1, 0, 1):
+        for dy in (-1, 0, 1):
+            for dz in dz_range:
+                nb = key_end + (dx * span[1] + dy) * span[2] + dz
+                lo = np.searchsorted(key_sorted, nb, side="left")
+                cnt = np.searchsorted(key_sorted, nb, side="right") - lo
+                if not cnt.any():
+                    continue
+                e = np.repeat(np.arange(end_idx.size), cnt)
+                p = smp_piece[order[np.repeat(lo - np.cumsum(cnt) + cnt, cnt) + np.arange(int(cnt.sum()))]]
+                ev, j = end_idx[e], piece[p]
+                # Конец у вершины звена уже объединен с ней привязкой — здесь только внутренние точки.
+                ok = (labels[ev] != labels[j]) & (labels[ev] != labels[j + 1])
+                e, p, ev = e[ok], p[ok], ev[ok]
+                s = _piece_fraction(a[p], b[p], th[p], pts[ev])
+                hit = np.sum((pts[ev] - _piece_points(a[p], b[p], th[p], s)) ** 2, axis=1) <= tol2
+                hit &= (np.sum((pts[ev] - a[p]) ** 2, axis=1) > tol2) & (np.sum((pts[ev] - b[p]) ** 2, axis=1) > tol2)
+                found_e.append(e[hit])
+                found_p.append(p[hit])
+                found_s.append(s[hit])
+    if not found_e:
+        return empty
+    e, p, s = np.concatenate(found_e), np.concatenate(found_p), np.concatenate(found_s)
+    j, lab = piece[p], labels[end_idx[e]]
+    # Совпадающие концы (одна группа) дают одну точку разбиения на звене.
+    _, first = np.unique(lab * np.int64(pts.shape[0]) + j, return_index=True)
+    j, s, lab = j[first], s[first], lab[first]
+    srt = np.lexsort((s, j))
+    return j[srt], s[srt], lab[srt]
+
+
+def _network_arrays(collector: _RunCollector, scale: float, tol: float, warnings: List[str]):
+    """
+    Геометрия трасс -> узлы и участки массивами: (node_xyz, seg_from, seg_to, seg_len, seg_run).
+    Промежуточные массивы по вершинам освобождаются при выходе, до создания объектов сети.
+    """
+    pts = np.column_stack(
+        [np.frombuffer(collector.x, dtype=float), np.frombuffer(collector.y, dtype=float), np.frombuffer(collector.z, dtype=float)]
+    ) * scale
+    bulge = np.frombuffer(collector.bulge, dtype=float)
+    run_start = np.frombuffer(collector.run_start, dtype=np.int64)
+    n_pts = pts.shape[0]
+    first = run_start[:-1]
+    last = run_start[1:] - 1
+
+    is_end = np.zeros(n_pts, dtype=bool)
+    is_end[first] = True
+    is_end[last] = True
+    labels = _snap_labels(pts, tol)
+
+    inner = np.ones(n_pts - 1, dtype=bool)
+    inner[last[:-1]] = False  # звено между последней вершиной трассы и первой следующей
+
+    theta = 4.0 * np.arctan(bulge[:-1])
+    piece_len = _piece_lengths(pts, theta, inner)
+    # Конец трассы на звене другой трассы — вставляем вершину в точке проекции (в группу этого конца);
+    # дуга делится на две с выпуклостями по своим центральным углам. Проверяются только концы, не
+    # привязанные к промежуточной вершине: в группе нет ничего, кроме концов трасс.
+    n_inner_vtx = np.bincount(labels, weights=~is_end, minlength=int(labels.max()) + 1)
+    loose = np.flatnonzero(is_end & (n_inner_vtx[labels] == 0))
+    split_j, split_s, split_lab = _ends_on_pieces(pts, theta, piece_len, inner, loose, labels, tol)
+    if split_j.size:
+        pos = split_j + 1
+        same_next = np.append(split_j[1:] == split_j[:-1], False)
+        s_next = np.where(same_next, np.append(split_s[1:], 1.0), 1.0)
+        first_on = np.append(True, split_j[1:] != split_j[:-1])
+        th = theta[split_j]
+        bulge = bulge.copy()
+        bulge[split_j[first_on]] = np.tan(th[first_on] * split_s[first_on] / 4.0)
+        new_pts = _piece_points(pts[split_j], pts[pos], th, split_s)
+        pts = np.insert(pts, pos, new_pts, axis=0)
+        bulge = np.insert(bulge, pos, np.tan(th * (s_next - split_s) / 4.0))
+        labels = np.insert(labels, pos, split_lab)
+        is_end = np.insert(is_end, pos, False)
+        run_start = run_start + np.searchsorted(split_j, run_start, side="left")
+        n_pts = pts.shape[0]
+        last = run_start[1:] - 1
+        inner = np.ones(n_pts - 1, dtype=bool)
+        inner[last[:-1]] = False
+        theta = 4.0 * np.arctan(bulge[:-1])
+        piece_len = _piece_lengths(pts, theta, inner)
+        warnings.append(f"Трассы разбиты в точках примыкания концов других трасс к звеньям: {int(split_j.size)}")
+
+    # Узел — вершина, в группе которой есть конец какой-либо трассы.
+    has_end = np.bincount(labels, weights=is_end, minlength=int(labels.max()) + 1) > 0
+    brk = has_end[labels]
+
+    # Участок начинается в каждой вершине-узле, кроме последней вершины трассы, и идет до следующей вершины-узла.
+    starts_mask = brk.copy()
+    starts_mask[last] = False
+    seg_start = np.flatnonzero(starts_mask)
+    brk_idx = np.flatnonzero(brk)
+    seg_end = brk_idx[np.searchsorted(brk_idx, seg_start, side="right")]
+    piece_seg = np.cumsum(starts_mask[:-1]) - 1
+    seg_len = np.bincount(piece_seg[inner], weights=piece_len[inner], minlength=seg_start.shape[0])
+    seg_run = np.searchsorted(run_start, seg_start, side="right") - 1
+
+    # Номера узлов — по порядку первого появления в чертеже.
+    node_labels, first_vertex = np.unique(labels[brk_idx], return_index=True)
+    appear = np.argsort(first_vertex, kind="stable")
+    node_of_label = np.full(int(labels.max()) + 1, -1, dtype=np.int64)
+    node_of_label[node_labels[appear]] = np.arange(appear.shape[0])
+    node_xyz = pts[brk_idx[first_vertex[appear]]]
+    seg_from = node_of_label[labels[seg_start]]
+    seg_to = node_of_label[labels[seg_end]]
+    return node_xyz, seg_from, seg_to, seg_len, seg_run
+
+
+def read_dxf_network(
+    source: Union[str, Path, BinaryIO],
+    layers: Sequence[DxfPipeLayer],
+    snap_tol_m: float = 0.005,
+    scale_m: Optional[float] = None,
+) -> DxfNetwork:
+    """
+    Трассы трубопроводов из ASCII DXF (без CAD-библиотек): LINE, LWPOLYLINE и POLYLINE на слоях layers.
+    - концы трасс, ближе snap_tol_m друг к другу, объединяются в узлы (пространственный хеш);
+    - трасса разбивается на участки в промежуточных вершинах, к которым примыкает конец другой трассы (тройник),
+      и в проекции такого конца на звено (прямое или дугу); пересечения без общих концов узлами не считаются;
+    - длина участка — по вершинам с учетом дуг (bulge), отметки узлов — по Z;
+    - scale_m — метров в единице чертежа; по умолчанию из $INSUNITS, иначе миллиметры.
+    Участки получают материал и dвн слоя; направление — как в чертеже (см. DxfNetwork.oriented).
+    """
+    if not layers:
+        raise ValueError("Не заданы слои трубопроводов")
+    if snap_tol_m <= 0:
+        raise ValueError("Допуск привязки должен быть положительным")
+    layer_idx: Dict[str, int] = {}
+    for i, spec in enumerate(layers):
+        layer_idx.setdefault(spec.layer.upper(), i)
+    collector = _RunCollector(layer_idx)
+    if isinstance(source, (str, Path)):
+        with open(source, "rb") as fh:
+            insunits = _read_runs(fh, collector)
+    else:
+        insunits = _read_runs(source, collector)
+
+    warnings: List[str] = []
+    if scale_m is None:
+        scale = DXF_INSUNITS_M.get(insunits or 0)
+        if scale is None:
+            scale = DXF_DEFAULT_SCALE_M
+            warnings.append("Единицы чертежа не заданы ($INSUNITS) — приняты миллиметры")
+    else:
+        scale = float(scale_m)
+    if scale <= 0:
+        raise ValueError("Масштаб единиц чертежа должен быть положительным")
+
+    n_runs = len(collector.run_layer)
+    if n_runs == 0:
+        return DxfNetwork([], [], np.zeros((0, 3)), [], scale, 0, warnings + ["На заданных слоях трасс не найдено"])
+
+    run_layer = np.frombuffer(collector.run_layer, dtype=np.int64)
+    node_xyz, seg_from, seg_to, seg_len, seg_run = _network_arrays(collector, scale, float(snap_tol_m), warnings)
+    node_ids = [f"N{i + 1}" for i in range(node_xyz.shape[0])]
+
+    degenerate = seg_from == seg_to
+    if degenerate.any():
+        warnings.append(f"Пропущено участков с совпадающими концами (замкнутые или короче допуска): {int(degenerate.sum())}")
+
+    nodes = [NetworkNode(node_id=nid, elevation_m=z) for nid, z in zip(node_ids, node_xyz[:, 2].tolist())]
+    # Поля участков — списками Python (без поэлементной индексации массивов); значения слоя общие для его участков.
+    keep = ~degenerate
+    run_kept = seg_run[keep].tolist()
+    layer_kept = run_layer[seg_run[keep]].tolist()
+    specs = [(spec.material, float(spec.dp_m), bool(spec.is_new)) for spec in layers]
+    segments: List[NetworkSegment] = []
+    for k, (fi, ti, length, li) in enumerate(
+        zip(seg_from[keep].tolist(), seg_to[keep].tolist(), seg_len[keep].tolist(), layer_kept), start=1
+    ):
+        material, dp, is_new = specs[li]
+        segments.append(
+            NetworkSegment(
+                seg_id=f"S{k}",
+                from_node=node_ids[fi],
+                to_node=node_ids[ti],
+                material=material,
+                length_m=length,
+                dp_m=dp,
+                is_new=is_new,
+            )
+        )
+    run_handles = collector.handles
+    handles = [run_handles[r] for r in run_kept]
+    return DxfNetwork(
+        nodes=nodes,
+        segments=segments,
+        node_xyz_m=node_xyz,
+        segment_handles=handles,
+        scale_m=scale,
+        n_entities=n_runs,
+        warnings=warnings,
+    )
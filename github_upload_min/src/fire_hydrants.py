@@ -0,0 +1,234 @@
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass, field
+from itertools import combinations
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from fittings import get_fittings_library
+from hydraulics import calc_hydraulics_batch
+from pipe_network import (
+    NetworkNode,
+    NetworkSegment,
+    _accumulate_flows,
+    _branch_ratios,
+    _build_tree_index,
+    _resolve_k_local,
+    _resolve_xi_sums,
+)
+
+
+# Ограничение размера одного пакетного расчета (сценарии × участки).
+_BATCH_CELLS = 1_000_000
+
+
+@dataclass
+class FireHydrant:
+    node_id: str
+    q_jet_l_s: float = 2.6  # расход струи
+    h_valve_m: float = 10.0  # требуемый напор у клапана (с учетом рукава и ствола)
+
+
+@dataclass
+class FireScenarioResult:
+    scenarios: List[Tuple[str, ...]]  # проверенные сочетания пожарных кранов
+    h_required_m: np.ndarray  # Hтр по каждому сочетанию
+    dictating_hydrant: List[str]  # диктующий кран каждого сочетания
+    governing: int  # номер расчетного (худшего) сочетания
+    n_combinations: int  # всего сочетаний C(n, k) до отсева
+    segment_ids: List[str] = field(default_factory=list)
+    q_l_s: np.ndarray = field(default_factory=lambda: np.zeros(0))  # расходы участков в расчетном сочетании
+    h_total_m: np.ndarray = field(default_factory=lambda: np.zeros(0))  # потери участков в расчетном сочетании
+    critical_path: List[str] = field(default_factory=list)
+
+    @property
+    def governing_hydrants(self) -> Tuple[str, ...]:
+        return self.scenarios[self.governing]
+
+    @property
+    def governing_head_m(self) -> float:
+        return float(self.h_required_m[self.governing])
+
+
+def _hydrant_candidates(shared: np.ndarray, q_jet: np.ndarray, d: int, n_other: int) -> np.ndarray:
+    """
+    Краны, с которыми d может оказаться в худшем сочетании.
+    Струя крана j добавляет q_j на общий с путем к d начальный отрезок (shared[d, j] участков от ввода);
+    потери до d монотонно растут с расходами, поэтому j заменяем на кран с не меньшими shared и q.
+    Кран отбрасывается, если таких «доминирующих» кранов не меньше n_other: в любом сочетании его
+    можно заменить, не уменьшив напор у d.
+    """
+    others = np.flatnonzero(np.arange(q_jet.shape[0]) != d)
+    if n_other <= 0 or others.size == 0:
+        return others[:0]
+    depth = shared[d, others]
+    q = q_jet[others]
+    # После сортировки (глубже, больше расход, меньше номер) доминирующие краны j — это стоящие раньше с q ≥ q_j.
+    order = np.lexsort((others, -q, -depth))
+    q_sorted = q[order]
+    levels = np.unique(q_sorted)
+    cum = np.cumsum(q_sorted[:, None] >= levels[None, :], axis=0)
+    before = np.vstack([np.zeros((1, levels.size), dtype=cum.dtype), cum[:-1]])
+    n_dominating = before[np.arange(order.size), np.searchsorted(levels, q_sorted)]
+    return others[order[n_dominating < n_other]]
+
+
+def find_fire_scenarios(
+    nodes: List[NetworkNode],
+    segments: List[NetworkSegment],
+    inlet_node: str,
+    hydrants: Sequence[FireHydrant],
+    n_jets: int,
+    temp_c: float = 10.0,
+    include_domestic: bool = True,
+) -> FireScenarioResult:
+    """
+    Расчетное сочетание одновременно действующих пожарных кранов в тупиковой сети
+    (объединенный хозяйственно-противопожарный водопровод).
+    - расходы: хозяйственные (demand_l_s узлов, если include_domestic) + струи включенных кранов;
+    - Hтр сочетания: максимум по включенным кранам (потери от ввода + zкрана - zввода + hклапана);
+    - перебор по диктующему крану: остальные n_jets-1 кранов берутся только из недоминируемых
+      (_hydrant_candidates), что сохраняет худшее сочетание и сокращает C(n, k) до ~n сочетаний;
+    - все оставшиеся сочетания считаются пакетами calc_hydraulics_batch.
+    """
+    if not hydrants:
+        raise ValueError("Не заданы пожарные краны")
+    tree = _build_tree_index(nodes, segments, inlet_node)
+    n_h = len(hydrants)
+    k = min(max(int(n_jets), 1), n_h)
+    h_nodes = np.empty(n_h, dtype=np.int64)
+    for i, h in enumerate(hydrants):
+        if h.node_id not in tree.node_pos:
+            raise ValueError(f"Пожарный кран в неизвестном узле '{h.node_id}'")
+        h_nodes[i] = tree.node_pos[h.node_id]
+    q_jet = np.array([max(float(h.q_jet_l_s), 0.0) for h in hydrants], dtype=float)
+    h_valve = np.array([max(float(h.h_valve_m), 0.0) for h in hydrants], dtype=float)
+
+    # Путь от ввода до каждого крана — строка матрицы инцидентности «кран × участок».
+    n_segs = len(segments)
+    on_path = np.zeros((n_h, n_segs), dtype=bool)
+    for i, u in enumerate(h_nodes):
+        u = int(u)
+        while tree.parent_seg[u] >= 0:
+            si = int(tree.parent_seg[u])
+            on_path[i, si] = True
+            u = int(tree.seg_from[si])
+    # Пути начинаются от ввода, поэтому общие участки двух путей — их общий начальный отрезок.
+    path_f = on_path.astype(np.float32)
+    shared = np.rint(path_f @ path_f.T).astype(np.int64)
+
+    scenario_set = set()
+    for d in range(n_h):
+        cand = _hydrant_candidates(shared, q_jet, d, k - 1)
+        for rest in combinations(cand.tolist(), k - 1):
+            scenario_set.add(tuple(sorted((d,) + rest)))
+    scenarios = sorted(scenario_set)
+
+    # На напор у кранов влияют только участки их путей.
+    cols = np.flatnonzero(on_path.any(axis=0))
+    demand = np.array([max(float(n.demand_l_s), 0.0) for n in nodes], dtype=float)
+    base_q = _accumulate_flows(tree, demand if include_domestic else np.zeros_like(demand))[cols]
+    jet_q = on_path[:, cols] * q_jet[:, None]  # вклад струи каждого крана в расходы участков
+    path_c = on_path[:, cols].astype(float)
+
+    seg_c = [segments[int(c)] for c in cols]
+    material = np.array([s.material for s in seg_c], dtype=object)
+    dp = np.array([float(s.dp_m) for s in seg_c], dtype=float)
+    length = np.array([float(s.length_m) for s in seg_c], dtype=float)
+    is_new = np.array([bool(s.is_new) for s in seg_c], dtype=bool)
+    local_mode = np.array([s.local_mode for s in seg_c], dtype=object)
+    k_local = np.array([_resolve_k_local(s) for s in seg_c], dtype=float)
+    xi_sum = np.array([max(float(s.xi_sum), 0.0) for s in seg_c], dtype=float)
+    # Фитинги: ξ тройников зависит от долей расхода, поэтому считается для каждого сочетания.
+    fittings = get_fittings_library()
+    fit_kinds, fit_counts = fittings.count_matrix([s.fittings for s in seg_c])
+    col_of = np.full(n_segs, -1, dtype=np.int64)
+    col_of[cols] = np.arange(cols.size)
+    feed = tree.parent_seg[tree.seg_from[cols]]
+    feed_col = np.where(feed >= 0, col_of[np.maximum(feed, 0)], -1)
+
+    elev = np.array([float(n.elevation_m) for n in nodes], dtype=float)
+    static = elev[h_nodes] - elev[tree.inlet] + h_valve
+
+    members = np.array(scenarios, dtype=np.int64).reshape(len(scenarios), k)
+    n_sc = members.shape[0]
+    n_c = max(cols.size, 1)
+    h_req = np.empty(n_sc)
+    dict_pos = np.empty(n_sc, dtype=np.int64)
+    step = max(_BATCH_CELLS // n_c, 1)
+    for a in range(0, n_sc, step):
+        m = members[a : a + step]
+        rows = m.shape[0]
+        q = base_q[None, :] + jet_q[m].sum(axis=1)
+        xi_rows = np.tile(xi_sum, rows)
+        if fit_kinds:
+            q_feed = np.where(feed_col >= 0, q[:, np.maximum(feed_col, 0)], q)
+            ratio = np.divide(q, q_feed, out=np.ones_like(q), where=q_feed > 0)
+            xi_rows = xi_rows + fittings.xi_sum_matrix(
+                fit_kinds, np.tile(fit_counts, (rows, 1)), np.tile(dp * 1000.0, rows), ratio.ravel()
+            )
+        hyd = calc_hydraulics_batch(
+            material=np.tile(material, rows),
+            q_l_s=q.ravel(),
+            dp_m=np.tile(dp, rows),
+            length_m=np.tile(length, rows),
+            temp_c=float(temp_c),
+            is_new=np.tile(is_new, rows),
+            local_mode=np.tile(local_mode, rows),
+            k_local=np.tile(k_local, rows),
+            xi_sum=xi_rows,
+        )
+        h_seg = hyd.h_total_m.reshape(rows, cols.size)
+        # Напор у каждого включенного крана: сумма потерь по его пути + статическая часть.
+        head = np.einsum("rs,rks->rk", h_seg, path_c[m]) + static[m]
+        best = np.argmax(head, axis=1)
+        h_req[a : a + rows] = head[np.arange(rows), best]
+        dict_pos[a : a + rows] = m[np.arange(rows), best]
+
+    gov = int(np.argmax(h_req))
+    gov_members = members[gov]
+    q_gov = _accumulate_flows(tree, demand if include_domestic else np.zeros_like(demand))
+    q_gov[cols] += jet_q[gov_members].sum(axis=0)
+    hyd_gov = calc_hydraulics_batch(
+        material=[s.material for s in segments],
+        q_l_s=q_gov,
+        dp_m=[s.dp_m for s in segments],
+        length_m=[s.length_m for s in segments],
+        temp_c=float(temp_c),
+        is_new=[bool(s.is_new) for s in segments],
+        local_mode=[s.local_mode for s in segments],
+        k_local=[_resolve_k_local(s) for s in segments],
+        xi_sum=_resolve_xi_sums(segments, branch_ratio=_branch_ratios(tree, q_gov)),
+    )
+    d_gov = int(dict_pos[gov])
+    path = [segments[si].seg_id for si in tree.order if on_path[d_gov, si]]
+
+    ids = [h.node_id for h in hydrants]
+    return FireScenarioResult(
+        scenarios=[tuple(ids[i] for i in sc) for sc in scenarios],
+        h_required_m=h_req,
+        dictating_hydrant=[ids[int(i)] for i in dict_pos],
+        governing=gov,
+        n_combinations=math.comb(n_h, k),
+        segment_ids=[s.seg_id for s in segments],
+        q_l_s=q_gov,
+        h_total_m=hyd_gov.h_total_m,
+        critical_path=path,
+    )
+
+
+def fire_scenario_rows(result: FireScenarioResult, top: Optional[int] = 10) -> List[Dict[str, object]]:
+    # Сочетания по убыванию Hтр (для таблицы в отчете).
+    order = np.argsort(-result.h_required_m, kind="stable")
+    if top is not None:
+        order = order[: max(int(top), 0)]
+    return [
+        {
+            "hydrants": ", ".join(result.scenarios[i]),
+            "dictating": result.dictating_hydrant[i],
+            "h_required_m": float(result.h_required_m[i]),
+        }
+        for i in order
+    ]
@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+import csv
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from hydraulics import G
+
+
+FITTINGS_PATH = Path(__file__).resolve().parents[1] / "data" / "fittings_xi.csv"
+
+# К какой скорости отнесен табличный ξ: "" — скорость участка, "upstream" — скорость до тройника
+# (при равных сечениях ξ участка = ξ/r²), "dn" — скорость в сечении DN самого фитинга (ξ участка = ξ·(d/DN)⁴).
+_XI_REFS = ("", "upstream", "dn")
+_R_MIN = 1e-3  # нижняя граница доли расхода при пересчете ξ/r²
+
+
+@dataclass
+class _FittingTable:
+    name: str
+    dn_mm: np.ndarray  # узлы по DN (одна точка — ξ от диаметра не зависит)
+    param: np.ndarray  # узлы по параметру (для тройников — доля расхода r)
+    xi: np.ndarray  # (len(param), len(dn_mm))
+    ref: str = ""  # см. _XI_REFS
+
+
+def _bracket(grid: np.ndarray, x: np.ndarray):
+    # Соседние узлы и доля t; за пределами сетки — крайнее значение.
+    if grid.shape[0] == 1:
+        zero = np.zeros(x.shape, dtype=np.int64)
+        return zero, zero, np.zeros(x.shape)
+    x = np.clip(x, grid[0], grid[-1])
+    hi = np.clip(np.searchsorted(grid, x, side="left"), 1, grid.shape[0] - 1)
+    lo = hi - 1
+    return lo, hi, (x - grid[lo]) / (grid[hi] - grid[lo])
+
+
+class FittingsLibrary:
+    """
+    Коэффициенты местных сопротивлений ξ по типам фитингов, диаметру и (для тройников) доле расхода.
+    Таблица fitting,name,dn,param,xi,ref: пустой dn или param — ξ от них не зависит. Узлы каждого типа
+    должны образовывать полную сетку dn × param; между узлами — билинейная интерполяция табличного ξ,
+    затем пересчет к скорости участка по ref. DN ищется по внутреннему диаметру участка в мм — для
+    отводов и арматуры это приближение в пределах шага сортамента.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        src = Path(path) if path is not None else FITTINGS_PATH
+        raw: Dict[str, Dict[Tuple[Optional[float], Optional[float]], float]] = {}
+        names: Dict[str, str] = {}
+        refs: Dict[str, str] = {}
+        with src.open(encoding="utf-8") as fh:
+            for row in csv.DictReader(fh):
+                try:
+                    key = row["fitting"].strip()
+                    dn = float(row["dn"]) if (row.get("dn") or "").strip() else None
+                    param = float(row["param"]) if (row.get("param") or "").strip() else None
+                    xi = float(row["xi"])
+                    ref = (row.get("ref") or "").strip()
+                except (AttributeError, KeyError, TypeError, ValueError):
+                    raise ValueError(f"Некорректная строка таблицы фитингов: {row}") from None
+                if not key or xi < 0 or ref not in _XI_REFS or (ref == "dn" and dn is None):
+                    raise ValueError(f"Некорректная строка таблицы фитингов: {row}")
+                if refs.setdefault(key, ref) != ref:
+                    raise ValueError(f"Фитинг '{key}': ref задан по-разному в разных строках")
+                raw.setdefault(key, {})[(param, dn)] = xi
+                names.setdefault(key, (row.get("name") or key).strip())
+        if not raw:
+            raise ValueError(f"Таблица фитингов пуста: {src}")
+
+        self._tables: Dict[str, _FittingTable] = {}
+        for key, pts in raw.items():
+            dns = {d for _, d in pts}
+            params = {p for p, _ in pts}
+            if (None in dns and len(dns) > 1) or (None in params and len(params) > 1):
+                raise ValueError(f"Фитинг '{key}': dn/param заданы не во всех строках")
+            if len(pts) != len(dns) * len(params):
+                raise ValueError(f"Фитинг '{key}': узлы не образуют полную сетку dn × param")
+            dns = sorted(dns, key=lambda v: v or 0.0)
+            params = sorted(params, key=lambda v: v or 0.0)
+            self._tables[key] = _FittingTable(
+                name=names[key],
+                dn_mm=np.array([d or 0.0 for d in dns], dtype=float),
+                param=np.array([p or 0.0 for p in params], dtype=float),
+                xi=np.array([[pts[(p, d)] for d in dns] for p in params], dtype=float),
+                ref=refs[key],
+            )
+
+    @property
+    def fittings(self) -> List[str]:
+        return list(self._tables)
+
+    def title(self, fitting: str) -> str:
+        return self._table(fitting).name
+
+    def _table(self, fitting: str) -> _FittingTable:
+        table = self._tables.get(fitting)
+        if table is None:
+            raise ValueError(f"Неизвестный тип фитинга: '{fitting}'")
+        return table
+
+    def xi(self, fitting: str, dn_mm, param=1.0) -> np.ndarray:
+        table = self._table(fitting)
+        dn, p = np.broadcast_arrays(np.asarray(dn_mm, dtype=float), np.asarray(param, dtype=float))
+        d_lo, d_hi, td = _bracket(table.dn_mm, dn)
+        p_lo, p_hi, tp = _bracket(table.param, p)
+        x = table.xi
+        x_lo = x[p_lo, d_lo] + (x[p_lo, d_hi] - x[p_lo, d_lo]) * td
+        x_hi = x[p_hi, d_lo] + (x[p_hi, d_hi] - x[p_hi, d_lo]) * td
+        out = x_lo + (x_hi - x_lo) * tp
+        # Табличный ξ гладкий (отнесен к своей скорости); к скорости участка — после интерполяции.
+        if table.ref == "upstream":
+            out = out / np.maximum(p, _R_MIN) ** 2
+        elif table.ref == "dn":
+            out = out * (dn / np.clip(dn, table.dn_mm[0], table.dn_mm[-1])) ** 4
+        return out
+
+    def count_matrix(self, counts: Sequence[Mapping[str, float]]) -> Tuple[List[str], np.ndarray]:
+        # Разреженный набор {тип: количество} по участкам -> (типы, матрица «участок × тип»).
+        kinds: Dict[str, int] = {}
+        rows: List[int] = []
+        cols: List[int] = []
+        vals: List[float] = []
+        for i, item in enumerate(counts):
+            for kind, n in (item or {}).items():
+                if not n:
+                    continue
+                if kind not in kinds:
+                    self._table(kind)
+                    kinds[kind] = len(kinds)
+                rows.append(i)
+                cols.append(kinds[kind])
+                vals.append(max(float(n), 0.0))
+        mat = np.zeros((len(counts), len(kinds)), dtype=float)
+        np.add.at(mat, (np.array(rows, dtype=np.int64), np.array(cols, dtype=np.int64)), vals)
+        return list(kinds), mat
+
+    def xi_sum_batch(self, counts: Sequence[Mapping[str, float]], dn_mm, branch_ratio=1.0) -> np.ndarray:
+        """
+        Σξ для набора участков, отнесенная к скорости участка: counts[i] — {тип фитинга: количество}
+        участка i, dn_mm — внутренний диаметр участка в мм (по нему же ищется DN), branch_ratio — доля
+        расхода участка в расходе до тройника (параметр тройников; для остальных типов не используется).
+        Тип "meter" берет счетчик калибра по диаметру участка и дублирует потери S·q² из meters.py:
+        если счетчик подобран и учтен там, в фитинги участка его не включают. Один векторный расчет на тип.
+        """
+        kinds, mat = self.count_matrix(counts)
+        return self.xi_sum_matrix(kinds, mat, dn_mm, branch_ratio)
+
+    def xi_sum_matrix(self, kinds: Sequence[str], counts: np.ndarray, dn_mm, branch_ratio=1.0) -> np.ndarray:
+        # То же по готовой матрице count_matrix (для повторных расчетов с другими диаметрами или долями расхода).
+        n = counts.shape[0]
+        dn = np.broadcast_to(np.asarray(dn_mm, dtype=float), (n,))
+        ratio = np.broadcast_to(np.clip(np.asarray(branch_ratio, dtype=float), 0.0, 1.0), (n,))
+        total = np.zeros(n, dtype=float)
+        for j, kind in enumerate(kinds):
+            used = counts[:, j] > 0
+            if used.any():
+                total[used] += counts[used, j] * self.xi(kind, dn[used], ratio[used])
+        return total
+
+
+_LIBRARY: Optional[FittingsLibrary] = None
+_LIBRARY_LOCK = threading.Lock()
+
+
+def get_fittings_library() -> FittingsLibrary:
+    # Таблица читается один раз на процесс.
+    global _LIBRARY
+    if _LIBRARY is None:
+        with _LIBRARY_LOCK:
+            if _LIBRARY is None:
+                _LIBRARY = FittingsLibrary()
+    return _LIBRARY
+
+
+def fittings_xi_sum(counts: Sequence[Mapping[str, float]], dn_mm, branch_ratio=1.0) -> np.ndarray:
+    return get_fittings_library().xi_sum_batch(counts, dn_mm, branch_ratio)
+
+
+def fittings_local_loss_m(counts: Sequence[Mapping[str, float]], dn_mm, v_m_s, branch_ratio=1.0) -> np.ndarray:
+    # Σξ·v²/2g по участкам.
+    v = np.asarray(v_m_s, dtype=float)
+    return fittings_xi_sum(counts, dn_mm, branch_ratio) * (v * v) / (2.0 * G)
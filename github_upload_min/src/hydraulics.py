@@ -1,10 +1,15 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Dict, List, Tuple
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Tuple
 
 import math
 
+import numpy as np
+
+from water_properties import water_kinematic_viscosity, water_kinematic_viscosity_batch
+
 
 G = 9.80665
 
@@ -22,6 +27,36 @@ class HydraulicResult:
     nu_m2_s: float
 
 
+@dataclass
+class HydraulicBatchResult:
+    # Те же величины, что и в HydraulicResult, но массивами (по одному элементу на участок).
+    v_m_s: np.ndarray
+    i_m_per_m: np.ndarray
+    h_friction_m: np.ndarray
+    h_local_m: np.ndarray
+    h_total_m: np.ndarray
+    lambda_f: np.ndarray
+    dp_m: np.ndarray
+    re: np.ndarray
+    nu_m2_s: np.ndarray
+
+    def __len__(self) -> int:
+        return int(self.v_m_s.shape[0])
+
+    def row(self, idx: int) -> HydraulicResult:
+        return HydraulicResult(
+            v_m_s=float(self.v_m_s[idx]),
+            i_m_per_m=float(self.i_m_per_m[idx]),
+            h_friction_m=float(self.h_friction_m[idx]),
+            h_local_m=float(self.h_local_m[idx]),
+            h_total_m=float(self.h_total_m[idx]),
+            lambda_f=float(self.lambda_f[idx]),
+            dp_m=float(self.dp_m[idx]),
+            re=float(self.re[idx]),
+            nu_m2_s=float(self.nu_m2_s[idx]),
+        )
+
+
 MATERIALS: Dict[str, Dict[str, str]] = {
     "steel_vgp": {
         "label": "Сталь водогазопроводная",
@@ -366,29 +401,8 @@ K_PRESETS = {
 
 
 def water_kinematic_viscosity_m2_s(temp_c: float) -> float:
-    # Табличная интерполяция (приближение) для воды.
-    pts = [
-        (5.0, 1.52e-6),
-        (10.0, 1.31e-6),
-        (20.0, 1.00e-6),
-        (30.0, 0.80e-6),
-        (40.0, 0.66e-6),
-        (50.0, 0.55e-6),
-        (60.0, 0.47e-6),
-        (70.0, 0.41e-6),
-    ]
-    x = float(temp_c)
-    if x <= pts[0][0]:
-        return pts[0][1]
-    if x >= pts[-1][0]:
-        return pts[-1][1]
-    for i in range(len(pts) - 1):
-        x1, y1 = pts[i]
-        x2, y2 = pts[i + 1]
-        if x1 <= x <= x2:
-            t = (x - x1) / (x2 - x1)
-            return y1 + (y2 - y1) * t
-    return 1.0e-6
+    # Табличная интерполяция для воды, 0–100 °C (см. water_properties).
+    return water_kinematic_viscosity(temp_c)
 
 
 def _friction_smooth(re: float) -> float:
@@ -399,55 +413,226 @@ def _friction_smooth(re: float) -> float:
     return 0.3164 / (re ** 0.25)
 
 
-def _material_i_lambda(material: str, dp_m: float, v_m_s: float, nu_m2_s: float, is_new: bool) -> Tuple[float, float]:
-    dp_m = max(dp_m, 1.0e-6)
-    v_m_s = max(v_m_s, 0.0)
-    nu_m2_s = max(nu_m2_s, 1.0e-9)
-    re = (v_m_s * dp_m / nu_m2_s) if v_m_s > 0 else 0.0
+# Формулы i(v), λ(v) по материалам. Для каждого материала:
+# - scalar(is_new) возвращает функцию (d, v, nu) -> (i, λ) для своего состояния трубы
+#   (формула выбирается один раз на материал и состояние, множители диаметра считаются в ней);
+# - batch и di_dv — векторные варианты на массивах одного материала (d, v, nu, is_new).
+ScalarEvaluator = Callable[[float, float, float], Tuple[float, float]]
 
-    if material in ("steel_vgp", "steel_welded"):
-        if is_new:
-            lam = (0.312 / (dp_m ** 0.226)) * ((1.9e-6 + nu_m2_s / max(v_m_s, 1.0e-9)) ** 0.226)
-            i_val = lam * (v_m_s**2) / (2.0 * G * dp_m)
-            return i_val, lam
-        ratio = v_m_s / nu_m2_s if nu_m2_s > 0 else 0.0
-        if ratio >= 9.2e5:
-            i_val = 0.021 * (v_m_s**2) / (dp_m ** 0.3)
-            lam = i_val * 2.0 * G * dp_m / max(v_m_s**2, 1.0e-12)
-            return i_val, lam
-        i_val = (v_m_s**2) / (dp_m ** 0.3) * ((1.5e-6 + nu_m2_s / max(v_m_s, 1.0e-9)) ** 0.3)
-        lam = i_val * 2.0 * G * dp_m / max(v_m_s**2, 1.0e-12)
-        return i_val, lam
 
-    if material == "cast_iron":
-        if is_new:
-            lam = (0.01424 / (dp_m ** 0.284)) * ((1.0 + 2.36 / max(v_m_s, 1.0e-9)) ** 0.284)
-            i_val = lam * (v_m_s**2) / (2.0 * G * dp_m)
-            return i_val, lam
-        if v_m_s > 1.2:
-            i_val = 0.00107 * (v_m_s**2) / (dp_m ** 1.3)
-            lam = i_val * 2.0 * G * dp_m / max(v_m_s**2, 1.0e-12)
-            return i_val, lam
-        i_val = 0.000912 * (v_m_s**2) / (dp_m ** 1.3) * ((1.0 + 0.867 / max(v_m_s, 1.0e-9)) ** 0.3)
-        lam = i_val * 2.0 * G * dp_m / max(v_m_s**2, 1.0e-12)
-        return i_val, lam
+@dataclass(frozen=True)
+class MaterialFormula:
+    scalar: Callable[[bool], ScalarEvaluator]
+    batch: Callable[[np.ndarray, np.ndarray, np.ndarray, np.ndarray], Tuple[np.ndarray, np.ndarray]]
+    di_dv: Callable[[np.ndarray, np.ndarray, np.ndarray, np.ndarray], np.ndarray]
 
-    if material == "plastic":
-        i_val = 0.000685 * (v_m_s ** 1.774) / (dp_m ** 1.226)
-        lam = i_val * 2.0 * G * dp_m / max(v_m_s**2, 1.0e-12) if v_m_s > 0 else 0.0
-        return i_val, lam
 
-    if material == "fiberglass":
-        lam = 0.0146 * ((max(v_m_s * dp_m, 1.0e-12)) ** -0.226)
-        i_val = lam * (v_m_s**2) / (2.0 * G * dp_m)
-        return i_val, lam
+def _steel_new(d: float, v: float, nu: float) -> Tuple[float, float]:
+    lam = (0.312 / (d ** 0.226)) * ((1.9e-6 + nu / max(v, 1.0e-9)) ** 0.226)
+    return lam * (v * v) / (2.0 * G * d), lam
 
-    # Металлопластик / полипластик / медь — гладкие трубы.
-    lam = _friction_smooth(re)
-    i_val = lam * (v_m_s**2) / (2.0 * G * dp_m) if dp_m > 0 else 0.0
+
+def _steel_old(d: float, v: float, nu: float) -> Tuple[float, float]:
+    v2 = v * v
+    if v / nu >= 9.2e5:
+        i_val = 0.021 * v2 / (d ** 0.3)
+    else:
+        i_val = v2 / (d ** 0.3) * ((1.5e-6 + nu / max(v, 1.0e-9)) ** 0.3)
+    return i_val, i_val * 2.0 * G * d / max(v2, 1.0e-12)
+
+
+def _steel_scalar(is_new: bool) -> ScalarEvaluator:
+    return _steel_new if is_new else _steel_old
+
+
+def _steel_batch(d: np.ndarray, v: np.ndarray, nu: np.ndarray, is_new: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    i_val = np.empty_like(v)
+    lam = np.empty_like(v)
+    idx = np.flatnonzero(is_new)
+    if idx.size:
+        dd, vv, n = d[idx], v[idx], nu[idx]
+        lam_k = (0.312 / (dd ** 0.226)) * ((1.9e-6 + n / np.maximum(vv, 1.0e-9)) ** 0.226)
+        i_val[idx] = lam_k * vv * vv / (2.0 * G * dd)
+        lam[idx] = lam_k
+    idx = np.flatnonzero(~is_new)
+    if idx.size:
+        dd, vv, n = d[idx], v[idx], nu[idx]
+        base = vv * vv / (dd ** 0.3)
+        i_k = np.where(vv / n >= 9.2e5, 0.021 * base, base * ((1.5e-6 + n / np.maximum(vv, 1.0e-9)) ** 0.3))
+        i_val[idx] = i_k
+        lam[idx] = i_k * 2.0 * G * dd / np.maximum(vv * vv, 1.0e-12)
     return i_val, lam
 
 
+def _steel_di_dv(d: np.ndarray, v: np.ndarray, nu: np.ndarray, is_new: np.ndarray) -> np.ndarray:
+    di = np.empty_like(v)
+    idx = np.flatnonzero(is_new)
+    if idx.size:
+        dd, vv, n = d[idx], v[idx], nu[idx]
+        # i = A·X^0.226·v²/(2gd), X = 1.9e-6 + nu/v
+        a = 0.312 / (dd ** 0.226)
+        x = 1.9e-6 + n / np.maximum(vv, 1.0e-9)
+        di[idx] = (2.0 * vv * a * x ** 0.226 - 0.226 * a * n * x ** -0.774) / (2.0 * G * dd)
+    idx = np.flatnonzero(~is_new)
+    if idx.size:
+        dd, vv, n = d[idx], v[idx], nu[idx]
+        # i = v²/d^0.3·X^0.3, X = 1.5e-6 + nu/v; квадратичная зона: i = 0.021·v²/d^0.3
+        x = 1.5e-6 + n / np.maximum(vv, 1.0e-9)
+        slow = (2.0 * vv * x ** 0.3 - 0.3 * n * x ** -0.7) / (dd ** 0.3)
+        di[idx] = np.where(vv / n >= 9.2e5, 0.042 * vv / (dd ** 0.3), slow)
+    return di
+
+
+def _cast_iron_new(d: float, v: float, nu: float) -> Tuple[float, float]:
+    lam = (0.01424 / (d ** 0.284)) * ((1.0 + 2.36 / max(v, 1.0e-9)) ** 0.284)
+    return lam * (v * v) / (2.0 * G * d), lam
+
+
+def _cast_iron_old(d: float, v: float, nu: float) -> Tuple[float, float]:
+    v2 = v * v
+    if v > 1.2:
+        i_val = 0.00107 * v2 / (d ** 1.3)
+    else:
+        i_val = 0.000912 * v2 / (d ** 1.3) * ((1.0 + 0.867 / max(v, 1.0e-9)) ** 0.3)
+    return i_val, i_val * 2.0 * G * d / max(v2, 1.0e-12)
+
+
+def _cast_iron_scalar(is_new: bool) -> ScalarEvaluator:
+    return _cast_iron_new if is_new else _cast_iron_old
+
+
+def _cast_iron_batch(d: np.ndarray, v: np.ndarray, nu: np.ndarray, is_new: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    i_val = np.empty_like(v)
+    lam = np.empty_like(v)
+    idx = np.flatnonzero(is_new)
+    if idx.size:
+        dd, vv = d[idx], v[idx]
+        lam_k = (0.01424 / (dd ** 0.284)) * ((1.0 + 2.36 / np.maximum(vv, 1.0e-9)) ** 0.284)
+        i_val[idx] = lam_k * vv * vv / (2.0 * G * dd)
+        lam[idx] = lam_k
+    idx = np.flatnonzero(~is_new)
+    if idx.size:
+        dd, vv = d[idx], v[idx]
+        base = vv * vv / (dd ** 1.3)
+        i_k = np.where(vv > 1.2, 0.00107 * base, 0.000912 * base * ((1.0 + 0.867 / np.maximum(vv, 1.0e-9)) ** 0.3))
+        i_val[idx] = i_k
+        lam[idx] = i_k * 2.0 * G * dd / np.maximum(vv * vv, 1.0e-12)
+    return i_val, lam
+
+
+def _cast_iron_di_dv(d: np.ndarray, v: np.ndarray, nu: np.ndarray, is_new: np.ndarray) -> np.ndarray:
+    di = np.empty_like(v)
+    idx = np.flatnonzero(is_new)
+    if idx.size:
+        dd, vv = d[idx], v[idx]
+        # i = B·Y^0.284·v²/(2gd), Y = 1 + 2.36/v
+        b = 0.01424 / (dd ** 0.284)
+        y = 1.0 + 2.36 / np.maximum(vv, 1.0e-9)
+        di[idx] = (2.0 * vv * b * y ** 0.284 - 0.284 * 2.36 * b * y ** -0.716) / (2.0 * G * dd)
+    idx = np.flatnonzero(~is_new)
+    if idx.size:
+        dd, vv = d[idx], v[idx]
+        # i = 0.000912·v²/d^1.3·Y^0.3, Y = 1 + 0.867/v; при v > 1.2: i = 0.00107·v²/d^1.3
+        y = 1.0 + 0.867 / np.maximum(vv, 1.0e-9)
+        slow = 0.000912 * (2.0 * vv * y ** 0.3 - 0.3 * 0.867 * y ** -0.7) / (dd ** 1.3)
+        di[idx] = np.where(vv > 1.2, 0.00214 * vv / (dd ** 1.3), slow)
+    return di
+
+
+def _plastic_eval(d: float, v: float, nu: float) -> Tuple[float, float]:
+    i_val = 0.000685 * (v ** 1.774) / (d ** 1.226)
+    return i_val, (i_val * 2.0 * G * d / max(v * v, 1.0e-12) if v > 0 else 0.0)
+
+
+def _plastic_scalar(is_new: bool) -> ScalarEvaluator:
+    return _plastic_eval
+
+
+def _plastic_batch(d: np.ndarray, v: np.ndarray, nu: np.ndarray, is_new: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    i_val = 0.000685 * (v ** 1.774) / (d ** 1.226)
+    lam = np.where(v > 0, i_val * 2.0 * G * d / np.maximum(v * v, 1.0e-12), 0.0)
+    return i_val, lam
+
+
+def _plastic_di_dv(d: np.ndarray, v: np.ndarray, nu: np.ndarray, is_new: np.ndarray) -> np.ndarray:
+    return 1.774 * 0.000685 * (v ** 0.774) / (d ** 1.226)
+
+
+def _fiberglass_eval(d: float, v: float, nu: float) -> Tuple[float, float]:
+    lam = 0.0146 * (max(v * d, 1.0e-12) ** -0.226)
+    return lam * (v * v) / (2.0 * G * d), lam
+
+
+def _fiberglass_scalar(is_new: bool) -> ScalarEvaluator:
+    return _fiberglass_eval
+
+
+def _fiberglass_batch(d: np.ndarray, v: np.ndarray, nu: np.ndarray, is_new: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    lam = 0.0146 * (np.maximum(v * d, 1.0e-12) ** -0.226)
+    return lam * v * v / (2.0 * G * d), lam
+
+
+def _fiberglass_di_dv(d: np.ndarray, v: np.ndarray, nu: np.ndarray, is_new: np.ndarray) -> np.ndarray:
+    # i = 0.0146·(v·d)^-0.226·v²/(2gd) ~ v^1.774
+    return 1.774 * 0.0146 * (d ** -0.226) * (v ** 0.774) / (2.0 * G * d)
+
+
+def _smooth_eval(d: float, v: float, nu: float) -> Tuple[float, float]:
+    # Металлопластик / полипластик / медь — гладкие трубы.
+    lam = _friction_smooth(v * d / nu if v > 0 else 0.0)
+    return lam * (v * v) / (2.0 * G * d), lam
+
+
+def _smooth_scalar(is_new: bool) -> ScalarEvaluator:
+    return _smooth_eval
+
+
+def _smooth_batch(d: np.ndarray, v: np.ndarray, nu: np.ndarray, is_new: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    re = v * d / nu
+    re_safe = np.maximum(re, 1.0e-12)
+    lam = np.where(re <= 0, 0.0, np.where(re < 2300, 64.0 / re_safe, 0.3164 / (re_safe ** 0.25)))
+    return lam * v * v / (2.0 * G * d), lam
+
+
+def _smooth_di_dv(d: np.ndarray, v: np.ndarray, nu: np.ndarray, is_new: np.ndarray) -> np.ndarray:
+    re = v * d / nu
+    lam_turb = 0.3164 / (np.maximum(re, 1.0e-12) ** 0.25)
+    # Ламинарный режим: i = 32·nu·v/(g·d²); Блазиус: i ~ v^1.75.
+    return np.where(re < 2300, 32.0 * nu / (G * d * d), 1.75 * lam_turb * v / (2.0 * G * d))
+
+
+_STEEL_FORMULA = MaterialFormula(scalar=_steel_scalar, batch=_steel_batch, di_dv=_steel_di_dv)
+_SMOOTH_FORMULA = MaterialFormula(scalar=_smooth_scalar, batch=_smooth_batch, di_dv=_smooth_di_dv)
+
+_MATERIAL_FORMULAS: Dict[str, MaterialFormula] = {
+    "steel_vgp": _STEEL_FORMULA,
+    "steel_welded": _STEEL_FORMULA,
+    "cast_iron": MaterialFormula(scalar=_cast_iron_scalar, batch=_cast_iron_batch, di_dv=_cast_iron_di_dv),
+    "plastic": MaterialFormula(scalar=_plastic_scalar, batch=_plastic_batch, di_dv=_plastic_di_dv),
+    "fiberglass": MaterialFormula(scalar=_fiberglass_scalar, batch=_fiberglass_batch, di_dv=_fiberglass_di_dv),
+    "metal_plastic": _SMOOTH_FORMULA,
+    "polyplastic": _SMOOTH_FORMULA,
+    "copper": _SMOOTH_FORMULA,
+}
+
+
+@lru_cache(maxsize=None)
+def material_evaluator(material: str, is_new: bool) -> ScalarEvaluator:
+    # Формула разрешается один раз на (материал, состояние); ключ не зависит от диаметра,
+    # поэтому произвольные dвн не переполняют кэш. Неизвестные материалы считаются как гладкие трубы.
+    return _MATERIAL_FORMULAS.get(material, _SMOOTH_FORMULA).scalar(bool(is_new))
+
+
+def register_material_formula(material: str, formula: MaterialFormula) -> None:
+    # Новый материал — отдельная запись в реестре, на поиск формул остальных материалов не влияет.
+    _MATERIAL_FORMULAS[material] = formula
+    material_evaluator.cache_clear()
+
+
+def _material_i_lambda(material: str, dp_m: float, v_m_s: float, nu_m2_s: float, is_new: bool) -> Tuple[float, float]:
+    return material_evaluator(material, bool(is_new))(max(dp_m, 1.0e-6), max(v_m_s, 0.0), max(nu_m2_s, 1.0e-9))
+
+
 def calc_hydraulics(
     material: str,
     q_l_s: float,
@@ -488,6 +673,163 @@ def calc_hydraulics(
     )
 
 
+def water_kinematic_viscosity_m2_s_batch(temp_c) -> np.ndarray:
+    # Векторный вариант water_kinematic_viscosity_m2_s: оба читают таблицу water_properties (0–100 °C).
+    return water_kinematic_viscosity_batch(temp_c)
+
+
+def _material_groups(material: np.ndarray) -> List[Tuple[MaterialFormula, Optional[np.ndarray]]]:
+    # Разбиение пакета по формулам: один проход по присутствующим материалам, а не по всему реестру.
+    by_formula: Dict[int, Tuple[MaterialFormula, List[str]]] = {}
+    for name in set(material.tolist()):
+        formula = _MATERIAL_FORMULAS.get(name, _SMOOTH_FORMULA)
+        by_formula.setdefault(id(formula), (formula, []))[1].append(name)
+    if not by_formula:
+        # Пустой пакет — считать нечего.
+        return []
+    if len(by_formula) == 1:
+        return [(formula, None) for formula, _ in by_formula.values()]
+    # Группа с наибольшим числом имен (обычно гладкие трубы) берется как остаток — без сравнений строк.
+    parts = sorted(by_formula.values(), key=lambda item: len(item[1]))
+    groups: List[Tuple[MaterialFormula, Optional[np.ndarray]]] = []
+    covered = np.zeros(material.shape, dtype=bool)
+    for formula, names in parts[:-1]:
+        mask = material == names[0]
+        for name in names[1:]:
+            mask |= material == name
+        covered |= mask
+        groups.append((formula, np.flatnonzero(mask)))
+    groups.append((parts[-1][0], np.flatnonzero(~covered)))
+    return groups
+
+
+def _material_i_lambda_batch(
+    material: np.ndarray,
+    dp_m: np.ndarray,
+    v_m_s: np.ndarray,
+    nu_m2_s: np.ndarray,
+    is_new: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray]:
+    # Векторный аналог _material_i_lambda: каждый материал пакета — один вызов batch своей формулы.
+    dp = np.maximum(dp_m, 1.0e-6)
+    v = np.maximum(v_m_s, 0.0)
+    nu = np.maximum(nu_m2_s, 1.0e-9)
+    is_new = np.broadcast_to(np.asarray(is_new, dtype=bool), v.shape)
+    i_val = np.zeros_like(v)
+    lam = np.zeros_like(v)
+    for formula, idx in _material_groups(material):
+        if idx is None:
+            return formula.batch(dp, v, nu, is_new)
+        i_val[idx], lam[idx] = formula.batch(dp[idx], v[idx], nu[idx], is_new[idx])
+    return i_val, lam
+
+
+def _material_di_dv_batch(
+    material: np.ndarray,
+    dp_m: np.ndarray,
+    v_m_s: np.ndarray,
+    nu_m2_s: np.ndarray,
+    is_new: np.ndarray,
+) -> np.ndarray:
+    # Аналитическая производная di/dv для формул _material_i_lambda (нужна для методов Ньютона).
+    dp = np.maximum(dp_m, 1.0e-6)
+    v = np.maximum(v_m_s, 0.0)
+    nu = np.maximum(nu_m2_s, 1.0e-9)
+    is_new = np.broadcast_to(np.asarray(is_new, dtype=bool), v.shape)
+    di = np.zeros_like(v)
+    for formula, idx in _material_groups(material):
+        if idx is None:
+            return formula.di_dv(dp, v, nu, is_new)
+        di[idx] = formula.di_dv(dp[idx], v[idx], nu[idx], is_new[idx])
+    return di
+
+
+def _batch_inputs(
+    material,
+    q_l_s,
+    dp_m,
+    length_m,
+    temp_c,
+    is_new,
+    local_mode,
+    k_local,
+    xi_sum,
+) -> Tuple[np.ndarray, ...]:
+    # Приведение аргументов пакетного расчета к одномерным массивам общей длины с ограничениями calc_hydraulics.
+    material, q, dp, length, temp, is_new, local_mode, k_local, xi_sum = np.broadcast_arrays(
+        np.asarray(material, dtype=object),
+        np.asarray(q_l_s, dtype=float),
+        np.asarray(dp_m, dtype=float),
+        np.asarray(length_m, dtype=float),
+        np.asarray(temp_c, dtype=float),
+        np.asarray(is_new, dtype=bool),
+        np.asarray(local_mode, dtype=object),
+        np.asarray(k_local, dtype=float),
+        np.asarray(xi_sum, dtype=float),
+    )
+    return (
+        np.atleast_1d(material),
+        np.maximum(np.atleast_1d(q), 0.0),
+        np.maximum(np.atleast_1d(dp), 1.0e-6),
+        np.maximum(np.atleast_1d(length), 0.0),
+        np.atleast_1d(temp),
+        np.atleast_1d(is_new),
+        np.atleast_1d(local_mode),
+        np.maximum(np.atleast_1d(k_local), 0.0),
+        np.maximum(np.atleast_1d(xi_sum), 0.0),
+    )
+
+
+def _batch_result(
+    v: np.ndarray,
+    dp: np.ndarray,
+    nu: np.ndarray,
+    i_val: np.ndarray,
+    lam: np.ndarray,
+    length: np.ndarray,
+    local_mode: np.ndarray,
+    k_local: np.ndarray,
+    xi_sum: np.ndarray,
+) -> HydraulicBatchResult:
+    h_f = i_val * length
+    h_local = np.zeros_like(h_f)
+    h_local = np.where(local_mode == "k", h_f * k_local, h_local)
+    h_local = np.where(local_mode == "xi", xi_sum * (v * v) / (2.0 * G), h_local)
+    return HydraulicBatchResult(
+        v_m_s=v,
+        i_m_per_m=i_val,
+        h_friction_m=h_f,
+        h_local_m=h_local,
+        h_total_m=h_f + h_local,
+        lambda_f=lam,
+        dp_m=dp,
+        re=v * dp / nu,
+        nu_m2_s=nu,
+    )
+
+
+def calc_hydraulics_batch(
+    material,
+    q_l_s,
+    dp_m,
+    length_m,
+    temp_c,
+    is_new,
+    local_mode="none",
+    k_local=0.0,
+    xi_sum=0.0,
+) -> HydraulicBatchResult:
+    # Пакетный расчет: аргументы — массивы одинаковой длины или скаляры (транслируются).
+    # Результат совпадает с calc_hydraulics поэлементно.
+    material, q, dp, length, temp, is_new, local_mode, k_local, xi_sum = _batch_inputs(
+        material, q_l_s, dp_m, length_m, temp_c, is_new, local_mode, k_local, xi_sum
+    )
+    nu = water_kinematic_viscosity_m2_s_batch(temp)
+    v = (q / 1000.0) / (math.pi * dp * dp / 4.0)
+    i_val, lam = _material_i_lambda_batch(material, dp, v, nu, is_new)
+    return _batch_result(v, dp, nu, i_val, lam, length, local_mode, k_local, xi_sum)
+
+
 def recommended_dp_candidates_mm(material: str) -> List[int]:
     if material in ("steel_vgp", "steel_welded"):
         return sorted(STEEL_DIMENSIONS.keys())
@@ -498,12 +840,78 @@ def recommended_dp_candidates_mm(material: str) -> List[int]:
     if material == "copper":
         return sorted(COPPER_DIMENSIONS.keys())
     if material == "fiberglass":
-        return sorted(FIBERGLASS_DIMENSIONS.keys())
+        # Ключи верхнего уровня — технологии изготовления; диаметры лежат на уровне давлений.
+        return sorted({d for by_p in FIBERGLASS_DIMENSIONS.values() for dims in by_p.values() for d in dims})
     if material == "metal_plastic":
         return list(METAL_PLASTIC_ID_MM)
     return list(POLYPLASTIC_ID_MM)
 
 
+def find_recommended_diameters_mm(
+    material: str,
+    q_l_s,
+    temp_c: float,
+    is_new: bool,
+    v_max_m_s: float = 3.0,
+    v_min_m_s: float = 0.0,
+) -> List[Tuple[int, List[Tuple[int, float, float]]]]:
+    # Подбор dвн сразу для набора расходов (например, всех участков стояка).
+    # Скорость монотонно падает с ростом d, поэтому первый диаметр с v <= v_max ищется бинарным поиском
+    # по отсортированному списку кандидатов; уклоны для shortlist считаются одним пакетным расчетом.
+    # Для каждого расхода: (выбранный dвн, мм; shortlist [(d, v, i)]) — как в find_recommended_diameter_mm.
+    cands = recommended_dp_candidates_mm(material)
+    q = np.maximum(np.atleast_1d(np.asarray(q_l_s, dtype=float)), 0.0)
+    if not cands:
+        return [(100, []) for _ in range(q.size)]
+    n_c = len(cands)
+    dp = np.maximum(np.asarray(cands, dtype=float) / 1000.0, 1.0e-6)
+    area = math.pi * dp * dp / 4.0
+
+    def _v(qi: np.ndarray, k: np.ndarray) -> np.ndarray:
+        return (qi / 1000.0) / area[np.minimum(k, n_c - 1)]
+
+    # v <= v_max  <=>  d >= sqrt(4q / (pi v_max)); затем сверка на границе тем же выражением, что в calc_hydraulics.
+    v_max = float(v_max_m_s)
+    if v_max > 0:
+        d_req = np.sqrt(4.0 * (q / 1000.0) / (math.pi * v_max))
+    else:
+        d_req = np.where((q > 0) | (v_max < 0), np.inf, 0.0)
+    k = np.searchsorted(dp, d_req, side="left")
+    back = (k > 0) & (_v(q, k - 1) <= v_max)
+    k = np.where(back, k - 1, k)
+    fwd = (k < n_c) & (_v(q, k) > v_max)
+    k = np.where(fwd, k + 1, k)
+
+    found = k < n_c
+    in_window = found & (_v(q, k) >= float(v_min_m_s))
+    # Как и при линейном переборе: без попадания в окно скоростей берется последний кандидат,
+    # а shortlist содержит все просмотренные диаметры.
+    chosen = np.where(in_window, k, n_c - 1)
+    n_rows = np.where(in_window, k + 1, n_c)
+
+    flow_idx = np.repeat(np.arange(q.size), n_rows)
+    cand_idx = np.arange(int(n_rows.sum())) - np.repeat(np.cumsum(n_rows) - n_rows, n_rows)
+    res = calc_hydraulics_batch(
+        material=material,
+        q_l_s=q[flow_idx],
+        dp_m=dp[cand_idx],
+        length_m=1.0,
+        temp_c=float(temp_c),
+        is_new=bool(is_new),
+    )
+    out: List[Tuple[int, List[Tuple[int, float, float]]]] = []
+    pos = 0
+    for j in range(q.size):
+        cnt = int(n_rows[j])
+        rows = [
+            (cands[int(cand_idx[r])], float(res.v_m_s[r]), float(res.i_m_per_m[r]))
+            for r in range(pos, pos + cnt)
+        ]
+        pos += cnt
+        out.append((cands[int(chosen[j])], rows))
+    return out
+
+
 def find_recommended_diameter_mm(
     material: str,
     q_l_s: float,
@@ -513,25 +921,4 @@ def find_recommended_diameter_mm(
     v_min_m_s: float = 0.0,
 ) -> Tuple[int, List[Tuple[int, float, float]]]:
     # Возвращает выбранный dвн, мм и shortlist: (d, v, i)
-    cands = recommended_dp_candidates_mm(material)
-    rows: List[Tuple[int, float, float]] = []
-    best = cands[-1] if cands else 100
-    for dmm in cands:
-        r = calc_hydraulics(
-            material=material,
-            q_l_s=q_l_s,
-            dp_m=dmm / 1000.0,
-            length_m=1.0,
-            temp_c=temp_c,
-            is_new=is_new,
-            local_mode="none",
-            k_local=0.0,
-            xi_sum=0.0,
-        )
-        rows.append((dmm, r.v_m_s, r.i_m_per_m))
-        if v_min_m_s <= r.v_m_s <= v_max_m_s:
-            best = dmm
-            break
-        if r.v_m_s <= v_max_m_s:
-            best = dmm
-    return best, rows
+    return find_recommended_diameters_mm(material, [q_l_s], temp_c, is_new, v_max_m_s, v_min_m_s)[0]
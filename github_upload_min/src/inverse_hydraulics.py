@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from typing import Optional, Sequence
+
+import numpy as np
+
+from hydraulics import _batch_inputs, calc_hydraulics_batch, recommended_dp_candidates_mm, water_kinematic_viscosity_m2_s_batch
+from ring_network import _segment_head_loss
+
+
+@dataclass
+class InverseFlowResult:
+    q_l_s: np.ndarray  # наибольший расход маршрута с H(q) ≤ Hдоп (inf — потери не зависят от расхода)
+    h_m: np.ndarray  # потери при найденном расходе
+    iterations: np.ndarray
+    converged: np.ndarray
+
+
+def max_flow_for_head(
+    material,
+    dp_m,
+    length_m,
+    h_available_m,
+    temp_c,
+    is_new,
+    local_mode="none",
+    k_local=0.0,
+    xi_sum=0.0,
+    route: Optional[Sequence[int]] = None,
+    tol_m: float = 1.0e-9,
+    max_iter: int = 60,
+) -> InverseFlowResult:
+    """
+    Обратная задача: наибольший расход q, при котором потери маршрута H(q) не превышают h_available_m.
+    Аргументы участков — как в calc_hydraulics_batch (массивы или скаляры); route — номер маршрута
+    для каждого участка (0..R-1, участки маршрута соединены последовательно и несут один расход),
+    h_available_m — по маршруту. Без route каждый участок — отдельный маршрут.
+    Все маршруты решаются вместе: на каждой итерации — один пакетный расчет H(q) и аналитической
+    dH/dq (производные формул _material_i_lambda); шаг Ньютона, а если он выходит из текущего
+    интервала [q_lo, q_hi] со сменой знака H(q) - Hдоп, — деление пополам.
+    """
+    # Без route напор транслируется вместе с параметрами участков (на месте q; отрицательный -> 0 дает q = 0).
+    material, h_seg_target, dp, length, temp, is_new, local_mode, k_local, xi_sum = _batch_inputs(
+        material, h_available_m if route is None else 0.0, dp_m, length_m, temp_c, is_new, local_mode, k_local, xi_sum
+    )
+    n_seg = material.shape[0]
+    route_idx = np.arange(n_seg) if route is None else np.asarray(route, dtype=np.int64)
+    if route_idx.shape != (n_seg,):
+        raise ValueError("route задается для каждого участка")
+    if n_seg and route_idx.min() < 0:
+        raise ValueError("Номера маршрутов должны быть неотрицательными")
+    n_routes = int(route_idx.max()) + 1 if n_seg else 0
+    if route is None:
+        target = h_seg_target.copy()
+    else:
+        target = np.broadcast_to(np.asarray(h_available_m, dtype=float), (n_routes,)).copy()
+
+    nu = water_kinematic_viscosity_m2_s_batch(temp)
+    area = math.pi * dp * dp / 4.0
+    k_mult = np.where(local_mode == "k", 1.0 + k_local, 1.0)
+    xi = np.where(local_mode == "xi", xi_sum, 0.0)
+
+    def _route_head(q_route: np.ndarray):
+        h_seg, dh_seg = _segment_head_loss(material, dp, area, nu, is_new, length, k_mult, xi, q_route[route_idx])
+        h = np.bincount(route_idx, weights=h_seg, minlength=n_routes)
+        dh = np.bincount(route_idx, weights=dh_seg, minlength=n_routes)
+        return h, dh
+
+    # Интервал со сменой знака: от 2 м/с в самом узком участке, расширение в 4 раза.
+    min_area = np.full(n_routes, np.inf)
+    np.minimum.at(min_area, route_idx, area)
+    lo = np.zeros(n_routes)
+    hi = 2.0 * min_area * 1000.0
+    h_hi, _ = _route_head(hi)
+    for _ in range(60):
+        grow = h_hi < target
+        if not grow.any():
+            break
+        hi = np.where(grow, hi * 4.0, hi)
+        h_hi, _ = _route_head(hi)
+    bounded = h_hi >= target
+
+    # Начальное приближение по квадратичному закону H ~ q².
+    q = np.where(bounded, hi * np.sqrt(np.clip(target / np.maximum(h_hi, 1.0e-300), 0.0, 1.0)), hi)
+    iterations = np.zeros(n_routes, dtype=np.int64)
+    active = bounded & (target > 0)
+    q = np.where(target > 0, q, 0.0)
+    h = np.zeros(n_routes)
+    for _ in range(max(int(max_iter), 1)):
+        h, dh = _route_head(q)
+        f = h - target
+        done = np.abs(f) <= tol_m * np.maximum(target, 1.0)
+        active &= ~done
+        if not active.any():
+            break
+        iterations += active
+        lo = np.where(active & (f < 0), q, lo)
+        hi = np.where(active & (f > 0), q, hi)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            q_newton = q - f / dh
+        use_newton = (dh > 0) & (q_newton > lo) & (q_newton < hi)
+        q_next = np.where(use_newton, q_newton, 0.5 * (lo + hi))
+        # Интервал сжался до точности представления — дальше уточнять нечего.
+        active &= (hi - lo) > 1.0e-15 * np.maximum(hi, 1.0e-300)
+        q = np.where(active, q_next, q)
+    else:
+        h, _ = _route_head(q)
+
+    exact = np.abs(h - target) <= tol_m * np.maximum(target, 1.0)
+    # Интервал сжат, а H(q) ≠ Hдоп — скачок формулы (переход между зонами): берется левый край, где H < Hдоп.
+    jump = bounded & (target > 0) & ~exact & ((hi - lo) <= 1.0e-15 * np.maximum(hi, 1.0e-300))
+    if jump.any():
+        q = np.where(jump, lo, q)
+        h = np.where(jump, _route_head(q)[0], h)
+    converged = exact | (target <= 0) | jump
+    return InverseFlowResult(
+        q_l_s=np.where(bounded | (target <= 0), q, np.inf),
+        h_m=h,
+        iterations=iterations,
+        converged=converged,
+    )
+
+
+def min_diameter_for_head(
+    material,
+    q_l_s,
+    length_m,
+    h_available_m,
+    temp_c,
+    is_new,
+    local_mode="none",
+    k_local=0.0,
+    xi_sum=0.0,
+) -> np.ndarray:
+    """
+    Наименьший внутренний диаметр из сортамента материала (recommended_dp_candidates_mm), при котором
+    потери трубы не превышают h_available_m. Все трубы одного материала проверяются по всем
+    диаметрам одним пакетным расчетом. nan — не подходит ни один диаметр.
+    """
+    material, q, _, length, temp, is_new, local_mode, k_local, xi_sum = _batch_inputs(
+        material, q_l_s, 1.0, length_m, temp_c, is_new, local_mode, k_local, xi_sum
+    )
+    # Hдоп участвует в общей форме наравне с остальными аргументами (скалярный расход и Hдоп по трассам).
+    target, material, q, length, temp, is_new, local_mode, k_local, xi_sum = np.broadcast_arrays(
+        np.asarray(h_available_m, dtype=float), material, q, length, temp, is_new, local_mode, k_local, xi_sum
+    )
+    out = np.full(q.shape, np.nan)
+    for name in set(material.tolist()):
+        idx = np.flatnonzero(material == name)
+        cands = np.asarray(recommended_dp_candidates_mm(name), dtype=float)
+        if cands.size == 0:
+            continue
+        n_c = cands.size
+        res = calc_hydraulics_batch(
+            material=name,
+            q_l_s=np.repeat(q[idx], n_c),
+            dp_m=np.tile(cands / 1000.0, idx.size),
+            length_m=np.repeat(length[idx], n_c),
+            temp_c=np.repeat(temp[idx], n_c),
+            is_new=np.repeat(is_new[idx], n_c),
+            local_mode=np.repeat(local_mode[idx], n_c),
+            k_local=np.repeat(k_local[idx], n_c),
+            xi_sum=np.repeat(xi_sum[idx], n_c),
+        )
+        ok = res.h_total_m.reshape(idx.size, n_c) <= target[idx][:, None]
+        first = np.argmax(ok, axis=1)
+        out[idx] = np.where(ok.any(axis=1), cands[first], np.nan)
+    return out
@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import csv
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+METER_CATALOG_PATH = Path(__file__).resolve().parents[1] / "data" / "meter_catalog.csv"
+
+# Крыльчатые счетчики — до DN 40 включительно, больше — турбинные.
+VANE_MAX_DN = 40
+# Допустимые потери напора в счетчике по п.12.16 СП 30.13330.2020, м: (крыльчатый, турбинный).
+METER_LIMIT_M = {False: (5.0, 2.5), True: (10.0, 5.0)}
+
+
+def meter_type_by_dn(dn: int) -> str:
+    return "Крыльчатый" if int(dn) <= VANE_MAX_DN else "Турбинный"
+
+
+def meter_limit_m(dn: int, with_fire: bool) -> float:
+    vane, turbine = METER_LIMIT_M[bool(with_fire)]
+    return vane if int(dn) <= VANE_MAX_DN else turbine
+
+
+@dataclass
+class MeterSelection:
+    # Подбор счетчиков для набора вводов/зданий — по элементу на ввод.
+    dn: np.ndarray
+    q_avg_m3_h: np.ndarray
+    q_l_s: np.ndarray
+    q_exp_m3_h: np.ndarray
+    q_max_m3_h: np.ndarray
+    s: np.ndarray
+    h_m: np.ndarray  # S·q²
+    limit_m: np.ndarray
+    ok: np.ndarray
+
+    def __len__(self) -> int:
+        return int(self.dn.shape[0])
+
+    def row(self, idx: int) -> Dict[str, object]:
+        dn = int(self.dn[idx])
+        return {
+            "dn": dn,
+            "q_avg_m3_h": float(self.q_avg_m3_h[idx]),
+            "q_l_s": float(self.q_l_s[idx]),
+            "q_exp_m3_h": float(self.q_exp_m3_h[idx]),
+            "q_max_m3_h": float(self.q_max_m3_h[idx]),
+            "s": float(self.s[idx]),
+            "h_m": float(self.h_m[idx]),
+            "limit_m": float(self.limit_m[idx]),
+            "ok": bool(self.ok[idx]),
+            "meter_type": meter_type_by_dn(dn),
+        }
+
+    def rows(self) -> List[Dict[str, object]]:
+        return [self.row(i) for i in range(len(self))]
+
+
+class MeterCatalog:
+    """
+    Счетчики воды по табл. 12.1 СП 30.13330.2020, отсортированы по эксплуатационному расходу.
+    Подбор (п.12.14): предварительно — по среднечасовому расходу (первый типоразмер с Qэкспл ≥ qср,ч),
+    затем от него вверх по таблице — первый, у которого потери S·q² не превышают допуск п.12.16.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        src = Path(path) if path is not None else METER_CATALOG_PATH
+        rows = []
+        with src.open(encoding="utf-8") as fh:
+            for row in csv.DictReader(fh):
+                try:
+                    rows.append((float(row["q_exp_m3_h"]), int(float(row["dn"])), float(row["q_max_m3_h"]), float(row["s"])))
+                except (KeyError, TypeError, ValueError):
+                    raise ValueError(f"Некорректная строка каталога счетчиков: {row}") from None
+        if not rows:
+            raise ValueError(f"Каталог счетчиков пуст: {src}")
+        rows.sort()
+        self.q_exp_m3_h = np.array([r[0] for r in rows], dtype=float)
+        self.dn = np.array([r[1] for r in rows], dtype=np.int64)
+        self.q_max_m3_h = np.array([r[2] for r in rows], dtype=float)
+        self.s = np.array([r[3] for r in rows], dtype=float)
+        vane = self.dn <= VANE_MAX_DN
+        self._limit = {fire: np.where(vane, lims[0], lims[1]) for fire, lims in METER_LIMIT_M.items()}
+
+    def __len__(self) -> int:
+        return int(self.dn.shape[0])
+
+    def limits_m(self, with_fire: bool) -> np.ndarray:
+        return self._limit[bool(with_fire)]
+
+    def pick_batch(self, q_avg_m3_h, q_l_s, with_fire) -> MeterSelection:
+        # Все вводы сразу: матрица «ввод × типоразмер» потерь и допусков (в таблице ~12 строк).
+        qavg, qs, fire = np.broadcast_arrays(
+            np.maximum(np.asarray(q_avg_m3_h, dtype=float), 0.0),
+            np.maximum(np.asarray(q_l_s, dtype=float), 0.0),
+            np.asarray(with_fire, dtype=bool),
+        )
+        qavg, qs, fire = qavg.ravel(), qs.ravel(), fire.ravel()
+        n_sizes = len(self)
+        # Первый типоразмер с Qэкспл ≥ qср,ч; если такого нет — самый крупный.
+        start = np.minimum(np.searchsorted(self.q_exp_m3_h, qavg, side="left"), n_sizes - 1)
+
+        limit = np.where(fire[:, None], self._limit[True][None, :], self._limit[False][None, :])
+        fits = self.s[None, :] * (qs * qs)[:, None] <= limit
+        fits &= np.arange(n_sizes)[None, :] >= start[:, None]
+        # Ни один не проходит — берется самый крупный, с признаком ok = False.
+        idx = np.where(fits.any(axis=1), np.argmax(fits, axis=1), n_sizes - 1)
+
+        s = self.s[idx]
+        h = s * (qs * qs)
+        lim = limit[np.arange(idx.shape[0]), idx]
+        return MeterSelection(
+            dn=self.dn[idx],
+            q_avg_m3_h=qavg,
+            q_l_s=qs,
+            q_exp_m3_h=self.q_exp_m3_h[idx],
+            q_max_m3_h=self.q_max_m3_h[idx],
+            s=s,
+            h_m=h,
+            limit_m=lim,
+            ok=h <= lim,
+        )
+
+    def pick(self, q_avg_m3_h: float, q_l_s: float, with_fire: bool) -> Dict[str, object]:
+        return self.pick_batch(q_avg_m3_h, q_l_s, with_fire).row(0)
+
+
+_CATALOG: Optional[MeterCatalog] = None
+_CATALOG_LOCK = threading.Lock()
+
+
+def get_meter_catalog() -> MeterCatalog:
+    # Каталог читается один раз на процесс.
+    global _CATALOG
+    if _CATALOG is None:
+        with _CATALOG_LOCK:
+            if _CATALOG is None:
+                _CATALOG = MeterCatalog()
+    return _CATALOG
+
+
+def pick_meter(q_avg_m3_h: float, q_l_s: float, with_fire: bool) -> Dict[str, object]:
+    return get_meter_catalog().pick(q_avg_m3_h, q_l_s, with_fire)
+
+
+def pick_meters(q_avg_m3_h, q_l_s, with_fire) -> MeterSelection:
+    return get_meter_catalog().pick_batch(q_avg_m3_h, q_l_s, with_fire)
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import fields
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from hydraulics import HydraulicResult, calc_hydraulics_batch
+from pipe_catalog import parse_sdr
+
+
+# Оси, которые напрямую передаются в calc_hydraulics_batch.
+_HYD_ARGS = ("material", "q_l_s", "dp_m", "length_m", "temp_c", "is_new", "local_mode", "k_local", "xi_sum")
+# Вместо dp_m можно перебирать наружный диаметр и серию SDR (или толщину стенки).
+_GEOMETRY_ARGS = ("d_out_mm", "sdr_series", "wall_mm")
+_DEFAULTS: Dict[str, Any] = {"is_new": True, "local_mode": "none", "k_local": 0.0, "xi_sum": 0.0}
+
+RESULT_FIELDS = [f.name for f in fields(HydraulicResult)]
+
+# Меньшие переборы считаются в текущем процессе: запуск пула дороже самого расчета.
+PARALLEL_MIN_SIZE = 200_000
+
+ProgressCallback = Callable[[int, int], None]
+
+
+def _inner_diameter_m(values: Dict[str, np.ndarray]) -> np.ndarray:
+    d_out = values["d_out_mm"].astype(float)
+    if "wall_mm" in values:
+        wall = values["wall_mm"].astype(float)
+    elif "sdr_series" in values:
+        sdr = np.array([parse_sdr(s) or math.nan for s in values["sdr_series"]], dtype=float)
+        # Та же толщина, что и в форме гидравлики: s = dн / SDR с округлением до 0.01 мм.
+        wall = np.round(d_out / sdr, 2)
+    else:
+        raise ValueError("Для d_out_mm нужна ось sdr_series или wall_mm")
+    return (d_out - 2.0 * wall) / 1000.0
+
+
+def _eval_chunk(axes: List[Tuple[str, list]], fixed: Dict[str, Any], start: int, stop: int) -> Dict[str, np.ndarray]:
+    # Комбинации с плоскими номерами start..stop-1 (построчный порядок осей) — одним пакетным расчетом.
+    shape = tuple(len(vals) for _, vals in axes)
+    idx = np.unravel_index(np.arange(start, stop), shape)
+    values: Dict[str, np.ndarray] = {}
+    for (name, vals), pos in zip(axes, idx):
+        values[name] = np.asarray(vals, dtype=object if isinstance(vals[0], str) else None)[pos]
+
+    args = {name: values.get(name, fixed.get(name, _DEFAULTS.get(name))) for name in _HYD_ARGS}
+    if args["dp_m"] is None:
+        geom: Dict[str, np.ndarray] = {}
+        for name in _GEOMETRY_ARGS:
+            if name in values:
+                geom[name] = values[name]
+            elif name in fixed:
+                geom[name] = np.full(stop - start, fixed[name], dtype=object)
+        if "d_out_mm" in geom:
+            args["dp_m"] = _inner_diameter_m(geom)
+    missing = [name for name, val in args.items() if val is None]
+    if missing:
+        raise ValueError(f"Не заданы параметры перебора: {', '.join(missing)}")
+
+    res = calc_hydraulics_batch(**args)
+    out = dict(values)
+    for name in RESULT_FIELDS:
+        out[name] = getattr(res, name)
+    return out
+
+
+def sweep_hydraulics(
+    axes: Dict[str, Sequence[Any]],
+    fixed: Optional[Dict[str, Any]] = None,
+    max_workers: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+    progress: Optional[ProgressCallback] = None,
+) -> pd.DataFrame:
+    """
+    Перебор вариантов calc_hydraulics по декартову произведению осей.
+    axes — {имя параметра: значения}; fixed — параметры, общие для всех вариантов.
+    Имена — аргументы calc_hydraulics; вместо dp_m допускаются d_out_mm + sdr_series/wall_mm.
+    Перебор режется на непрерывные блоки по плоскому номеру варианта, блоки считаются
+    calc_hydraulics_batch в процессах ProcessPoolExecutor. Порядок строк результата — построчный
+    по осям в порядке их задания (не зависит от числа процессов). progress(готово, всего) вызывается
+    по завершении каждого блока.
+    """
+    fixed = dict(fixed or {})
+    axis_items: List[Tuple[str, list]] = [(name, list(vals)) for name, vals in axes.items()]
+    for name, vals in axis_items:
+        if name not in _HYD_ARGS and name not in _GEOMETRY_ARGS:
+            raise ValueError(f"Неизвестная ось перебора: '{name}'")
+        if not vals:
+            raise ValueError(f"Ось перебора '{name}' пуста")
+    total = int(np.prod([len(vals) for _, vals in axis_items])) if axis_items else 0
+    columns = [name for name, _ in axis_items] + RESULT_FIELDS
+    if total == 0:
+        return pd.DataFrame(columns=columns)
+
+    workers = max(int(max_workers or os.cpu_count() or 1), 1)
+    if total < PARALLEL_MIN_SIZE:
+        workers = 1
+    # Несколько блоков на процесс выравнивают загрузку при неравной стоимости вариантов.
+    size = max(int(chunk_size or math.ceil(total / (workers * 4))), 1)
+    bounds = [(s, min(s + size, total)) for s in range(0, total, size)]
+
+    parts: Dict[int, Dict[str, np.ndarray]] = {}
+    done = 0
+    if workers == 1:
+        for start, stop in bounds:
+            parts[start] = _eval_chunk(axis_items, fixed, start, stop)
+            done += stop - start
+            if progress is not None:
+                progress(done, total)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(_eval_chunk, axis_items, fixed, start, stop): (start, stop) for start, stop in bounds}
+            for fut in as_completed(futures):
+                start, stop = futures[fut]
+                parts[start] = fut.result()
+                done += stop - start
+                if progress is not None:
+                    progress(done, total)
+
+    ordered = [parts[start] for start, _ in bounds]
+    return pd.DataFrame({name: np.concatenate([p[name] for p in ordered]) for name in columns})
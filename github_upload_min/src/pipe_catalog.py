@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import re
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from hydraulics import (
+    CAST_IRON_BY_CLASS,
+    COPPER_DIMENSIONS,
+    FIBERGLASS_DIMENSIONS,
+    METAL_PLASTIC_ID_MM,
+    MLPEX_SDR_SERIES,
+    PLASTIC_DIMENSIONS,
+    PLASTIC_SDR_SERIES,
+    POLYPLASTIC_ID_MM,
+    STEEL_DIMENSIONS,
+)
+
+
+_SDR_RE = re.compile(r"SDR\s*([0-9]+(?:\.[0-9]+)?)")
+
+
+def parse_sdr(label: str) -> Optional[float]:
+    m = _SDR_RE.search(str(label))
+    return float(m.group(1)) if m else None
+
+
+@dataclass
+class PipeSize:
+    material: str
+    series: str  # класс давления / серия SDR / конструкция и давление; "" — без серии
+    d_out_mm: float
+    wall_mm: float
+    wall_max_mm: float  # для таблиц с диапазоном толщин (чугун, стеклопластик), иначе = wall_mm
+    d_in_mm: float
+
+
+@dataclass
+class PipeSizeTable:
+    # Типоразмеры одного материала (или материала и серии), отсортированы по d_in_mm.
+    material: str
+    series: np.ndarray
+    d_out_mm: np.ndarray
+    wall_mm: np.ndarray
+    wall_max_mm: np.ndarray
+    d_in_mm: np.ndarray
+
+    def __len__(self) -> int:
+        return int(self.d_in_mm.shape[0])
+
+    def row(self, idx: int) -> PipeSize:
+        return PipeSize(
+            material=self.material,
+            series=str(self.series[idx]),
+            d_out_mm=float(self.d_out_mm[idx]),
+            wall_mm=float(self.wall_mm[idx]),
+            wall_max_mm=float(self.wall_max_mm[idx]),
+            d_in_mm=float(self.d_in_mm[idx]),
+        )
+
+    def _subset(self, idx: np.ndarray) -> "PipeSizeTable":
+        return PipeSizeTable(
+            material=self.material,
+            series=self.series[idx],
+            d_out_mm=self.d_out_mm[idx],
+            wall_mm=self.wall_mm[idx],
+            wall_max_mm=self.wall_max_mm[idx],
+            d_in_mm=self.d_in_mm[idx],
+        )
+
+
+# (серия, dн, s, s_max)
+_Row = Tuple[str, float, float, float]
+
+
+def _sdr_rows(d_out_list, series_labels: List[str]) -> List[_Row]:
+    # Толщина по серии SDR: s = dн / SDR с округлением до 0.01 мм (как в форме гидравлики).
+    rows: List[_Row] = []
+    for label in series_labels:
+        sdr = parse_sdr(label)
+        if not sdr:
+            continue
+        for d_out in d_out_list:
+            s = round(float(d_out) / sdr, 2)
+            rows.append((label, float(d_out), s, s))
+    return rows
+
+
+def _catalog_rows() -> Dict[str, List[_Row]]:
+    steel = [("", float(d), float(s), float(s)) for d, walls in STEEL_DIMENSIONS.items() for s in walls]
+    cast_iron = [
+        (cls, float(de), float(e_min), float(e_nom))
+        for cls, by_dn in CAST_IRON_BY_CLASS.items()
+        for de, e_min, e_nom in by_dn.values()
+    ]
+    copper = [("", float(d), float(s), float(s)) for d, walls in COPPER_DIMENSIONS.items() for s in walls]
+    fiberglass: List[_Row] = []
+    for profile, by_p in FIBERGLASS_DIMENSIONS.items():
+        for pressure, dims in by_p.items():
+            for d_in, (s_min, s_max) in dims.items():
+                # В таблицах СП 40-104 задан внутренний диаметр: dн восстанавливаем по s_min.
+                fiberglass.append((f"{profile}, {pressure}", float(d_in) + 2.0 * s_min, float(s_min), float(s_max)))
+    return {
+        "steel_vgp": steel,
+        "steel_welded": list(steel),
+        "cast_iron": cast_iron,
+        "plastic": _sdr_rows(sorted(PLASTIC_DIMENSIONS), PLASTIC_SDR_SERIES),
+        "metal_plastic": _sdr_rows(METAL_PLASTIC_ID_MM, MLPEX_SDR_SERIES),
+        "polyplastic": _sdr_rows(POLYPLASTIC_ID_MM, MLPEX_SDR_SERIES),
+        "copper": copper,
+        "fiberglass": fiberglass,
+    }
+
+
+class PipeCatalog:
+    """
+    Единый каталог типоразмеров по всем таблицам hydraulics.
+    Строится один раз: для каждого материала и пары (материал, серия) — массивы, отсортированные
+    по внутреннему диаметру, поэтому поиск «ближайший dвн ≥ x» — бинарный (O(log n)).
+    """
+
+    def __init__(self) -> None:
+        self._tables: Dict[str, PipeSizeTable] = {}
+        self._by_series: Dict[Tuple[str, str], PipeSizeTable] = {}
+        self._exact: Dict[Tuple[str, str, float], int] = {}
+        for material, rows in _catalog_rows().items():
+            series = np.array([r[0] for r in rows], dtype=object)
+            d_out = np.array([r[1] for r in rows], dtype=float)
+            wall = np.array([r[2] for r in rows], dtype=float)
+            wall_max = np.array([r[3] for r in rows], dtype=float)
+            d_in = np.maximum(d_out - 2.0 * wall, 0.0)
+            order = np.lexsort((d_out, d_in))
+            table = PipeSizeTable(
+                material=material,
+                series=series[order],
+                d_out_mm=d_out[order],
+                wall_mm=wall[order],
+                wall_max_mm=wall_max[order],
+                d_in_mm=d_in[order],
+            )
+            self._tables[material] = table
+            for label in dict.fromkeys(series.tolist()):
+                self._by_series[(material, label)] = table._subset(np.flatnonzero(table.series == label))
+            for i in range(len(table)):
+                self._exact.setdefault((material, str(table.series[i]), float(table.d_out_mm[i])), i)
+
+    def materials(self) -> List[str]:
+        return list(self._tables)
+
+    def series(self, material: str) -> List[str]:
+        return [label for (mat, label) in self._by_series if mat == material]
+
+    def sizes(self, material: str, series: Optional[str] = None) -> PipeSizeTable:
+        if series is None:
+            table = self._tables.get(material)
+        else:
+            table = self._by_series.get((material, series))
+        if table is None:
+            raise ValueError(f"В каталоге нет типоразмеров для '{material}'" + (f" / '{series}'" if series else ""))
+        return table
+
+    def inner_diameters_mm(self, material: str, series: Optional[str] = None) -> np.ndarray:
+        return np.unique(self.sizes(material, series).d_in_mm)
+
+    def nearest_at_least(self, material: str, d_in_mm: float, series: Optional[str] = None) -> Optional[PipeSize]:
+        # Наименьший типоразмер с dвн ≥ d_in_mm (при равных dвн — меньший dн); None, если таких нет.
+        table = self.sizes(material, series)
+        idx = int(np.searchsorted(table.d_in_mm, float(d_in_mm), side="left"))
+        return table.row(idx) if idx < len(table) else None
+
+    def nearest_at_least_batch(self, material: str, d_in_mm, series: Optional[str] = None) -> np.ndarray:
+        # Индексы в sizes(material, series) для массива требуемых dвн; -1 — подходящего нет.
+        table = self.sizes(material, series)
+        idx = np.searchsorted(table.d_in_mm, np.asarray(d_in_mm, dtype=float), side="left")
+        return np.where(idx < len(table), idx, -1)
+
+    def wall_mm(self, material: str, d_out_mm: float, series: str = "") -> float:
+        # Толщина стенки по (материал, серия, dн); 0.0 — сочетания нет в каталоге.
+        idx = self._exact.get((material, series, float(d_out_mm)))
+        return 0.0 if idx is None else float(self._tables[material].wall_mm[idx])
+
+
+_CATALOG: Optional[PipeCatalog] = None
+_CATALOG_LOCK = threading.Lock()
+
+
+def get_pipe_catalog() -> PipeCatalog:
+    # Каталог строится один раз на процесс.
+    global _CATALOG
+    if _CATALOG is None:
+        with _CATALOG_LOCK:
+            if _CATALOG is None:
+                _CATALOG = PipeCatalog()
+    return _CATALOG
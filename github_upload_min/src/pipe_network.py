@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+import numpy as np
+
+from fittings import fittings_xi_sum
+from hydraulics import K_PRESETS, HydraulicBatchResult, calc_hydraulics_batch
+
+
+@dataclass
+class NetworkNode:
+    node_id: str
+    elevation_m: float = 0.0
+    demand_l_s: float = 0.0  # расход водоразборного прибора в узле
+    free_head_m: float = 0.0  # Hсвоб у прибора
+
+
+@dataclass
+class NetworkSegment:
+    seg_id: str
+    from_node: str  # узел со стороны ввода
+    to_node: str
+    material: str
+    length_m: float
+    dp_m: float
+    is_new: bool = True
+    local_mode: str = "none"  # none|k|xi
+    k_preset: str = ""  # ключ K_PRESETS; "" или "Пользовательский" -> k_local
+    k_local: float = 0.0
+    xi_sum: float = 0.0
+    fittings: Dict[str, float] = field(default_factory=dict)  # {тип фитинга: количество}, учитываются в режиме "xi"
+
+
+@dataclass
+class TreeNetworkResult:
+    segment_ids: List[str]
+    q_l_s: np.ndarray
+    hydraulics: HydraulicBatchResult
+    node_ids: List[str]
+    node_loss_m: np.ndarray  # сумма потерь от ввода до узла
+    node_required_head_m: np.ndarray  # потери + (zузла - zввода) + Hсвоб
+    dictating_node: str
+    critical_path: List[str] = field(default_factory=list)  # участки от ввода к диктующему прибору
+    h_losses_m: float = 0.0
+    h_required_m: float = 0.0
+
+    def critical_path_rows(self) -> List[Dict[str, float | str]]:
+        pos = {sid: i for i, sid in enumerate(self.segment_ids)}
+        rows: List[Dict[str, float | str]] = []
+        h_cum = 0.0
+        for sid in self.critical_path:
+            i = pos[sid]
+            h_cum += float(self.hydraulics.h_total_m[i])
+            rows.append(
+                {
+                    "seg_id": sid,
+                    "q_l_s": float(self.q_l_s[i]),
+                    "dp_mm": float(self.hydraulics.dp_m[i]) * 1000.0,
+                    "v_m_s": float(self.hydraulics.v_m_s[i]),
+                    "i_m_per_m": float(self.hydraulics.i_m_per_m[i]),
+                    "h_friction_m": float(self.hydraulics.h_friction_m[i]),
+                    "h_local_m": float(self.hydraulics.h_local_m[i]),
+                    "h_total_m": float(self.hydraulics.h_total_m[i]),
+                    "h_cum_m": h_cum,
+                }
+            )
+        return rows
+
+
+def _resolve_k_local(seg: NetworkSegment) -> float:
+    if seg.local_mode != "k":
+        return float(seg.k_local)
+    k_val = K_PRESETS.get(seg.k_preset) if seg.k_preset else None
+    return float(seg.k_local) if k_val is None else float(k_val)
+
+
+def _resolve_xi_sums(segments: List[NetworkSegment], dp_m=None, branch_ratio=1.0) -> np.ndarray:
+    """
+    Σξ участков для режима "xi": введенная xi_sum + фитинги участка по библиотеке (fittings_xi_sum).
+    dp_m — внутренние диаметры для поиска ξ по DN (по умолчанию dp_m участков); тройники — по branch_ratio.
+    """
+    xi = np.array([max(float(s.xi_sum), 0.0) for s in segments], dtype=float)
+    if any(s.fittings for s in segments):
+        dp = np.array([float(s.dp_m) for s in segments], dtype=float) if dp_m is None else np.asarray(dp_m, dtype=float)
+        xi = xi + fittings_xi_sum([s.fittings for s in segments], dp * 1000.0, branch_ratio)
+    return xi
+
+
+@dataclass
+class _TreeIndex:
+    node_pos: Dict[str, int]
+    inlet: int
+    seg_from: np.ndarray
+    seg_to: np.ndarray
+    parent_seg: np.ndarray  # участок, питающий узел (-1 для ввода)
+    order: List[int]  # участки в прямом порядке обхода от ввода
+
+
+def _build_tree_index(nodes: List[NetworkNode], segments: List[NetworkSegment], inlet_node: str) -> _TreeIndex:
+    node_pos = {n.node_id: i for i, n in enumerate(nodes)}
+    if inlet_node not in node_pos:
+        raise ValueError(f"Узел ввода '{inlet_node}' не найден в сети")
+    inlet = node_pos[inlet_node]
+    n_nodes = len(nodes)
+    n_segs = len(segments)
+
+    parent_seg = np.full(n_nodes, -1, dtype=np.int64)
+    seg_from = np.empty(n_segs, dtype=np.int64)
+    seg_to = np.empty(n_segs, dtype=np.int64)
+    children: List[List[int]] = [[] for _ in range(n_nodes)]
+    for si, seg in enumerate(segments):
+        if seg.from_node not in node_pos or seg.to_node not in node_pos:
+            raise ValueError(f"Участок '{seg.seg_id}' ссылается на неизвестный узел")
+        a = node_pos[seg.from_node]
+        b = node_pos[seg.to_node]
+        if parent_seg[b] >= 0 or b == inlet:
+            raise ValueError(f"Узел '{seg.to_node}' питается более чем одним участком: сеть не тупиковая")
+        parent_seg[b] = si
+        seg_from[si] = a
+        seg_to[si] = b
+        children[a].append(si)
+
+    # Обход от ввода (прямой порядок): родительский участок всегда идет раньше дочерних.
+    order: List[int] = []
+    stack = [inlet]
+    while stack:
+        u = stack.pop()
+        for si in children[u]:
+            order.append(si)
+            stack.append(int(seg_to[si]))
+    if len(order) != n_segs:
+        raise ValueError("Часть участков не связана с узлом ввода")
+    return _TreeIndex(node_pos=node_pos, inlet=inlet, seg_from=seg_from, seg_to=seg_to, parent_seg=parent_seg, order=order)
+
+
+def _accumulate_flows(tree: _TreeIndex, demand: np.ndarray) -> np.ndarray:
+    # Обратный проход: расход участка = расход питаемого узла вместе со всеми нижележащими.
+    node_q = demand.copy()
+    q = np.zeros(tree.seg_from.shape[0], dtype=float)
+    for si in reversed(tree.order):
+        b = tree.seg_to[si]
+        q[si] = node_q[b]
+        node_q[tree.seg_from[si]] += node_q[b]
+    return q
+
+
+def _branch_ratios(tree: _TreeIndex, q: np.ndarray) -> np.ndarray:
+    # Доля расхода участка в расходе участка, питающего его начальный узел (у ввода — 1); q может быть (..., участки).
+    feed = tree.parent_seg[tree.seg_from]
+    q_feed = np.where(feed >= 0, q[..., np.maximum(feed, 0)], q)
+    return np.divide(q, q_feed, out=np.ones_like(q, dtype=float), where=q_feed > 0)
+
+
+def calc_tree_network(
+    nodes: List[NetworkNode],
+    segments: List[NetworkSegment],
+    inlet_node: str,
+    temp_c: float,
+) -> TreeNetworkResult:
+    """
+    Расчет тупиковой (разветвленной) сети от ввода.
+    - расходы участков: сумма расходов приборов ниже по течению (один проход в обратном порядке обхода);
+    - потери каждого участка: calc_hydraulics_batch за один вызов (ξ фитингов — по долям расхода в тройниках);
+    - диктующий прибор: максимум потерь + разности отметок + Hсвоб.
+    Сложность O(N) по числу участков.
+    """
+    tree = _build_tree_index(nodes, segments, inlet_node)
+    n_nodes = len(nodes)
+    seg_from = tree.seg_from
+    seg_to = tree.seg_to
+    parent_seg = tree.parent_seg
+    order = tree.order
+
+    demand = np.array([max(float(n.demand_l_s), 0.0) for n in nodes], dtype=float)
+    q = _accumulate_flows(tree, demand)
+
+    hyd = calc_hydraulics_batch(
+        material=[s.material for s in segments],
+        q_l_s=q,
+        dp_m=[s.dp_m for s in segments],
+        length_m=[s.length_m for s in segments],
+        temp_c=float(temp_c),
+        is_new=[bool(s.is_new) for s in segments],
+        local_mode=[s.local_mode for s in segments],
+        k_local=[_resolve_k_local(s) for s in segments],
+        xi_sum=_resolve_xi_sums(segments, branch_ratio=_branch_ratios(tree, q)),
+    )
+
+    node_loss = np.zeros(n_nodes, dtype=float)
+    h_seg = hyd.h_total_m
+    for si in order:
+        node_loss[seg_to[si]] = node_loss[seg_from[si]] + h_seg[si]
+
+    elev = np.array([float(n.elevation_m) for n in nodes], dtype=float)
+    free = np.array([max(float(n.free_head_m), 0.0) for n in nodes], dtype=float)
+    required = node_loss + (elev - elev[tree.inlet]) + free
+
+    # Диктующим считаем узел с прибором (есть расход); если приборов нет — любой узел сети.
+    fixtures = np.flatnonzero(demand > 0)
+    pool = fixtures if fixtures.size else np.arange(n_nodes)
+    dict_idx = int(pool[np.argmax(required[pool])])
+
+    path: List[str] = []
+    u = dict_idx
+    while parent_seg[u] >= 0:
+        si = int(parent_seg[u])
+        path.append(segments[si].seg_id)
+        u = int(seg_from[si])
+    path.reverse()
+
+    return TreeNetworkResult(
+        segment_ids=[s.seg_id for s in segments],
+        q_l_s=q,
+        hydraulics=hyd,
+        node_ids=[n.node_id for n in nodes],
+        node_loss_m=node_loss,
+        node_required_head_m=required,
+        dictating_node=nodes[dict_idx].node_id,
+        critical_path=path,
+        h_losses_m=float(node_loss[dict_idx]),
+        h_required_m=float(required[dict_idx]),
+    )
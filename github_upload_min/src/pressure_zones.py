@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from hydraulics import G, calc_hydraulics_batch
+from water_properties import water_density
+
+
+@dataclass
+class PressureZone:
+    floor_from: int  # номера этажей с 1, включительно
+    floor_to: int
+    q_l_s: float  # расход зоны
+    h_required_m: float  # Hтр зоны от отметки ввода
+    h_losses_m: float  # транзит + стояк зоны
+    h_meter_m: float
+    h_static_low_m: float  # напор у нижнего прибора зоны при Hтр
+    h_pump_m: float  # Hтр - гарантированный напор (не меньше 0)
+    power_kw: float  # гидравлическая мощность ρ·g·q·Hнас
+    prv_floors: List[int] = field(default_factory=list)  # этажи, где нужен регулятор давления
+    floor_free_head_m: List[float] = field(default_factory=list)  # свободный напор на этажах зоны при расчетном расходе
+
+
+@dataclass
+class ZoningPlan:
+    zones: List[PressureZone]
+    power_kw: float
+
+    @property
+    def n_prv(self) -> int:
+        return sum(len(z.prv_floors) for z in self.zones)
+
+
+@dataclass
+class ZoningResult:
+    power_kw: Dict[int, float]  # минимальная мощность для каждого допустимого числа зон
+    recommended: int  # наименьшее допустимое число зон
+    _build: Callable[[int], ZoningPlan] = field(repr=False)
+    _plans: Dict[int, ZoningPlan] = field(default_factory=dict, repr=False)
+
+    def plan(self, n_zones: int) -> ZoningPlan:
+        # Разбиение восстанавливается по запросу: для 100 этажей их до 100, нужны обычно 1-2.
+        if n_zones not in self.power_kw:
+            raise ValueError(f"Нет допустимого разбиения на {n_zones} зон")
+        if n_zones not in self._plans:
+            self._plans[n_zones] = self._build(n_zones)
+        return self._plans[n_zones]
+
+    @property
+    def best(self) -> ZoningPlan:
+        return self.plan(self.recommended)
+
+
+def optimize_pressure_zones(
+    floor_elev_m: Sequence[float],
+    floor_q_l_s: Sequence[float],
+    material: str,
+    riser_dp_m: float,
+    transit_dp_m: Optional[float] = None,
+    z_inlet_m: float = 0.0,
+    l_transit_m: float = 0.0,
+    temp_c: float = 10.0,
+    is_new: bool = True,
+    h_free_m: float = 20.0,
+    h_max_m: float = 45.0,
+    allow_prv: bool = False,
+    h_city_m: float = 0.0,
+    meter_s: float = 0.0,
+    local_mode: str = "none",
+    k_local: float = 0.0,
+    xi_sum: float = 0.0,
+    max_zones: Optional[int] = None,
+) -> ZoningResult:
+    """
+    Разбиение здания на зоны давления (непрерывные диапазоны этажей, каждая зона — свой транзит от ввода и стояк).
+    Hтр зоны = (zверх - zввода) + потери транзита и стояка + Hсвоб + S·q², как в блоке требуемого напора.
+    Напор у нижнего прибора зоны при Hтр не должен превышать h_max_m (по СП 30.13330.2020 — 45 м);
+    при allow_prv этажи с превышением допускаются и получают регулятор давления.
+    Для каждого числа зон до max_zones динамическим программированием по этажам (O(N²) на число зон)
+    ищется разбиение с минимальной суммарной мощностью насосов ρ·g·Σq·max(Hтр - h_city_m, 0).
+    Потери всех возможных зон считаются заранее двумя вызовами calc_hydraulics_batch (O(N²) участков).
+    Расходы этажей суммируются — при вероятностном методе передавайте приведенные значения.
+    """
+    z = np.asarray(floor_elev_m, dtype=float)
+    q_floor = np.maximum(np.asarray(floor_q_l_s, dtype=float), 0.0)
+    n = z.shape[0]
+    if n == 0 or q_floor.shape[0] != n:
+        raise ValueError("Отметки и расходы этажей должны быть заданы для каждого этажа")
+    if np.any(np.diff(z) < 0):
+        raise ValueError("Отметки этажей должны идти снизу вверх")
+    z_max = n if max_zones is None else min(max(int(max_zones), 1), n)
+    dp_t = float(riser_dp_m if transit_dp_m is None else transit_dp_m)
+
+    # q[a, b] — расход этажей a..b (a ≤ b); верхний треугольник.
+    csum = np.concatenate([[0.0], np.cumsum(q_floor)])
+    ia, ib = np.triu_indices(n)
+    q_ab = csum[ib + 1] - csum[ia]
+
+    common = dict(material=material, temp_c=temp_c, is_new=is_new, local_mode=local_mode, k_local=k_local, xi_sum=xi_sum)
+    # Транзит зоны a..b: от ввода до этажа a с расходом всей зоны.
+    transit = calc_hydraulics_batch(
+        q_l_s=q_ab,
+        dp_m=dp_t,
+        length_m=max(float(l_transit_m), 0.0) + np.maximum(z[ia] - float(z_inlet_m), 0.0),
+        **common,
+    ).h_total_m
+    # Участок стояка f-1 -> f в зоне с верхним этажом b несет расход этажей f..b (от a не зависит).
+    riser = calc_hydraulics_batch(
+        q_l_s=q_ab,
+        dp_m=float(riser_dp_m),
+        length_m=np.where(ia > 0, z[ia] - z[np.maximum(ia - 1, 0)], 0.0),
+        **common,
+    ).h_total_m
+    t_mat = np.full((n, n), np.nan)
+    t_mat[ia, ib] = transit
+    r_mat = np.zeros((n, n))
+    r_mat[ia, ib] = np.where(ia > 0, riser, 0.0)
+    # Потери в стояке зоны a..b: Σ r[f, b] по f = a+1..b (накопление снизу вверх по f от b).
+    r_tail = np.cumsum(r_mat[::-1], axis=0)[::-1]
+    r_zone = np.zeros((n, n))
+    r_zone[:-1] = r_tail[1:]
+
+    q_mat = np.full((n, n), np.nan)
+    q_mat[ia, ib] = q_ab
+    loss = t_mat + np.triu(r_zone)
+    h_meter = max(float(meter_s), 0.0) * q_mat * q_mat
+    h_req = (z[None, :] - float(z_inlet_m)) + loss + max(float(h_free_m), 0.0) + h_meter
+    h_low = h_req - (z[:, None] - float(z_inlet_m))
+    h_pump = np.maximum(h_req - max(float(h_city_m), 0.0), 0.0)
+    power = water_density(temp_c) * G * q_mat / 1000.0 * h_pump / 1000.0
+    valid = ~np.isnan(h_req)
+    if not allow_prv:
+        valid &= h_low <= float(h_max_m) + 1e-9
+    cost = np.where(valid, power, np.inf)
+
+    # best[k, b] — минимум мощности для этажей 0..b, разбитых на k+1 зон; prev — начало последней зоны.
+    best = np.full((z_max, n), np.inf)
+    prev = np.full((z_max, n), -1, dtype=np.int64)
+    best[0] = cost[0]
+    prev[0] = 0
+    for k in range(1, z_max):
+        # Последняя зона a..b (a ≥ 1) после k зон на этажах 0..a-1.
+        cand = best[k - 1][:-1, None] + cost[1:, :]
+        a_best = np.argmin(cand, axis=0)
+        best[k] = cand[a_best, np.arange(n)]
+        prev[k] = a_best + 1
+        best[k, 0] = np.inf
+
+    def build(n_zones: int) -> ZoningPlan:
+        bounds = []
+        b = n - 1
+        for kk in range(n_zones - 1, -1, -1):
+            a = int(prev[kk, b])
+            bounds.append((a, b))
+            b = a - 1
+        bounds.reverse()
+        zones = []
+        for a, b in bounds:
+            floors = np.arange(a, b + 1)
+            # Свободный напор на этаже f при Hтр зоны: Hтр - (zf - zввода) - транзит - стояк до f.
+            to_floor = t_mat[a, b] + np.concatenate([[0.0], np.cumsum(r_mat[a + 1 : b + 1, b])])
+            free = h_req[a, b] - (z[floors] - float(z_inlet_m)) - to_floor - h_meter[a, b]
+            static = h_req[a, b] - (z[floors] - float(z_inlet_m))
+            zones.append(
+                PressureZone(
+                    floor_from=a + 1,
+                    floor_to=b + 1,
+                    q_l_s=float(q_mat[a, b]),
+                    h_required_m=float(h_req[a, b]),
+                    h_losses_m=float(loss[a, b]),
+                    h_meter_m=float(h_meter[a, b]),
+                    h_static_low_m=float(h_low[a, b]),
+                    h_pump_m=float(h_pump[a, b]),
+                    power_kw=float(power[a, b]),
+                    prv_floors=[int(f) + 1 for f in floors[static > float(h_max_m) + 1e-9]],
+                    floor_free_head_m=[float(v) for v in free],
+                )
+            )
+        return ZoningPlan(zones=zones, power_kw=float(best[n_zones - 1, n - 1]))
+
+    feasible = {k + 1: float(best[k, n - 1]) for k in range(z_max) if np.isfinite(best[k, n - 1])}
+    if not feasible:
+        raise ValueError(
+            "Нет допустимого разбиения: напор у нижнего прибора зоны превышает предел даже для одного этажа"
+        )
+    return ZoningResult(power_kw=feasible, recommended=min(feasible), _build=build)
@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.linalg import spsolve
+
+from hydraulics import (
+    G,
+    _material_di_dv_batch,
+    _material_i_lambda_batch,
+    water_kinematic_viscosity_m2_s_batch,
+)
+from pipe_network import NetworkNode, NetworkSegment, _resolve_k_local, _resolve_xi_sums
+
+
+@dataclass
+class LoopedNetworkResult:
+    segment_ids: List[str]
+    node_ids: List[str]
+    q_l_s: np.ndarray  # расход по участку, знак — относительно направления from_node -> to_node
+    h_loss_m: np.ndarray  # потери на участке со знаком расхода
+    head_m: np.ndarray  # пьезометрический напор в узлах
+    converged: bool
+    iterations: int
+    energy_residual_m: float  # max |h(Q) - (Ha - Hb)|
+    continuity_residual_l_s: float  # max небаланс расхода в узле
+    residual_history: List[Tuple[float, float]] = field(default_factory=list)
+
+
+def _segment_head_loss(
+    material: np.ndarray,
+    dp: np.ndarray,
+    area: np.ndarray,
+    nu: np.ndarray,
+    is_new: np.ndarray,
+    length: np.ndarray,
+    k_mult: np.ndarray,
+    xi: np.ndarray,
+    q_l_s: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray]:
+    # h(Q) со знаком расхода и аналитическая dh/dQ (четная функция), Q в л/с.
+    q_abs = np.abs(q_l_s)
+    v = (q_abs / 1000.0) / area
+    i_val, _ = _material_i_lambda_batch(material, dp, v, nu, is_new)
+    di_dv = _material_di_dv_batch(material, dp, v, nu, is_new)
+    h = i_val * length * k_mult + xi * v * v / (2.0 * G)
+    dh_dv = di_dv * length * k_mult + xi * v / G
+    dh_dq = dh_dv / (1000.0 * area)
+    return np.sign(q_l_s) * h, dh_dq
+
+
+def calc_looped_network(
+    nodes: List[NetworkNode],
+    segments: List[NetworkSegment],
+    fixed_heads_m: Dict[str, float],
+    temp_c: float,
+    warm_start: Optional[LoopedNetworkResult] = None,
+    tol_head_m: float = 1.0e-3,
+    tol_flow_l_s: float = 1.0e-5,
+    max_iter: int = 50,
+) -> LoopedNetworkResult:
+    """
+    Кольцевая сеть: метод глобального градиента (Todini-Pilati).
+    Неизвестные — расходы участков Q и напоры узлов H (кроме узлов с заданным напором).
+    На каждой итерации решается разреженная СЛАУ (A^T·D^-1·A)·dH = A^T·D^-1·R1 - R2,
+    где D = diag(dh/dQ) — аналитические производные формул _material_i_lambda.
+    warm_start — предыдущее решение той же сети (начальные Q и H).
+    """
+    node_pos = {n.node_id: i for i, n in enumerate(nodes)}
+    for nid in fixed_heads_m:
+        if nid not in node_pos:
+            raise ValueError(f"Узел с заданным напором '{nid}' не найден в сети")
+    if not fixed_heads_m:
+        raise ValueError("Нужен хотя бы один узел с заданным напором (ввод/резервуар)")
+    n_nodes = len(nodes)
+    n_segs = len(segments)
+
+    seg_from = np.empty(n_segs, dtype=np.int64)
+    seg_to = np.empty(n_segs, dtype=np.int64)
+    for si, seg in enumerate(segments):
+        if seg.from_node not in node_pos or seg.to_node not in node_pos:
+            raise ValueError(f"Участок '{seg.seg_id}' ссылается на неизвестный узел")
+        seg_from[si] = node_pos[seg.from_node]
+        seg_to[si] = node_pos[seg.to_node]
+
+    is_fixed = np.zeros(n_nodes, dtype=bool)
+    head = np.zeros(n_nodes, dtype=float)
+    for nid, h0 in fixed_heads_m.items():
+        is_fixed[node_pos[nid]] = True
+        head[node_pos[nid]] = float(h0)
+    free_nodes = np.flatnonzero(~is_fixed)
+    free_pos = np.full(n_nodes, -1, dtype=np.int64)
+    free_pos[free_nodes] = np.arange(free_nodes.size)
+    n_free = int(free_nodes.size)
+
+    # A (участки x узлы): +1 в узле начала, -1 в узле конца; A_J — столбцы узлов с неизвестным напором.
+    rows = np.concatenate([np.arange(n_segs), np.arange(n_segs)])
+    cols = np.concatenate([seg_from, seg_to])
+    vals = np.concatenate([np.ones(n_segs), -np.ones(n_segs)])
+    keep = ~is_fixed[cols]
+    a_j = sp.csr_matrix((vals[keep], (rows[keep], free_pos[cols[keep]])), shape=(n_segs, n_free))
+    a_jt = a_j.T.tocsr()
+
+    demand = np.array([float(n.demand_l_s) for n in nodes], dtype=float)[free_nodes]
+
+    material = np.array([s.material for s in segments], dtype=object)
+    dp = np.maximum(np.array([float(s.dp_m) for s in segments], dtype=float), 1.0e-6)
+    area = math.pi * dp * dp / 4.0
+    nu = water_kinematic_viscosity_m2_s_batch(np.full(n_segs, float(temp_c)))
+    is_new = np.array([bool(s.is_new) for s in segments], dtype=bool)
+    length = np.maximum(np.array([float(s.length_m) for s in segments], dtype=float), 0.0)
+    k_mult = np.array(
+        [1.0 + max(_resolve_k_local(s), 0.0) if s.local_mode == "k" else 1.0 for s in segments],
+        dtype=float,
+    )
+    # Доли расхода в тройниках кольцевой сети заранее неизвестны — ξ тройников берется при r = 1.
+    xi = np.where(np.array([s.local_mode == "xi" for s in segments], dtype=bool), _resolve_xi_sums(segments), 0.0)
+
+    if warm_start is not None and warm_start.q_l_s.shape == (n_segs,) and warm_start.head_m.shape == (n_nodes,):
+        q = warm_start.q_l_s.astype(float).copy()
+        head[free_nodes] = warm_start.head_m[free_nodes]
+    else:
+        # Стартовое приближение: v = 1 м/с по направлению участка.
+        q = area * 1000.0
+        if n_free:
+            head[free_nodes] = max(fixed_heads_m.values())
+
+    history: List[Tuple[float, float]] = []
+    converged = False
+    iterations = 0
+    relax = 1.0
+    prev_r1 = math.inf
+    while True:
+        h_loss, dh_dq = _segment_head_loss(material, dp, area, nu, is_new, length, k_mult, xi, q)
+        r1 = h_loss - (head[seg_from] - head[seg_to])
+        r2 = a_jt @ q + demand
+        r1_max = float(np.max(np.abs(r1))) if n_segs else 0.0
+        r2_max = float(np.max(np.abs(r2))) if n_free else 0.0
+        history.append((r1_max, r2_max))
+        if r1_max <= tol_head_m and r2_max <= tol_flow_l_s:
+            converged = True
+            break
+        if iterations >= max_iter:
+            break
+        iterations += 1
+        # Ламинарно-турбулентный переход (гладкие трубы) дает разрыв h(Q); при росте невязки шаг уменьшаем.
+        relax = max(relax * 0.5, 0.0625) if r1_max > prev_r1 else min(relax * 2.0, 1.0)
+        prev_r1 = r1_max
+
+        # Нижняя граница производной: участок без расхода не должен делать систему вырожденной.
+        d_inv = 1.0 / np.maximum(dh_dq, 1.0e-7)
+        if n_free:
+            s_mat = (a_jt @ sp.diags(d_inv) @ a_j).tocsc()
+            rhs = a_jt @ (d_inv * r1) - r2
+            # S симметрична и положительно определена — симметричное упорядочение ускоряет LU.
+            d_head = np.atleast_1d(spsolve(s_mat, rhs, permc_spec="MMD_AT_PLUS_A"))
+            head[free_nodes] += relax * d_head
+            q = q + relax * d_inv * (a_j @ d_head - r1)
+        else:
+            q = q - relax * d_inv * r1
+
+    return LoopedNetworkResult(
+        segment_ids=[s.seg_id for s in segments],
+        node_ids=[n.node_id for n in nodes],
+        q_l_s=q,
+        h_loss_m=h_loss,
+        head_m=head,
+        converged=converged,
+        iterations=iterations,
+        energy_residual_m=r1_max,
+        continuity_residual_l_s=r2_max,
+        residual_history=history,
+    )
@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from calcs import _B1_P_GRID, _B1_TABLE, _B2_POINTS
+from hydraulics import HydraulicBatchResult, calc_hydraulics_batch, find_recommended_diameters_mm
+
+
+# Таблицы Приложения Б в виде массивов (те же, что в calc_water_by_consumers_advanced).
+_B1_N = np.array(sorted(_B1_TABLE), dtype=float)
+_B1_P = np.array(_B1_P_GRID, dtype=float)
+_B1_Q = np.array([_B1_TABLE[k] for k in sorted(_B1_TABLE)], dtype=float)
+_B2_X = np.array([x for x, _ in _B2_POINTS], dtype=float)
+_B2_Y = np.array([y for _, y in _B2_POINTS], dtype=float)
+
+
+def _grid_bracket(keys: np.ndarray, x: np.ndarray):
+    # Соседние узлы сетки и доля t, как в скалярном _alpha_from_b1 (x уже в пределах сетки).
+    hi = np.searchsorted(keys, x, side="left")
+    lo = np.maximum(hi - 1, 0)
+    k1 = keys[lo]
+    k2 = keys[hi]
+    t = np.where(k2 == k1, 0.0, (x - k1) / np.where(k2 == k1, 1.0, k2 - k1))
+    return lo, hi, t
+
+
+def alpha_b1_batch(n_val, p_val) -> np.ndarray:
+    n = np.clip(np.maximum(np.asarray(n_val, dtype=float), 0.0), _B1_N[0], _B1_N[-1])
+    p = np.clip(np.maximum(np.asarray(p_val, dtype=float), 0.0), _B1_P[0], _B1_P[-1])
+    n_lo, n_hi, tn = _grid_bracket(_B1_N, n)
+    p_lo, p_hi, tp = _grid_bracket(_B1_P, p)
+    qn1 = _B1_Q[n_lo, p_lo] + (_B1_Q[n_hi, p_lo] - _B1_Q[n_lo, p_lo]) * tn
+    qn2 = _B1_Q[n_lo, p_hi] + (_B1_Q[n_hi, p_hi] - _B1_Q[n_lo, p_hi]) * tn
+    return qn1 + (qn2 - qn1) * tp
+
+
+def alpha_b2_batch(np_val) -> np.ndarray:
+    x = np.maximum(np.asarray(np_val, dtype=float), 0.0)
+    # Интервал [x1, x2] с x1 < x ≤ x2 — тот же, что находит скалярный _interp_1d.
+    j = np.clip(np.searchsorted(_B2_X, x, side="left") - 1, 0, _B2_X.size - 2)
+    x1, x2 = _B2_X[j], _B2_X[j + 1]
+    y1, y2 = _B2_Y[j], _B2_Y[j + 1]
+    y = y1 + (y2 - y1) * ((x - x1) / (x2 - x1))
+    y = np.where(x <= _B2_X[0], _B2_Y[0], np.where(x >= _B2_X[-1], _B2_Y[-1], y))
+    return np.maximum(y, 0.0)
+
+
+def alpha_sp_batch(n_val, p_val, np_val) -> np.ndarray:
+    # Векторный аналог calcs._alpha_sp: B.1 при P > 0.1 и N ≤ 200, иначе B.2 по NP.
+    n, p, npv = np.broadcast_arrays(
+        np.asarray(n_val, dtype=float), np.asarray(p_val, dtype=float), np.asarray(np_val, dtype=float)
+    )
+    use_b1 = (p > 0.1) & (n <= 200)
+    return np.where(use_b1, alpha_b1_batch(n, p), alpha_b2_batch(npv))
+
+
+@dataclass
+class RiserResult:
+    floor: np.ndarray  # номер этажа, который питает участок (участок от этажа ниже / основания стояка)
+    n_fixtures: np.ndarray  # N — приборов на этаже и выше
+    np_value: np.ndarray  # NP
+    alpha: np.ndarray
+    q_l_s: np.ndarray  # q = 5·q0·α
+    hydraulics: HydraulicBatchResult
+    h_cum_m: np.ndarray  # потери от основания стояка до этажа
+
+    @property
+    def h_losses_m(self) -> float:
+        return float(self.h_cum_m[-1]) if self.h_cum_m.size else 0.0
+
+    def rows(self) -> List[Dict[str, float]]:
+        hyd = self.hydraulics
+        return [
+            {
+                "floor": int(self.floor[i]),
+                "n": float(self.n_fixtures[i]),
+                "np": float(self.np_value[i]),
+                "alpha": float(self.alpha[i]),
+                "q_l_s": float(self.q_l_s[i]),
+                "dp_mm": float(hyd.dp_m[i]) * 1000.0,
+                "v_m_s": float(hyd.v_m_s[i]),
+                "i_m_per_m": float(hyd.i_m_per_m[i]),
+                "h_total_m": float(hyd.h_total_m[i]),
+                "h_cum_m": float(self.h_cum_m[i]),
+            }
+            for i in range(self.floor.shape[0])
+        ]
+
+
+def calc_riser(
+    fixtures_per_floor: Sequence[float],
+    p: float | Sequence[float],
+    q0_l_s: float,
+    floor_elev_m: Sequence[float],
+    material: str,
+    temp_c: float,
+    is_new: bool = True,
+    base_elev_m: float = 0.0,
+    dp_m: Optional[float | Sequence[float]] = None,
+    v_max_m_s: float = 1.5,
+    local_mode: str = "none",
+    k_local: float = 0.0,
+    xi_sum: float = 0.0,
+) -> RiserResult:
+    """
+    Расчет стояка по этажам (этажи снизу вверх, участок f — от этажа f-1 или основания до этажа f).
+    - N и NP участка — суммы по этажам f и выше (p — вероятность действия прибора, общая или по этажам);
+    - α по Приложению Б (alpha_sp_batch), расчетный расход q = 5·q0·α;
+    - dвн: заданный dp_m или подбор find_recommended_diameters_mm по v_max_m_s;
+    - потери всех участков — один вызов calc_hydraulics_batch.
+    """
+    n_floor = np.maximum(np.asarray(fixtures_per_floor, dtype=float), 0.0)
+    z = np.asarray(floor_elev_m, dtype=float)
+    if n_floor.ndim != 1 or z.shape != n_floor.shape:
+        raise ValueError("Число приборов и отметки должны быть заданы для каждого этажа")
+    p_floor = np.broadcast_to(np.maximum(np.asarray(p, dtype=float), 0.0), n_floor.shape)
+
+    # Суммы «этаж и выше» — накопление сверху вниз.
+    n_cum = np.cumsum(n_floor[::-1])[::-1]
+    np_cum = np.cumsum((n_floor * p_floor)[::-1])[::-1]
+    p_eff = np.divide(np_cum, n_cum, out=np.zeros_like(np_cum), where=n_cum > 0)
+    alpha = alpha_sp_batch(n_cum, p_eff, np_cum)
+    q = np.where(n_cum > 0, 5.0 * max(float(q0_l_s), 0.0) * alpha, 0.0)
+
+    if dp_m is None:
+        picks = find_recommended_diameters_mm(material, q, temp_c, is_new, v_max_m_s=v_max_m_s)
+        dp = np.array([d for d, _ in picks], dtype=float) / 1000.0
+    else:
+        dp = np.broadcast_to(np.asarray(dp_m, dtype=float), n_floor.shape)
+
+    length = np.maximum(np.diff(np.concatenate([[float(base_elev_m)], z])), 0.0)
+    hyd = calc_hydraulics_batch(
+        material=material,
+        q_l_s=q,
+        dp_m=dp,
+        length_m=length,
+        temp_c=temp_c,
+        is_new=is_new,
+        local_mode=local_mode,
+        k_local=k_local,
+        xi_sum=xi_sum,
+    )
+    return RiserResult(
+        floor=np.arange(1, n_floor.shape[0] + 1),
+        n_fixtures=n_cum,
+        np_value=np_cum,
+        alpha=alpha,
+        q_l_s=q,
+        hydraulics=hyd,
+        h_cum_m=np.cumsum(hyd.h_total_m),
+    )
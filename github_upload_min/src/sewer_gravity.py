@@ -0,0 +1,261 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, List, Mapping, Optional, Sequence
+
+import numpy as np
+
+
+# Коэффициент шероховатости n (Маннинг/Павловский) для безнапорных труб — типовые значения.
+SEWER_ROUGHNESS_N: Dict[str, float] = {
+    "plastic": 0.010,
+    "cast_iron": 0.013,
+    "steel": 0.012,
+    "concrete": 0.014,
+    "ceramic": 0.014,
+}
+# Внутренние диаметры для подбора, мм (ряд DN наружной и внутренней канализации).
+SEWER_D_MM = [50, 100, 150, 200, 250, 300, 400, 500, 600, 800, 1000]
+# K в условии незаиляемости v·√(h/d) ≥ K (СП 30.13330.2020): 0.5 для пластмассовых и стеклянных труб, 0.6 для прочих.
+SELF_CLEANING_K = {"plastic": 0.5}
+SELF_CLEANING_K_DEFAULT = 0.6
+SEWER_METHODS = ("manning", "pavlovsky")
+
+# Безразмерные таблицы круглого сечения на равномерной сетке h/d: площадь A/d² и гидравлический радиус R/d.
+_N_GRID = 4001
+_Y = np.linspace(0.0, 1.0, _N_GRID)
+_THETA = 2.0 * np.arccos(1.0 - 2.0 * _Y)
+_AREA = (_THETA - np.sin(_THETA)) / 8.0
+_PERIM = _THETA / 2.0
+_RADIUS = np.divide(_AREA, _PERIM, out=np.zeros_like(_AREA), where=_PERIM > 0)
+# Маннинг: Q = d^(8/3)·√i/n · K(h/d), K = A/d² · (R/d)^(2/3); максимум K — при h/d ≈ 0.938.
+_K_MANNING = _AREA * _RADIUS ** (2.0 / 3.0)
+_PEAK = int(np.argmax(_K_MANNING))
+Y_PEAK = float(_Y[_PEAK])
+# Обратная таблица h/d по u = (K/Kmax)^(6/13): у малых наполнений K ~ (h/d)^(13/6), так что h/d(u) почти линейна.
+_U = np.linspace(0.0, 1.0, _N_GRID)
+_Y_OF_U = np.interp(_U, (_K_MANNING[: _PEAK + 1] / _K_MANNING[_PEAK]) ** (6.0 / 13.0), _Y[: _PEAK + 1])
+
+
+def _lookup(table: np.ndarray, y: np.ndarray) -> np.ndarray:
+    # Линейная интерполяция по равномерной сетке: индекс вычисляется, а не ищется.
+    pos = np.clip(np.asarray(y, dtype=float), 0.0, 1.0) * (_N_GRID - 1)
+    j = np.minimum(np.nan_to_num(pos).astype(np.int64), _N_GRID - 2)  # nan сохраняется через t
+    t = pos - j
+    return table[j] + (table[j + 1] - table[j]) * t
+
+
+def fill_geometry(fill) -> Dict[str, np.ndarray]:
+    # A/d², P/d, R/d для наполнения h/d.
+    return {"area": _lookup(_AREA, fill), "perimeter": _lookup(_PERIM, fill), "radius": _lookup(_RADIUS, fill)}
+
+
+def _chezy(radius_m: np.ndarray, n: np.ndarray, method: str) -> np.ndarray:
+    if method == "manning":
+        return radius_m ** (1.0 / 6.0) / n
+    if method == "pavlovsky":
+        # C = R^y / n, y = 2.5√n - 0.13 - 0.75√R(√n - 0.10).
+        sn = np.sqrt(n)
+        y = 2.5 * sn - 0.13 - 0.75 * np.sqrt(radius_m) * (sn - 0.10)
+        return radius_m ** y / n
+    raise ValueError(f"Неизвестный метод расчета: '{method}'")
+
+
+def gravity_flow_l_s(d_m, fill, slope, n, method: str = "manning") -> np.ndarray:
+    # Расход при заданном наполнении: Q = A·C·√(R·i).
+    d = np.asarray(d_m, dtype=float)
+    area = _lookup(_AREA, fill) * d * d
+    radius = _lookup(_RADIUS, fill) * d
+    v = _chezy(np.maximum(radius, 1.0e-12), np.asarray(n, dtype=float), method) * np.sqrt(radius * np.maximum(slope, 0.0))
+    return area * v * 1000.0
+
+
+@dataclass
+class GravityFlowResult:
+    d_m: np.ndarray
+    slope: np.ndarray
+    q_l_s: np.ndarray
+    fill: np.ndarray  # h/d; nan — расход больше пропускной способности
+    v_m_s: np.ndarray
+    q_capacity_l_s: np.ndarray  # наибольший безнапорный расход (h/d ≈ 0.938)
+    self_cleaning: np.ndarray  # v·√(h/d)
+    ok: np.ndarray  # наполнение, скорость и незаиляемость в пределах требований
+
+    def rows(self, names: Optional[Sequence[str]] = None) -> List[Dict[str, object]]:
+        return [
+            {
+                "name": names[i] if names is not None else str(i + 1),
+                "d_mm": float(self.d_m[i]) * 1000.0,
+                "slope": float(self.slope[i]),
+                "q_l_s": float(self.q_l_s[i]),
+                "fill": float(self.fill[i]),
+                "v_m_s": float(self.v_m_s[i]),
+                "v_sqrt_fill": float(self.self_cleaning[i]),
+                "ok": bool(self.ok[i]),
+            }
+            for i in range(self.d_m.shape[0])
+        ]
+
+
+def solve_partial_fill(
+    q_l_s,
+    d_m,
+    slope,
+    n,
+    method: str = "manning",
+    fill_max: float = 0.6,
+    v_min_m_s: float = 0.7,
+    k_self_cleaning=SELF_CLEANING_K_DEFAULT,
+) -> GravityFlowResult:
+    """
+    Наполнение h/d и скорость в круглой трубе при безнапорном течении (пакетно).
+    - Маннинг: K = Q·n/(d^(8/3)·√i), h/d — из обратной таблицы за O(1);
+    - Павловский: показатель степени зависит от R, поэтому h/d ищется делением пополам
+      по индексам прямой таблицы (log2 4000 ≈ 12 шагов на весь пакет) с интерполяцией внутри шага.
+    ok — h/d ≤ fill_max, v ≥ v_min_m_s и v·√(h/d) ≥ K.
+    """
+    if method not in SEWER_METHODS:
+        raise ValueError(f"Неизвестный метод расчета: '{method}'")
+    q, d, i_s, n_r, k_sc = np.broadcast_arrays(
+        np.maximum(np.asarray(q_l_s, dtype=float), 0.0),
+        np.maximum(np.asarray(d_m, dtype=float), 1.0e-6),
+        np.maximum(np.asarray(slope, dtype=float), 0.0),
+        np.maximum(np.asarray(n, dtype=float), 1.0e-6),
+        np.asarray(k_self_cleaning, dtype=float),
+    )
+    q, d, i_s, n_r, k_sc = (np.atleast_1d(a).astype(float) for a in (q, d, i_s, n_r, k_sc))
+    q_cap = gravity_flow_l_s(d, Y_PEAK, i_s, n_r, method)
+
+    if method == "manning":
+        k_rel = np.divide(
+            q / 1000.0 * n_r,
+            d ** (8.0 / 3.0) * np.sqrt(i_s) * _K_MANNING[_PEAK],
+            out=np.full(q.shape, np.inf),
+            where=i_s > 0,
+        )
+        fill = _lookup(_Y_OF_U, np.clip(k_rel, 0.0, 1.0) ** (6.0 / 13.0))
+    else:
+        lo = np.zeros(q.shape, dtype=np.int64)
+        hi = np.full(q.shape, _PEAK, dtype=np.int64)
+        while np.any(hi - lo > 1):
+            mid = (lo + hi) // 2
+            below = gravity_flow_l_s(d, _Y[mid], i_s, n_r, method) < q
+            lo = np.where(below, mid, lo)
+            hi = np.where(below, hi, mid)
+        q_lo = gravity_flow_l_s(d, _Y[lo], i_s, n_r, method)
+        q_hi = gravity_flow_l_s(d, _Y[hi], i_s, n_r, method)
+        t = np.clip(np.divide(q - q_lo, q_hi - q_lo, out=np.zeros(q.shape), where=q_hi > q_lo), 0.0, 1.0)
+        fill = _Y[lo] + (_Y[hi] - _Y[lo]) * t
+        k_rel = np.divide(q, q_cap, out=np.full(q.shape, np.inf), where=q_cap > 0)
+
+    fill = np.where((k_rel <= 1.0) & (q <= q_cap * (1.0 + 1.0e-12)), fill, np.nan)
+    area = _lookup(_AREA, fill) * d * d
+    v = np.divide(q / 1000.0, area, out=np.zeros(q.shape), where=area > 0)
+    v = np.where(np.isnan(fill), np.nan, v)
+    self_cleaning = v * np.sqrt(fill)
+    with np.errstate(invalid="ignore"):
+        ok = (fill <= float(fill_max)) & (v >= float(v_min_m_s)) & (self_cleaning >= k_sc)
+    return GravityFlowResult(
+        d_m=d, slope=i_s, q_l_s=q, fill=fill, v_m_s=v, q_capacity_l_s=q_cap, self_cleaning=self_cleaning, ok=ok
+    )
+
+
+def required_slope(q_l_s, d_m, fill, n, method: str = "manning") -> np.ndarray:
+    # Уклон, при котором расход q течет с заданным наполнением: Q = A·C·√(R·i) -> i = (Q / (A·C·√R))².
+    d = np.asarray(d_m, dtype=float)
+    area = _lookup(_AREA, fill) * d * d
+    radius = np.maximum(_lookup(_RADIUS, fill) * d, 1.0e-12)
+    c = _chezy(radius, np.asarray(n, dtype=float), method)
+    return (np.asarray(q_l_s, dtype=float) / 1000.0 / (area * c * np.sqrt(radius))) ** 2
+
+
+def size_gravity_pipes(
+    q_l_s,
+    slope,
+    material: str = "plastic",
+    method: str = "manning",
+    candidates_mm: Optional[Sequence[float]] = None,
+    d_min_mm: float = 0.0,
+    fill_max: float = 0.6,
+    v_min_m_s: float = 0.7,
+) -> GravityFlowResult:
+    """
+    Подбор наименьшего диаметра для набора выпусков: все выпуски × все диаметры — один пакетный
+    solve_partial_fill. Если требованиям не удовлетворяет ни один диаметр, берется наименьший
+    с безнапорным течением (ok = False) — при малом расходе обычно нужен больший уклон.
+    """
+    if material not in SEWER_ROUGHNESS_N:
+        raise ValueError(f"Нет коэффициента шероховатости для материала '{material}'")
+    cands = np.asarray([c for c in (candidates_mm or SEWER_D_MM) if c >= float(d_min_mm)], dtype=float)
+    if cands.size == 0:
+        raise ValueError("Нет диаметров для подбора")
+    q, i_s = np.broadcast_arrays(np.atleast_1d(np.asarray(q_l_s, dtype=float)), np.atleast_1d(np.asarray(slope, dtype=float)))
+    n_out, n_c = q.shape[0], cands.size
+    res = solve_partial_fill(
+        np.repeat(q, n_c),
+        np.tile(cands / 1000.0, n_out),
+        np.repeat(i_s, n_c),
+        SEWER_ROUGHNESS_N[material],
+        method=method,
+        fill_max=fill_max,
+        v_min_m_s=v_min_m_s,
+        k_self_cleaning=SELF_CLEANING_K.get(material, SELF_CLEANING_K_DEFAULT),
+    )
+    ok = res.ok.reshape(n_out, n_c)
+    free = ~np.isnan(res.fill.reshape(n_out, n_c))
+    pick = np.where(ok.any(axis=1), np.argmax(ok, axis=1), np.where(free.any(axis=1), np.argmax(free, axis=1), n_c - 1))
+    sel = np.arange(n_out) * n_c + pick
+    return GravityFlowResult(
+        d_m=res.d_m[sel],
+        slope=res.slope[sel],
+        q_l_s=res.q_l_s[sel],
+        fill=res.fill[sel],
+        v_m_s=res.v_m_s[sel],
+        q_capacity_l_s=res.q_capacity_l_s[sel],
+        self_cleaning=res.self_cleaning[sel],
+        ok=res.ok[sel],
+    )
+
+
+def sewer_design_flow_l_s(q_tot_l_s, q0_sewer_l_s: float = 1.6) -> np.ndarray:
+    # Расчетный расход стоков (СП 30.13330.2020): qs = qtot + qs0 при qtot ≤ 8 л/с, иначе qs = qtot.
+    q = np.maximum(np.asarray(q_tot_l_s, dtype=float), 0.0)
+    return np.where(q <= 8.0, q + max(float(q0_sewer_l_s), 0.0), q)
+
+
+def size_outlets(
+    rows: Sequence[Mapping[str, object]],
+    slope=0.02,
+    material: str = "plastic",
+    method: str = "manning",
+    q0_sewer_l_s: float = 1.6,
+    d_min_mm: float = 100.0,
+    fill_max: float = 0.6,
+    v_min_m_s: float = 0.7,
+) -> List[Dict[str, object]]:
+    """
+    Выпуски по строкам баланса ({"name", "q_sec_l_s"}; q_sec_l_s — qtot): расход стоков по СП 30
+    и подбор всех выпусков одним вызовом size_gravity_pipes. Для результата
+    calc_water_by_consumers_advanced — строки balance_rows с водоотведением (sewer_balance_rows).
+    """
+    if not rows:
+        return []
+    names = [str(r.get("name", "")) for r in rows]
+    q_tot = np.array([float(r.get("q_sec_l_s", 0.0) or 0.0) for r in rows], dtype=float)
+    res = size_gravity_pipes(
+        sewer_design_flow_l_s(q_tot, q0_sewer_l_s),
+        slope,
+        material=material,
+        method=method,
+        d_min_mm=d_min_mm,
+        fill_max=fill_max,
+        v_min_m_s=v_min_m_s,
+    )
+    out = res.rows(names)
+    for row, qt in zip(out, q_tot):
+        row["q_tot_l_s"] = float(qt)
+    return out
+
+
+def sewer_balance_rows(water_res: Mapping[str, object]) -> List[Mapping[str, object]]:
+    return [r for r in (water_res.get("balance_rows") or []) if "водоотвед" in str(r.get("name", "")).lower()]
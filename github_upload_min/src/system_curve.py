@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import csv
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from hydraulics import calc_hydraulics_batch
+
+
+PUMP_CATALOG_PATH = Path(__file__).resolve().parents[1] / "data" / "pump_catalog.csv"
+
+
+@dataclass
+class SystemCurve:
+    q_l_s: np.ndarray
+    h_required_m: np.ndarray  # Hтр(q)
+    h_losses_m: np.ndarray  # Hпотерь участка
+    h_meter_m: np.ndarray  # hсч = S·q²
+    h_inlet_m: np.ndarray  # Hввод = i·Lввода
+    h_static_m: float  # Hгеом + Hсвоб + Hтепл — не зависит от расхода
+
+    def head_at(self, q_l_s: float) -> float:
+        return float(np.interp(float(q_l_s), self.q_l_s, self.h_required_m))
+
+
+@dataclass
+class PumpCurve:
+    model: str
+    q_l_s: np.ndarray  # по возрастанию
+    h_m: np.ndarray
+    n_pumps: int = 1  # рабочих насосов параллельно (характеристика уже пересчитана на станцию)
+    source: str = ""
+
+
+@dataclass
+class DutyPoint:
+    model: str
+    found: bool
+    q_l_s: float
+    h_m: float
+    note: str = ""
+
+
+def calc_system_curve(
+    material: str,
+    dp_m: float,
+    length_m: float,
+    temp_c: float,
+    is_new: bool,
+    q_max_l_s: float,
+    h_geo_m: float,
+    h_free_m: float,
+    meter_s: float = 0.0,
+    h_hex_m: float = 0.0,
+    l_inlet_m: float = 0.0,
+    local_mode: str = "none",
+    k_local: float = 0.0,
+    xi_sum: float = 0.0,
+    n_points: int = 400,
+) -> SystemCurve:
+    """
+    Характеристика сети Hтр(q) = Hгеом + Hпотерь(q) + Hсвоб + S·q² + Hтепл + i(q)·Lввода
+    на равномерной сетке 0..q_max_l_s (те же слагаемые, что в блоке требуемого напора).
+    Потери по всей сетке расходов — один вызов calc_hydraulics_batch.
+    """
+    n = max(int(n_points), 2)
+    q = np.linspace(0.0, max(float(q_max_l_s), 0.0), n)
+    hyd = calc_hydraulics_batch(
+        material=material,
+        q_l_s=q,
+        dp_m=dp_m,
+        length_m=length_m,
+        temp_c=temp_c,
+        is_new=is_new,
+        local_mode=local_mode,
+        k_local=k_local,
+        xi_sum=xi_sum,
+    )
+    h_static = float(h_geo_m) + float(h_free_m) + float(h_hex_m)
+    h_meter = max(float(meter_s), 0.0) * q * q
+    h_inlet = hyd.i_m_per_m * max(float(l_inlet_m), 0.0)
+    return SystemCurve(
+        q_l_s=q,
+        h_required_m=h_static + hyd.h_total_m + h_meter + h_inlet,
+        h_losses_m=hyd.h_total_m,
+        h_meter_m=h_meter,
+        h_inlet_m=h_inlet,
+        h_static_m=h_static,
+    )
+
+
+def load_pump_catalog(path: Optional[Path] = None) -> List[PumpCurve]:
+    # CSV: model, n_pumps, q_m3_h, h_m[, source] — по строке на точку характеристики одного насоса.
+    # Поставляется только заголовок: характеристики вносятся по данным производителя.
+    src = Path(path) if path is not None else PUMP_CATALOG_PATH
+    if not src.exists():
+        return []
+    points: Dict[str, List[tuple]] = {}
+    meta: Dict[str, tuple] = {}
+    with src.open(encoding="utf-8") as fh:
+        for row in csv.DictReader(fh):
+            model = (row.get("model") or "").strip()
+            if not model:
+                continue
+            try:
+                q_m3_h = float(row.get("q_m3_h") or 0.0)
+                h_m = float(row.get("h_m") or 0.0)
+                n_pumps = max(int(float(row.get("n_pumps") or 1)), 1)
+            except ValueError:
+                raise ValueError(f"Некорректная строка каталога насосов для '{model}'") from None
+            points.setdefault(model, []).append((q_m3_h, h_m))
+            meta.setdefault(model, (n_pumps, (row.get("source") or "").strip()))
+
+    pumps: List[PumpCurve] = []
+    for model, pts in points.items():
+        pts.sort()
+        n_pumps, source = meta[model]
+        # м³/ч -> л/с; параллельная работа одинаковых насосов: расход умножается на их число.
+        q = np.array([p[0] for p in pts], dtype=float) / 3.6 * n_pumps
+        h = np.array([p[1] for p in pts], dtype=float)
+        pumps.append(PumpCurve(model=model, q_l_s=q, h_m=h, n_pumps=n_pumps, source=source))
+    return pumps
+
+
+def find_duty_point(system: SystemCurve, pump: PumpCurve) -> DutyPoint:
+    # Рабочая точка — первое пересечение характеристики насоса с характеристикой сети (снизу по расходу).
+    if pump.q_l_s.size < 2:
+        return DutyPoint(model=pump.model, found=False, q_l_s=0.0, h_m=0.0, note="В каталоге меньше двух точек")
+    q_hi = min(float(pump.q_l_s[-1]), float(system.q_l_s[-1]))
+    mask = system.q_l_s <= q_hi
+    q = system.q_l_s[mask]
+    diff = np.interp(q, pump.q_l_s, pump.h_m) - system.h_required_m[mask]
+    if diff.size == 0 or diff[0] < 0:
+        return DutyPoint(model=pump.model, found=False, q_l_s=0.0, h_m=0.0, note="Напор насоса ниже статического напора сети")
+    cross = np.flatnonzero((diff[:-1] >= 0) & (diff[1:] < 0))
+    if cross.size == 0:
+        if q_hi >= float(system.q_l_s[-1]):
+            note = "Насос обеспечивает напор во всем диапазоне расходов сети"
+        else:
+            note = "Пересечение за пределами характеристики насоса"
+        return DutyPoint(model=pump.model, found=False, q_l_s=float(q[-1]), h_m=float(system.h_required_m[mask][-1]), note=note)
+    k = int(cross[0])
+    t = diff[k] / (diff[k] - diff[k + 1])
+    q_d = float(q[k] + t * (q[k + 1] - q[k]))
+    return DutyPoint(model=pump.model, found=True, q_l_s=q_d, h_m=system.head_at(q_d))
+
+
+def duty_points(system: SystemCurve, pumps: Optional[List[PumpCurve]] = None) -> List[DutyPoint]:
+    if pumps is None:
+        pumps = load_pump_catalog()
+        if not pumps:
+            raise ValueError(
+                f"Каталог насосов пуст: {PUMP_CATALOG_PATH} — внесите характеристики насосов производителя"
+            )
+    return [find_duty_point(system, p) for p in pumps]
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from hydraulics import calc_hydraulics_batch
+from pipe_catalog import PipeSize
+
+
+@dataclass
+class UncertaintyResult:
+    n_samples: int
+    percentiles: Sequence[float]
+    v_m_s: Dict[float, float]  # процентиль -> значение
+    h_total_m: Dict[float, float]
+    i_m_per_m: Dict[float, float]
+    v_mean_m_s: float
+    h_total_mean_m: float
+    samples_v_m_s: Optional[np.ndarray] = field(default=None, repr=False)
+    samples_h_total_m: Optional[np.ndarray] = field(default=None, repr=False)
+
+    def band_rows(self) -> List[Dict[str, float]]:
+        return [
+            {
+                "percentile": p,
+                "v_m_s": self.v_m_s[p],
+                "i_m_per_m": self.i_m_per_m[p],
+                "h_total_m": self.h_total_m[p],
+            }
+            for p in self.percentiles
+        ]
+
+
+def monte_carlo_hydraulics(
+    material: str,
+    q_l_s: float,
+    d_out_mm: float,
+    wall_min_mm: float,
+    wall_max_mm: float,
+    length_m: float,
+    temp_c: float,
+    q_rel_sigma: float = 0.1,
+    p_new: float = 1.0,
+    temp_spread_c: float = 0.0,
+    local_mode: str = "none",
+    k_local: float = 0.0,
+    xi_sum: float = 0.0,
+    n_samples: int = 20000,
+    percentiles: Sequence[float] = (50.0, 90.0, 99.0),
+    seed: Optional[int] = None,
+    keep_samples: bool = False,
+) -> UncertaintyResult:
+    """
+    Статистическая оценка потерь напора участка (метод Монте-Карло).
+    Случайные входные данные:
+    - расход: логнормальное распределение со средним q_l_s и коэффициентом вариации q_rel_sigma;
+    - толщина стенки: равномерно от wall_min_mm до wall_max_mm (например, e_min..e_nom по ГОСТ ISO 2531);
+    - состояние трубы: новая с вероятностью p_new, иначе бывшая в эксплуатации;
+    - температура: равномерно в пределах temp_c ± temp_spread_c.
+    Все реализации считаются одним вызовом calc_hydraulics_batch.
+    """
+    n = max(int(n_samples), 1)
+    if wall_max_mm < wall_min_mm:
+        raise ValueError("Максимальная толщина стенки меньше минимальной")
+    if d_out_mm - 2.0 * wall_max_mm <= 0:
+        raise ValueError("Внутренний диаметр при максимальной толщине стенки не положителен")
+    rng = np.random.default_rng(seed)
+
+    q_mean = max(float(q_l_s), 0.0)
+    cv = max(float(q_rel_sigma), 0.0)
+    if q_mean > 0 and cv > 0:
+        # Параметры логнормального распределения по среднему и коэффициенту вариации.
+        s2 = np.log1p(cv * cv)
+        q = rng.lognormal(mean=np.log(q_mean) - 0.5 * s2, sigma=np.sqrt(s2), size=n)
+    else:
+        q = np.full(n, q_mean)
+    wall = rng.uniform(float(wall_min_mm), float(wall_max_mm), size=n)
+    is_new = rng.random(n) < min(max(float(p_new), 0.0), 1.0)
+    spread = max(float(temp_spread_c), 0.0)
+    temp = rng.uniform(temp_c - spread, temp_c + spread, size=n) if spread > 0 else float(temp_c)
+
+    res = calc_hydraulics_batch(
+        material=material,
+        q_l_s=q,
+        dp_m=(float(d_out_mm) - 2.0 * wall) / 1000.0,
+        length_m=length_m,
+        temp_c=temp,
+        is_new=is_new,
+        local_mode=local_mode,
+        k_local=k_local,
+        xi_sum=xi_sum,
+    )
+
+    pcts = [float(p) for p in percentiles]
+    v_p = np.percentile(res.v_m_s, pcts)
+    h_p = np.percentile(res.h_total_m, pcts)
+    i_p = np.percentile(res.i_m_per_m, pcts)
+    return UncertaintyResult(
+        n_samples=n,
+        percentiles=pcts,
+        v_m_s=dict(zip(pcts, v_p.tolist())),
+        h_total_m=dict(zip(pcts, h_p.tolist())),
+        i_m_per_m=dict(zip(pcts, i_p.tolist())),
+        v_mean_m_s=float(np.mean(res.v_m_s)),
+        h_total_mean_m=float(np.mean(res.h_total_m)),
+        samples_v_m_s=res.v_m_s if keep_samples else None,
+        samples_h_total_m=res.h_total_m if keep_samples else None,
+    )
+
+
+def monte_carlo_pipe_size(size: PipeSize, q_l_s: float, length_m: float, temp_c: float, **kwargs) -> UncertaintyResult:
+    # Диапазон толщин стенки берется из каталога (wall_mm..wall_max_mm).
+    return monte_carlo_hydraulics(
+        material=size.material,
+        q_l_s=q_l_s,
+        d_out_mm=size.d_out_mm,
+        wall_min_mm=size.wall_mm,
+        wall_max_mm=size.wall_max_mm,
+        length_m=length_m,
+        temp_c=temp_c,
+        **kwargs,
+    )
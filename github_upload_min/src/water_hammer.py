@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+import numpy as np
+
+from hydraulics import G, calc_hydraulics_batch
+from water_properties import water_density
+
+
+# Модуль упругости материала стенки E, Па.
+MATERIAL_ELASTIC_MODULUS_PA: Dict[str, float] = {
+    "steel_vgp": 2.06e11,
+    "steel_welded": 2.06e11,
+    "cast_iron": 1.7e11,  # высокопрочный чугун с шаровидным графитом
+    "plastic": 1.0e9,  # ПЭ100, кратковременный модуль
+    "metal_plastic": 1.3e9,
+    "polyplastic": 0.9e9,
+    "fiberglass": 2.5e10,
+    "copper": 1.1e11,
+}
+
+# Объемный модуль упругости воды K, Па (слабо зависит от температуры в диапазоне ХВС/ГВС).
+WATER_BULK_MODULUS_PA = 2.19e9
+
+
+@dataclass
+class TransientPipe:
+    material: str
+    length_m: float
+    dp_m: float  # внутренний диаметр
+    wall_mm: float
+    is_new: bool = True
+
+
+@dataclass
+class TransientResult:
+    x_m: np.ndarray  # координата узлов расчетной сетки от резервуара
+    h_steady_m: np.ndarray
+    h_max_m: np.ndarray  # огибающие напора за время расчета
+    h_min_m: np.ndarray
+    wave_speed_m_s: np.ndarray  # скорректированная под шаг по времени, по трубам
+    dt_s: float
+    n_steps: int
+    t_s: np.ndarray = field(repr=False)  # моменты записи истории у задвижки
+    h_valve_m: np.ndarray = field(repr=False)
+    q_valve_l_s: np.ndarray = field(repr=False)
+
+    @property
+    def surge_m(self) -> float:
+        return float(np.max(self.h_max_m - self.h_steady_m))
+
+
+def wave_speed_m_s(material: str, dp_m: float, wall_mm: float, temp_c: float = 10.0) -> float:
+    # Скорость ударной волны (Жуковский, тонкостенная труба с компенсаторами): a = sqrt(K/ρ / (1 + K·D/(E·e))).
+    if material not in MATERIAL_ELASTIC_MODULUS_PA:
+        raise ValueError(f"Нет модуля упругости для материала '{material}'")
+    if wall_mm <= 0:
+        raise ValueError("Толщина стенки должна быть больше нуля")
+    e_mod = MATERIAL_ELASTIC_MODULUS_PA[material]
+    rho = water_density(temp_c)
+    k = WATER_BULK_MODULUS_PA
+    return math.sqrt(k / rho / (1.0 + k * float(dp_m) / (e_mod * float(wall_mm) / 1000.0)))
+
+
+def joukowsky_head_rise_m(wave_speed: float, dv_m_s: float) -> float:
+    # Мгновенное закрытие: ΔH = a·Δv/g (оценка сверху для прямого гидроудара).
+    return float(wave_speed) * float(dv_m_s) / G
+
+
+def simulate_valve_closure(
+    pipes: List[TransientPipe],
+    q0_l_s: float,
+    h_reservoir_m: float,
+    closure_time_s: float,
+    sim_time_s: float,
+    temp_c: float = 10.0,
+    h_tail_m: float = 0.0,
+    closure_exponent: float = 1.0,
+    min_reaches: int = 4,
+    record_every: int = 1,
+) -> TransientResult:
+    """
+    Гидравлический удар при закрытии задвижки в конце трубопровода (метод характеристик).
+    Схема: резервуар с постоянным напором -> последовательные трубы -> задвижка с истечением под напор h_tail_m.
+    - шаг dt выбирается так, чтобы самая короткая труба имела не менее min_reaches участков
+      (число Куранта = 1, скорость волны в остальных трубах подгоняется под целое число участков);
+    - трение — квазистационарное, λ каждой трубы берется из calc_hydraulics_batch при начальном расходе;
+    - открытие задвижки τ(t) = (1 - t/tз)^m, расход Q = τ·Q0·sqrt(ΔH/ΔH0).
+    Все узлы пересчитываются на каждом шаге векторно.
+    Разрыв сплошности не моделируется: h_min ниже оси трубы более чем на ~10 м означает кавитацию,
+    и огибающие после этого момента — оценка, а не расчет.
+    """
+    if not pipes:
+        raise ValueError("Трубопровод не содержит участков")
+    if closure_time_s < 0 or sim_time_s <= 0:
+        raise ValueError("Некорректное время закрытия или расчета")
+    q0 = float(q0_l_s) / 1000.0
+
+    a_phys = np.array([wave_speed_m_s(p.material, p.dp_m, p.wall_mm, temp_c) for p in pipes], dtype=float)
+    lengths = np.array([max(float(p.length_m), 1.0e-6) for p in pipes], dtype=float)
+    dt = float(np.min(lengths / a_phys)) / max(int(min_reaches), 1)
+    n_reach = np.maximum(np.rint(lengths / (a_phys * dt)).astype(np.int64), 1)
+    a = lengths / (n_reach * dt)
+
+    dp = np.array([float(p.dp_m) for p in pipes], dtype=float)
+    area = math.pi * dp * dp / 4.0
+    hyd = calc_hydraulics_batch(
+        material=[p.material for p in pipes],
+        q_l_s=float(q0_l_s),
+        dp_m=dp,
+        length_m=lengths,
+        temp_c=temp_c,
+        is_new=[bool(p.is_new) for p in pipes],
+    )
+    lam = np.where(hyd.lambda_f > 0, hyd.lambda_f, 0.02)
+
+    # Параметры участков сетки (reach k соединяет узлы k и k+1).
+    pipe_of_reach = np.repeat(np.arange(len(pipes)), n_reach)
+    dx = (lengths / n_reach)[pipe_of_reach]
+    b = (a / (G * area))[pipe_of_reach]
+    r = (lam / (2.0 * G * dp * area * area))[pipe_of_reach] * dx
+    n_r = int(pipe_of_reach.size)
+
+    # Начальное стационарное состояние в той же дискретизации.
+    q = np.full(n_r + 1, q0)
+    h = np.empty(n_r + 1)
+    h[0] = float(h_reservoir_m)
+    h[1:] = float(h_reservoir_m) - np.cumsum(r * q0 * abs(q0))
+    dh0 = h[-1] - float(h_tail_m)
+    if q0 > 0 and dh0 <= 0:
+        raise ValueError("Напора резервуара недостаточно для начального расхода через задвижку")
+    h_steady = h.copy()
+    h_max = h.copy()
+    h_min = h.copy()
+
+    n_steps = int(math.ceil(float(sim_time_s) / dt))
+    rec = max(int(record_every), 1)
+    n_rec = n_steps // rec + 1
+    t_hist = np.empty(n_rec)
+    h_hist = np.empty(n_rec)
+    q_hist = np.empty(n_rec)
+    t_hist[0], h_hist[0], q_hist[0] = 0.0, h[-1], q[-1] * 1000.0
+
+    b_l = b[:-1]
+    b_r = b[1:]
+    b_sum = b_l + b_r
+    b_last = b[-1]
+    b_first = b[0]
+    cp = np.empty(n_r)
+    cm = np.empty(n_r)
+    h_tail = float(h_tail_m)
+    m_exp = float(closure_exponent)
+    for step in range(1, n_steps + 1):
+        # C+ приходит в узлы 1..N из участка слева, C- — в узлы 0..N-1 из участка справа.
+        fq = r * q[:-1] * np.abs(q[:-1])
+        np.add(h[:-1], b * q[:-1], out=cp)
+        cp -= fq
+        fq = r * q[1:] * np.abs(q[1:])
+        np.subtract(h[1:], b * q[1:], out=cm)
+        cm += fq
+
+        q_new = np.empty_like(q)
+        h_new = np.empty_like(h)
+        q_new[1:-1] = (cp[:-1] - cm[1:]) / b_sum
+        h_new[1:-1] = cp[:-1] - b_l * q_new[1:-1]
+
+        h_new[0] = h[0]
+        q_new[0] = (h_new[0] - cm[0]) / b_first
+
+        t = step * dt
+        tau = (1.0 - t / closure_time_s) ** m_exp if t < closure_time_s else 0.0
+        c_last = cp[-1] - h_tail
+        if tau > 0 and q0 > 0:
+            cv = (tau * q0) ** 2 / (2.0 * dh0)
+            q_v = -cv * b_last + math.sqrt((cv * b_last) ** 2 + 2.0 * cv * max(c_last, 0.0))
+        else:
+            q_v = 0.0
+        q_new[-1] = q_v
+        h_new[-1] = cp[-1] - b_last * q_v
+
+        q = q_new
+        h = h_new
+        np.maximum(h_max, h, out=h_max)
+        np.minimum(h_min, h, out=h_min)
+        if step % rec == 0:
+            k = step // rec
+            t_hist[k], h_hist[k], q_hist[k] = t, h[-1], q[-1] * 1000.0
+
+    x = np.concatenate([[0.0], np.cumsum(dx)])
+    n_done = n_steps // rec + 1
+    return TransientResult(
+        x_m=x,
+        h_steady_m=h_steady,
+        h_max_m=h_max,
+        h_min_m=h_min,
+        wave_speed_m_s=a,
+        dt_s=dt,
+        n_steps=n_steps,
+        t_s=t_hist[:n_done],
+        h_valve_m=h_hist[:n_done],
+        q_valve_l_s=q_hist[:n_done],
+    )
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+from typing import List, Tuple
+
+import numpy as np
+
+
+# Опорные значения свойств воды при атмосферном давлении: (t, °C) -> значение.
+# Диапазон 5–70 °C совпадает с прежней таблицей hydraulics, края 0 и 80–100 °C добавлены для ГВС.
+WATER_NU_POINTS: List[Tuple[float, float]] = [
+    (0.0, 1.79e-6),
+    (5.0, 1.52e-6),
+    (10.0, 1.31e-6),
+    (20.0, 1.00e-6),
+    (30.0, 0.80e-6),
+    (40.0, 0.66e-6),
+    (50.0, 0.55e-6),
+    (60.0, 0.47e-6),
+    (70.0, 0.41e-6),
+    (80.0, 0.365e-6),
+    (90.0, 0.326e-6),
+    (100.0, 0.295e-6),
+]
+
+WATER_RHO_POINTS: List[Tuple[float, float]] = [
+    (0.0, 999.84),
+    (5.0, 999.97),
+    (10.0, 999.70),
+    (20.0, 998.21),
+    (30.0, 995.65),
+    (40.0, 992.22),
+    (50.0, 988.04),
+    (60.0, 983.20),
+    (70.0, 977.76),
+    (80.0, 971.79),
+    (90.0, 965.31),
+    (100.0, 958.35),
+]
+
+T_MIN_C = 0.0
+T_MAX_C = 100.0
+# Равномерная сетка с шагом 1 °C: опорные точки лежат в узлах, поэтому линейная интерполяция
+# по сетке совпадает с интерполяцией по исходной таблице, а поиск ячейки — O(1).
+T_STEP_C = 1.0
+_N = int(round((T_MAX_C - T_MIN_C) / T_STEP_C)) + 1
+_T_GRID = T_MIN_C + T_STEP_C * np.arange(_N)
+
+NU_GRID = np.interp(_T_GRID, [p[0] for p in WATER_NU_POINTS], [p[1] for p in WATER_NU_POINTS])
+RHO_GRID = np.interp(_T_GRID, [p[0] for p in WATER_RHO_POINTS], [p[1] for p in WATER_RHO_POINTS])
+_NU_LIST = NU_GRID.tolist()
+_RHO_LIST = RHO_GRID.tolist()
+
+
+def _lookup(values: List[float], temp_c: float) -> float:
+    x = float(temp_c)
+    if x != x:
+        # NaN не проходит ни одну из проверок границ — возвращается как есть, как в _lookup_batch.
+        return x
+    if x <= T_MIN_C:
+        return values[0]
+    if x >= T_MAX_C:
+        return values[-1]
+    pos = (x - T_MIN_C) / T_STEP_C
+    j = int(pos)
+    t = pos - j
+    return values[j] + (values[j + 1] - values[j]) * t
+
+
+def _lookup_batch(values: np.ndarray, temp_c) -> np.ndarray:
+    pos = (np.clip(np.asarray(temp_c, dtype=float), T_MIN_C, T_MAX_C) - T_MIN_C) / T_STEP_C
+    # NaN -> ячейка 0 для индекса, а сам NaN переходит в результат через t.
+    j = np.minimum(np.nan_to_num(pos).astype(np.int64), _N - 2)
+    t = pos - j
+    return values[j] + (values[j + 1] - values[j]) * t
+
+
+def water_kinematic_viscosity(temp_c: float) -> float:
+    # Кинематическая вязкость, м2/с (0–100 °C, за пределами — значение на границе, NaN -> NaN).
+    return _lookup(_NU_LIST, temp_c)
+
+
+def water_density(temp_c: float) -> float:
+    # Плотность, кг/м3.
+    return _lookup(_RHO_LIST, temp_c)
+
+
+def water_kinematic_viscosity_batch(temp_c) -> np.ndarray:
+    return _lookup_batch(NU_GRID, temp_c)
+
+
+def water_density_batch(temp_c) -> np.ndarray:
+    return _lookup_batch(RHO_GRID, temp_c)
+
+
+def water_dynamic_viscosity_batch(temp_c) -> np.ndarray:
+    # Динамическая вязкость, Па·с.
+    return water_kinematic_viscosity_batch(temp_c) * water_density_batch(temp_c)